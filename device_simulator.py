@@ -1,12 +1,104 @@
 # device_simulator.py
+import os
 import time
 import random
+import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication
 from datetime import datetime, timedelta
 
+from services.frame_transport import FrameRing
+from services.cycle_analytics import CycleTimeAnalytics
+from services.eta_engine import EtaEngine
+from services.bottleneck import BottleneckAnalyzer
+from services.oee_engine import OeeEngine
+
+# 设备状态在帧中以编码保存
+DEVICE_STATES = ('running', 'idle', 'fault', 'call', 'offline', 'blocked', 'starved')
+_STATE_CODES = {state: code for code, state in enumerate(DEVICE_STATES)}
+
+def make_line_names(count):
+    """Line A ... Line Z，之后为 Line 27, Line 28 ..."""
+    return [f"Line {chr(ord('A') + i)}" if i < 26 else f"Line {i + 1}" for i in range(count)]
+
+# 产线数量 (MES_LINE_COUNT，控制室大屏可设为 50 以上)、各产线目标节拍 (秒/件) 与模拟的实际周期 (均值, 标准差)
+LINE_COUNT = max(1, int(os.environ.get('MES_LINE_COUNT', '2')))
+LINE_TAKT = {line: 10.0 for line in make_line_names(LINE_COUNT)}
+SIM_LINE_CYCLES = {'Line A': (9.8, 1.2), 'Line B': (13.0, 2.5)}
+SIM_DEFAULT_CYCLE = (10.5, 1.8)
+SIM_STOP_PROBABILITY = 0.003    # 每秒发生短停机的概率
+
+# 每条产线的工位 (按物流顺序) 与模拟用的串行缓冲模型参数
+STATION_KINDS = ('挤出机', '牵引机', '切割机')
+LINE_STATIONS = {line: tuple(f"{kind} {line.split(' ', 1)[1]}" for kind in STATION_KINDS) for line in LINE_TAKT}
+# 接入采集端的工位 -> 采集端设备编号 (设备监控页/采集服务按设备编号上报)
+STATION_DEVICE_IDS = {'挤出机 A': 'EXTRUDER-A', '挤出机 B': 'EXTRUDER-B', '牵引机 A': 'HAULOFF-A'}
+SIM_SLOW_STATION = {'Line A': 0, 'Line B': 1}   # 各产线最慢的工位序号，其余产线按序号轮换
+SIM_STATION_MARGIN = 1.15       # 非瓶颈工位相对瓶颈的产能余量
+SIM_BUFFER_CAPACITY = 3.0       # 相邻工位之间的缓存 (件)
+SIM_FAULT_PROBABILITY = 0.0005  # 每个工位每秒发生故障的概率
+SIM_DEFECT_RATE = (0.005, 0.03) # 不良率范围
+
+# OEE: 实时值取最近 OEE_WINDOW 秒；启动时为报表生成 OEE_HISTORY_DAYS 天的模拟历史
+OEE_WINDOW = 3600
+OEE_HISTORY_DAYS = 30
+
+def seed_oee_history(engine, line_devices, end, days=OEE_HISTORY_DAYS):
+    """按 运行/待料/故障/换型 交替的随机过程生成各产线出料工位的历史状态与产量 (每 5 分钟记一次产量)"""
+    for line, device in line_devices.items():
+        mean = SIM_LINE_CYCLES.get(line, SIM_DEFAULT_CYCLE)[0]
+        ts = end - days * 86400; next_setup = ts + random.uniform(6, 10) * 3600
+        while ts < end:
+            if ts >= next_setup: state, duration = 'setup', random.uniform(20, 45) * 60
+            else:
+                r = random.random()
+                if r < 0.08: state, duration = 'fault', random.uniform(10, 60) * 60
+                elif r < 0.3: state, duration = 'idle', random.uniform(2, 10) * 60
+                else: state, duration = 'run', random.expovariate(1 / 2400)
+            duration = min(duration, end - ts)
+            engine.set_state(device, ts, state)
+            if state == 'setup': next_setup = ts + duration + random.uniform(6, 10) * 3600
+            if state == 'run':
+                t = ts
+                while t < ts + duration:
+                    step = min(300.0, ts + duration - t); t += step
+                    count = step / (mean * random.uniform(1.0, 1.15))
+                    engine.record_output(device, t, count, count * (1 - random.uniform(*SIM_DEFECT_RATE)))
+            ts += duration
+
+def default_schedule(lines):
+    """Line A/B 沿用原来的示例工单，其余产线各生成两张工单"""
+    schedule = [
+        {'line': 'Line A', 'order': 'WO-001', 'start': 0, 'end': 8, 'quantity': 2800},
+        {'line': 'Line B', 'order': 'WO-002', 'start': 2, 'end': 10, 'quantity': 2200},
+        {'line': 'Line A', 'order': 'WO-003', 'start': 9, 'end': 15, 'quantity': 2100},
+        {'line': 'Line B', 'order': 'WO-004', 'start': 11, 'end': 20, 'quantity': 2400},
+    ]
+    schedule = [task for task in schedule if task['line'] in lines]
+    for index, line in enumerate(lines[2:], start=2):
+        start = index % 4
+        schedule.append({'line': line, 'order': f"WO-{100 + index * 2:03d}", 'start': start, 'end': start + 8, 'quantity': 2600})
+        schedule.append({'line': line, 'order': f"WO-{101 + index * 2:03d}", 'start': start + 9, 'end': start + 16, 'quantity': 2200})
+    return schedule
+
+def scheduling_frame_dtype(device_count, line_count=len(LINE_TAKT)):
+    """排程/执行数据帧；排程列表本身不进帧，只带版本号，版本变化时界面再去读 thread.schedule"""
+    return np.dtype([('timestamp', '<f8'), ('total_plan', '<f8'), ('pending_orders', '<i4'),
+                     ('theoretical_output', '<f8'), ('actual_output', '<f8'), ('oee', '<f8'),
+                     ('schedule_version', '<i4'), ('device_state', 'u1', (device_count,)),
+                     ('line_units', '<u4', (line_count,))])
+
+DEVICE_FRAME_DTYPE = np.dtype([('epoch', '<f8'), ('temperature', '<f8'), ('pressure', '<f8'), ('speed', '<f8')])
+
 class SchedulingSimulatorThread(QThread):
-    """模拟排程与调度系统的后台数据流"""
+    """
+    模拟排程与调度系统的后台数据流。
+    每秒把数据写入 self.frames (FrameRing) 并发出 frame_ready(序号)；
+    data_updated(dict) 仅为兼容保留，只在有槽函数连接时才构造字典。
+    """
+    frame_ready = pyqtSignal(int)
     data_updated = pyqtSignal(dict)
+    history_ready = pyqtSignal()    # OEE 模拟历史生成完毕 (在数据线程中生成，启动时不阻塞界面)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -15,46 +107,218 @@ class SchedulingSimulatorThread(QThread):
         # 模拟计划数据
         self.total_plan_output = 50000
         self.pending_orders = 5
-        self.schedule = [
-            {'line': 'Line A', 'order': 'WO-001', 'start': 0, 'end': 8},
-            {'line': 'Line B', 'order': 'WO-002', 'start': 2, 'end': 10},
-            {'line': 'Line A', 'order': 'WO-003', 'start': 9, 'end': 15},
-            {'line': 'Line B', 'order': 'WO-004', 'start': 11, 'end': 20},
-        ]
+        self.schedule = default_schedule(list(LINE_TAKT))
         
         # 模拟执行数据
         self.start_time = time.time()
         self.current_output = 0
-        self.oee = 85.0
-        self.devices_status = { '挤出机 A': 'running', '挤出机 B': 'running', '牵引机 A': 'running' }
+        self.oee = 0.0
+        self.devices_status = {name: 'running' for stations in LINE_STATIONS.values() for name in stations}
+
+        # 各产线的完工事件与节拍统计
+        self.line_names = tuple(LINE_TAKT)
+        self.cycle_analytics = CycleTimeAnalytics(LINE_TAKT)
+        self._next_unit = {line: self.start_time + random.gauss(*SIM_LINE_CYCLES.get(line, SIM_DEFAULT_CYCLE)) for line in self.line_names}
+        self.eta = EtaEngine(self.schedule, LINE_TAKT)
+
+        # 工位状态/产量与瓶颈识别
+        self.bottlenecks = BottleneckAnalyzer(LINE_STATIONS)
+        self.station_output = {name: 0.0 for name in self.devices_status}
+        self._buffers = {line: [0.0] * (len(stations) - 1) for line, stations in LINE_STATIONS.items()}
+        self._fault_until = {}
+        self._last_advance = None
+
+        # OEE 由工位状态区间与产量计算 (services/oee_engine.py)，产线 OEE 取其出料工位
+        self.line_output_device = {line: stations[-1] for line, stations in LINE_STATIONS.items()}
+        self.oee_engine = OeeEngine({name: LINE_TAKT[line] for line, stations in LINE_STATIONS.items() for name in stations})
+
+        self.schedule_version = 1
+        self.device_names = tuple(self.devices_status)
+        self.frames = FrameRing(scheduling_frame_dtype(len(self.device_names), len(self.line_names)))
+
+    def line_oee(self, lines=None, start=None, end=None):
+        """产线 (默认全部) 在 [start, end) 内的 OEE，默认为最近 OEE_WINDOW 秒"""
+        end = time.time() if end is None else end
+        start = end - OEE_WINDOW if start is None else start
+        lines = self.line_output_device if lines is None else lines
+        return self.oee_engine.query([self.line_output_device[line] for line in lines if line in self.line_output_device], start, end)
+
+    def line_oee_series(self, line, edges):
+        """产线在相邻边界之间的 OEE 序列 (见 OeeEngine.series)"""
+        return self.oee_engine.series(self.line_output_device.get(line), edges)
+
+    def set_schedule(self, schedule):
+        self.schedule = schedule; self.schedule_version += 1
+        self.eta.set_schedule(schedule)
+
+    def frame_to_dict(self, frame):
+        """把一帧还原为旧的 data_updated 字典格式"""
+        return {
+            'total_plan': float(frame['total_plan']), 'pending_orders': int(frame['pending_orders']),
+            'schedule': self.schedule,
+            'theoretical_output': float(frame['theoretical_output']), 'actual_output': float(frame['actual_output']),
+            'oee': float(frame['oee']),
+            'devices_status': {name: DEVICE_STATES[code] for name, code in zip(self.device_names, frame['device_state'].tolist())},
+            'timestamp': float(frame['timestamp'])
+        }
+
+    def _seed_history(self):
+        """逐条产线生成 OEE 模拟历史 (耗时随产线数增长)，期间收到停止请求就提前结束"""
+        for line, device in self.line_output_device.items():
+            if not self.is_running: return
+            seed_oee_history(self.oee_engine, {line: device}, self.start_time)
+        self.oee = self.line_oee(end=self.start_time)['oee'] * 100
 
     def run(self):
+        # 历史区间都早于 start_time，先于实时数据写入引擎，保证各设备的时间顺序
+        self._seed_history()
+        if self.is_running: self.history_ready.emit()
         while self.is_running:
             elapsed_seconds = time.time() - self.start_time
             
             # 理论应完成产量 (假设8小时完成总计划)
             theoretical_output = min(self.total_plan_output, (self.total_plan_output / (8 * 3600)) * elapsed_seconds)
             
-            # 模拟实际产量 (随机波动，可能落后或超前)
-            if self.current_output < self.total_plan_output:
-                self.current_output += random.uniform(1.5, 2.5) * 5 # 增加波动性
-            
-            # 模拟OEE波动
-            self.oee += random.uniform(-0.5, 0.5); self.oee = max(60, min(95, self.oee))
-
-            data_packet = {
-                'total_plan': self.total_plan_output,
-                'pending_orders': self.pending_orders,
-                'schedule': self.schedule,
-                'theoretical_output': theoretical_output,
-                'actual_output': self.current_output,
-                'oee': self.oee,
-                'devices_status': self.devices_status,
-                'timestamp': elapsed_seconds
-            }
-            self.data_updated.emit(data_packet)
+            self._advance(elapsed_seconds)
+
+            frame = self.frames.claim()
+            frame['timestamp'] = elapsed_seconds
+            frame['total_plan'] = self.total_plan_output; frame['pending_orders'] = self.pending_orders
+            frame['theoretical_output'] = theoretical_output; frame['actual_output'] = self.current_output
+            frame['oee'] = self.oee; frame['schedule_version'] = self.schedule_version
+            frame['device_state'] = [_STATE_CODES.get(self.devices_status.get(name), _STATE_CODES['offline']) for name in self.device_names]
+            frame['line_units'] = units = [self.cycle_analytics.stats(line)['units'] for line in self.line_names]
+            for line, count in zip(self.line_names, units): self.eta.update(line, count, self.start_time + elapsed_seconds)
+            self.bottlenecks.update(self.start_time + elapsed_seconds, self.devices_status, self.station_output)
+            seq = self.frames.publish()
+            self.frame_ready.emit(seq)
+            if self.receivers(self.data_updated) > 0: self.data_updated.emit(self.frame_to_dict(frame))
             
             time.sleep(1) # 每秒更新
 
+    def _advance(self, elapsed_seconds):
+        """更新执行侧数据 (产量/OEE/设备状态)；采集数据源 (services/ingest_server.py) 覆盖此方法"""
+        # 模拟实际产量 (随机波动，可能落后或超前)
+        if self.current_output < self.total_plan_output:
+            self.current_output += random.uniform(1.5, 2.5) * 5 # 增加波动性
+        
+        # 模拟各产线的完工事件，偶尔短停机
+        now = self.start_time + elapsed_seconds
+        for line in self.line_names:
+            mean, std = SIM_LINE_CYCLES.get(line, SIM_DEFAULT_CYCLE)
+            if random.random() < SIM_STOP_PROBABILITY: self._next_unit[line] = max(self._next_unit[line], now) + random.uniform(60, 180)
+            while self._next_unit[line] <= now:
+                self.cycle_analytics.unit_completed(line, self._next_unit[line])
+                self._next_unit[line] += max(1.0, random.gauss(mean, std))
+
+        previous, self._last_advance = self._last_advance, now
+        if previous is not None: self._advance_stations(now, now - previous)
+        self.oee = self.line_oee(end=now)['oee'] * 100
+
+    def _advance_stations(self, now, dt):
+        """串行缓冲模型: 从下游往上游推进，每个工位受自身产能、上游缓存和下游空位限制"""
+        for index, (line, stations) in enumerate(LINE_STATIONS.items()):
+            buffers = self._buffers[line]; last = len(stations) - 1
+            slow = SIM_SLOW_STATION.get(line, index % len(stations))
+            base_rate = 1.0 / SIM_LINE_CYCLES.get(line, SIM_DEFAULT_CYCLE)[0]
+            for i in range(last, -1, -1):
+                name = stations[i]
+                if self._fault_until.get(name, 0) <= now and random.random() < SIM_FAULT_PROBABILITY * dt:
+                    self._fault_until[name] = now + random.uniform(30, 120)
+                if self._fault_until.get(name, 0) > now: self.devices_status[name] = 'fault'; continue
+                capacity = base_rate * (1.0 if i == slow else SIM_STATION_MARGIN) * dt * random.uniform(0.9, 1.1)
+                available = buffers[i - 1] if i > 0 else float('inf')
+                space = SIM_BUFFER_CAPACITY - buffers[i] if i < last else float('inf')
+                amount = min(capacity, available, space)
+                if i > 0: buffers[i - 1] -= amount
+                if i < last: buffers[i] += amount
+                self.station_output[name] += amount
+                if amount >= capacity * 0.95: self.devices_status[name] = 'running'
+                else: self.devices_status[name] = 'starved' if available < space else 'blocked'
+                self.oee_engine.record_output(name, now, amount, amount * (1 - random.uniform(*SIM_DEFECT_RATE)))
+            for name in stations: self.oee_engine.set_state(name, now, self.devices_status[name])
+
     def stop(self):
-        self.is_running = False; self.quit(); self.wait()
\ No newline at end of file
+        self.is_running = False; self.quit(); self.wait()
+
+class DeviceSimulatorThread(QThread):
+    """模拟单台挤出设备的高频传感器数据流 (温度/压力/速度)，传递方式同 SchedulingSimulatorThread"""
+    frame_ready = pyqtSignal(int)
+    data_updated = pyqtSignal(dict)
+    persists_samples = False    # 采样是否已由数据源写入时序存储；模拟数据由页面负责写入
+
+    def __init__(self, parent=None, device_id='EXTRUDER-A', interval=0.1):
+        super().__init__(parent)
+        self.is_running = True
+        self.device_id = device_id
+        self.interval = interval # 10 Hz
+
+        self.temperature = 90.0
+        self.pressure = 2.0
+        self.speed = 55.0
+        self.frames = FrameRing(DEVICE_FRAME_DTYPE, slots=32)
+
+    def frame_to_dict(self, frame):
+        epoch = float(frame['epoch'])
+        return {
+            'device_id': self.device_id, 'temperature': float(frame['temperature']),
+            'pressure': float(frame['pressure']), 'speed': float(frame['speed']),
+            'timestamp': datetime.fromtimestamp(epoch).strftime('%H:%M:%S'), 'epoch': epoch
+        }
+
+    def _publish(self, epoch, temperature, pressure, speed):
+        frame = self.frames.claim()
+        frame['epoch'] = epoch; frame['temperature'] = temperature; frame['pressure'] = pressure; frame['speed'] = speed
+        seq = self.frames.publish()
+        self.frame_ready.emit(seq)
+        if self.receivers(self.data_updated) > 0: self.data_updated.emit(self.frame_to_dict(frame))
+
+    def run(self):
+        while self.is_running:
+            # 在设定值附近做有界随机游走，偶尔出现尖峰
+            self.temperature += random.uniform(-0.3, 0.3) + (90.0 - self.temperature) * 0.02
+            self.pressure += random.uniform(-0.05, 0.05) + (2.0 - self.pressure) * 0.05
+            self.speed += random.uniform(-1.0, 1.0) + (55.0 - self.speed) * 0.05
+            pressure = self.pressure + (random.uniform(0.4, 0.8) if random.random() < 0.002 else 0)
+
+            self._publish(time.time(), self.temperature, pressure, max(0.0, self.speed))
+
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.is_running = False; self.quit(); self.wait()
+
+# --- 数据源切换: MES_TELEMETRY_SOURCE=ingest 时改为读取本地采集服务 (现场网关/压测脚本推送的数据) ---
+# 页面通过下面两个工厂创建数据线程；采集服务模块在用到时才导入 (它本身依赖本模块，不能在模块顶层导入)
+def _use_ingest():
+    return os.environ.get('MES_TELEMETRY_SOURCE', 'simulator') == 'ingest'
+
+def create_plant_feed(parent=None):
+    """排程/执行数据线程: 模拟数据或采集数据 (IngestSourceThread)"""
+    if _use_ingest():
+        from services.ingest_server import IngestSourceThread
+        return IngestSourceThread(parent)
+    return SchedulingSimulatorThread(parent)
+
+def create_device_thread(parent=None, device_id='EXTRUDER-A'):
+    """单台设备的高频数据线程: 模拟数据或采集数据 (IngestDeviceThread)"""
+    if _use_ingest():
+        from services.ingest_server import IngestDeviceThread
+        return IngestDeviceThread(parent, device_id)
+    return DeviceSimulatorThread(parent, device_id)
+
+_plant_feed = None
+
+def get_plant_feed():
+    """各页面共享的排程/执行数据流 (同一份模拟或采集数据)，首次调用时启动，程序退出时停止"""
+    global _plant_feed
+    if _plant_feed is None:
+        _plant_feed = create_plant_feed(); _plant_feed.start()
+        app = QApplication.instance()
+        if app is not None: app.aboutToQuit.connect(shutdown_plant_feed)
+    return _plant_feed
+
+def shutdown_plant_feed():
+    global _plant_feed
+    if _plant_feed is not None:
+        _plant_feed.stop(); _plant_feed = None
@@ -1,4 +1,5 @@
 # main.py
+import gc
 import sys
 from PyQt5.QtWidgets import QApplication, QDialog
 
@@ -48,6 +49,8 @@ def main():
         
         # 创建并显示主窗口
         main_win = MainWindow(username)
+        # 启动阶段创建的模块/控件对象移入永久代，之后的分代垃圾回收不再反复扫描它们
+        gc.freeze()
         
         # 主窗口自适应尺寸和居中代码
         screen_geometry = app.primaryScreen().geometry()
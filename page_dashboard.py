@@ -4,7 +4,8 @@ from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QBrush
 import pyqtgraph as pg
 
-from device_simulator import SchedulingSimulatorThread
+from device_simulator import create_plant_feed
+from pages.widgets.paint_cache import static_layer, draw_layer, item_scale
 
 class KPICard(QGroupBox):
     """一个显示核心指标的卡片"""
@@ -20,18 +21,21 @@ class DonutChart(pg.GraphicsObject):
     def __init__(self, percentage=0):
         super().__init__()
         self.percentage = percentage
+        self._font = QFont(); self._font.setPointSize(18); self._font.setBold(True)
     
     def set_percentage(self, p):
         self.percentage = p
         self.update()
 
-    def paint(self, p, *args):
-        p.setRenderHint(QPainter.Antialiasing)
-        rect = self.boundingRect()
-        
-        # Draw background circle
+    def _paint_ring(self, p, rect):
+        """静态部分: 底环"""
         p.setPen(QPen(QColor(60, 60, 60), 20))
         p.drawEllipse(rect.center(), rect.width()/2 - 10, rect.width()/2 - 10)
+
+    def paint(self, p, *args):
+        rect = self.boundingRect()
+        draw_layer(p, rect, static_layer("DonutChart", rect, item_scale(p), lambda painter: self._paint_ring(painter, rect)))
+        p.setRenderHint(QPainter.Antialiasing)
         
         # Draw foreground arc
         if self.percentage > 0:
@@ -39,8 +43,7 @@ class DonutChart(pg.GraphicsObject):
             p.drawArc(rect, 90 * 16, -int(self.percentage * 360 * 16))
             
         # Draw text
-        font = QFont(); font.setPointSize(18); font.setBold(True)
-        p.setFont(font); p.setPen(QColor("white"))
+        p.setFont(self._font); p.setPen(QColor("white"))
         p.drawText(rect, Qt.AlignCenter, f"{self.percentage*100:.1f}%")
 
     def boundingRect(self):
@@ -63,7 +66,7 @@ class PageDashboard(QWidget):
         
         main_layout.setColumnStretch(0, 1); main_layout.setColumnStretch(1, 2); main_layout.setColumnStretch(2, 1)
 
-        self.simulator = SchedulingSimulatorThread(self)
+        self.simulator = create_plant_feed(self)
         self.simulator.data_updated.connect(self.update_ui)
         self.simulator.start()
 
@@ -5,7 +5,12 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QBrush
 import pyqtgraph as pg
 
-from device_simulator import SchedulingSimulatorThread
+from device_simulator import get_plant_feed
+from services.series_buffer import SeriesBuffer
+from services.window_aggregates import ShiftCalendar, TumblingWindow, SlidingWindow
+from .widgets.decimated_curve import DecimatedCurve
+
+DIAGNOSIS_LINES = 4     # 建议栏最多列出的产线数 (按瓶颈工位活跃率从高到低)
 
 class PageDashboard(QWidget):
     def __init__(self):
@@ -19,11 +24,20 @@ class PageDashboard(QWidget):
         
         main_layout.addWidget(left_panel, 1); main_layout.addWidget(right_panel, 2)
 
-        self.time_data, self.theoretical_data, self.actual_data = [], [], []
+        # 保留一个班次 (8小时 @ 1Hz) 的偏差历史，绘图时按像素抽稀；换班时清空
+        self.theoretical_data = SeriesBuffer(8 * 3600); self.actual_data = SeriesBuffer(8 * 3600)
+
+        # KPI 窗口聚合: 每帧只喂入增量，本班/近1小时的数值直接读取
+        self.shifts = ShiftCalendar()
+        self.shift_plan = TumblingWindow(self.shifts); self.shift_output = TumblingWindow(self.shifts)
+        self.hour_output = SlidingWindow(3600)
+        self.hour_deviation = SlidingWindow(3600, calendar=self.shifts)
+        self._last_totals = None
 
-        self.simulator = SchedulingSimulatorThread(self)
-        self.simulator.data_updated.connect(self.update_ui)
-        self.simulator.start()
+        # 共享数据流按帧序号通知，甘特图只在排程版本变化时重绘
+        self.schedule_version = None
+        self.simulator = get_plant_feed()
+        self.simulator.frame_ready.connect(self.on_frame)
 
     def _create_planning_panel(self):
         panel = QGroupBox("计划与排程 (Planning)")
@@ -48,8 +62,8 @@ class PageDashboard(QWidget):
         panel = QGroupBox("执行与监控 (Execution)")
         layout = QVBoxLayout(panel)
         kpi_layout = QHBoxLayout()
-        self.actual_kpi = self._create_kpi_card("当前已完成", "0 米")
-        self.oee_kpi = self._create_kpi_card("实时OEE", "0.0 %")
+        self.actual_kpi = self._create_kpi_card("本班产量", "0 米", "近1小时 -- 米/小时")
+        self.oee_kpi = self._create_kpi_card("OEE (近1小时)", "0.0 %")
         kpi_layout.addWidget(self.actual_kpi); kpi_layout.addWidget(self.oee_kpi)
         deviation_box = QGroupBox("计划-实际偏差分析")
         deviation_layout = QVBoxLayout(deviation_box)
@@ -59,6 +73,9 @@ class PageDashboard(QWidget):
         self.deviation_plot.addLegend()
         self.plan_curve = self.deviation_plot.plot(pen='k', name='理论进度'); self.actual_curve = self.deviation_plot.plot(pen='c', name='实际进度')
         self.fill_item = pg.FillBetweenItem(self.actual_curve, self.plan_curve, brush=(100, 100, 255, 80)); self.deviation_plot.addItem(self.fill_item)
+        plot_item = self.deviation_plot.getPlotItem()
+        self.plan_series = DecimatedCurve(plot_item, self.plan_curve, method='lttb', parent=self)
+        self.actual_series = DecimatedCurve(plot_item, self.actual_curve, method='lttb', parent=self)
         deviation_layout.addWidget(self.deviation_plot)
         diagnosis_box = QGroupBox("智能调度建议")
         diagnosis_layout = QVBoxLayout(diagnosis_box)
@@ -67,22 +84,35 @@ class PageDashboard(QWidget):
         layout.addLayout(kpi_layout); layout.addWidget(deviation_box); layout.addWidget(diagnosis_box)
         return panel
 
-    def _create_kpi_card(self, title, value):
+    def _create_kpi_card(self, title, value, caption=None):
         card = QFrame(); card.setFrameShape(QFrame.StyledPanel)
         card.setStyleSheet("QFrame { background-color: #FAFAFA; border: 1px solid #E0E0E0; border-radius: 5px; }")
         layout = QVBoxLayout(card); layout.setContentsMargins(20, 15, 20, 15)
         title_label = QLabel(title); title_label.setStyleSheet("color: #616161; font-size: 10pt;")
         value_label = QLabel(value); value_label.setStyleSheet("font-size: 22pt; font-weight: bold; color: #212121;")
         layout.addWidget(title_label); layout.addWidget(value_label); card.value_label = value_label
+        card.caption_label = None
+        if caption is not None:
+            card.caption_label = QLabel(caption); card.caption_label.setStyleSheet("color: #757575; font-size: 9pt;")
+            layout.addWidget(card.caption_label)
         return card
 
-    def update_ui(self, data):
+    def on_frame(self, seq):
+        frames = self.simulator.frames
+        if not frames.is_latest(seq): return  # 界面处理不过来时跳过旧帧，只处理最新的一帧
+        data = frames.get(seq)
+        if data is None: return
         self.plan_kpi.value_label.setText(f"{int(data['total_plan']):,} 米")
         self.orders_kpi.value_label.setText(f"{data['pending_orders']} 个")
-        self._update_gantt(data['schedule'])
-        self.actual_kpi.value_label.setText(f"{int(data['actual_output']):,} 米")
-        self.oee_kpi.value_label.setText(f"{data['oee']:.1f} %")
-        self._update_deviation_chart(data.get('timestamp', 0), data['theoretical_output'], data['actual_output'])
+        if data['schedule_version'] != self.schedule_version:
+            self.schedule_version = int(data['schedule_version']); self._update_gantt(self.simulator.schedule)
+        now = self.simulator.start_time + float(data['timestamp'])
+        self._update_windows(now, float(data['theoretical_output']), float(data['actual_output']))
+        self.actual_kpi.value_label.setText(f"{int(self.shift_output.sum):,} 米")
+        rate = self.hour_output.rate(now)
+        self.actual_kpi.caption_label.setText(f"{self.shifts.name(now)} | 近1小时 {rate:,.0f} 米/小时" if rate is not None else self.shifts.name(now))
+        self.oee_kpi.value_label.setText(f"{data['oee']:.1f} %")   # 由 OEE 引擎按最近一小时的状态区间计算
+        self._update_deviation_chart(now)
         self._diagnose_schedule(data)
         
     def _update_gantt(self, schedule):
@@ -108,20 +138,48 @@ class PageDashboard(QWidget):
                 bar.setToolTip(f"订单: {task['order']}")
                 self.gantt_plot.addItem(bar)
 
-    def _update_deviation_chart(self, timestamp, theoretical, actual):
-        self.time_data.append(timestamp); self.theoretical_data.append(theoretical); self.actual_data.append(actual)
-        if len(self.time_data) > 300:
-            self.time_data.pop(0); self.theoretical_data.pop(0); self.actual_data.pop(0)
-        self.plan_curve.setData(self.time_data, self.theoretical_data)
-        self.actual_curve.setData(self.time_data, self.actual_data)
+    def _update_windows(self, now, theoretical, actual):
+        """把累计值换算为本帧增量喂给各窗口；换班时清空偏差曲线"""
+        if self._last_totals is not None:
+            plan_delta = max(0.0, theoretical - self._last_totals[0]); output_delta = max(0.0, actual - self._last_totals[1])
+            if self.shift_output.roll(now): self.theoretical_data.clear(); self.actual_data.clear()
+            self.shift_plan.add(now, plan_delta); self.shift_output.add(now, output_delta); self.hour_output.add(now, output_delta)
+            self.hour_deviation.add(now, self.shift_plan.sum - self.shift_output.sum)
+        self._last_totals = (theoretical, actual)
+
+    def _update_deviation_chart(self, now):
+        """本班累计计划/实际 (横轴为本班已过小时数)"""
+        theoretical, actual = self.shift_plan.sum, self.shift_output.sum
+        hours = (now - self.shifts.start(now)) / 3600
+        self.theoretical_data.append(hours, theoretical); self.actual_data.append(hours, actual)
+        self.plan_series.set_data(self.theoretical_data.x(), self.theoretical_data.y())
+        self.actual_series.set_data(self.actual_data.x(), self.actual_data.y())
         self.fill_item.setBrush((255, 100, 100, 80) if actual < theoretical else (100, 255, 100, 80))
+        if self.hour_deviation.count():
+            self.deviation_plot.setTitle(f"{self.shifts.name(now)} 近1小时偏差: 均值 {self.hour_deviation.mean():,.0f} 米，"
+                                         f"最大 {self.hour_deviation.max():,.0f} 米，最小 {self.hour_deviation.min():,.0f} 米", color='k')
 
     def _diagnose_schedule(self, data):
         deviation = data['theoretical_output'] - data['actual_output']
-        if deviation > 5000: suggestion = (f"<font color='#D32F2F'><b>严重落后...</b></font>")
-        elif deviation > 1000: suggestion = (f"<font color='#F57C00'><b>进度落后...</b></font>")
-        else: suggestion = "生产进度正常，在计划范围内。"
-        self.suggestion_label.setText(suggestion)
+        if deviation > 5000: header = "<font color='#D32F2F'><b>严重落后</b></font>"
+        elif deviation > 1000: header = "<font color='#F57C00'><b>进度落后</b></font>"
+        else: header = "生产进度正常，在计划范围内。"
+        # 各产线的瓶颈工位 (滚动窗口内的活跃周期法)，约束最紧的产线排在前面
+        analyzer = self.simulator.bottlenecks
+        found = [(line, analyzer.ranking(line)) for line in analyzer.lines()]
+        found = sorted(((line, ranking) for line, ranking in found if ranking and ranking[0]['active'] > 0),
+                       key=lambda item: item[1][0]['active'], reverse=True)
+        rows = []
+        for line, (b, *others) in found[:DIAGNOSIS_LINES]:
+            row = (f"{line} 瓶颈: <b>{b['device']}</b> (活跃 {b['active']:.0%}，瓶颈占比 {b['share']:.0%}"
+                   f"{'，当前故障' if b['state'] == 'fault' else ''})")
+            blocked = max(others, key=lambda r: r['blocked'], default=None)
+            starved = max(others, key=lambda r: r['starved'], default=None)
+            if blocked and blocked['blocked'] > 0.2: row += f"，{blocked['device']} 阻塞 {blocked['blocked']:.0%}"
+            if starved and starved['starved'] > 0.2: row += f"，{starved['device']} 饥饿 {starved['starved']:.0%}"
+            rows.append(row)
+        if rows and deviation > 1000: rows[0] += "，建议优先保障该工位 (减少停机/换型，必要时分流)"
+        self.suggestion_label.setText("<br>".join([header] + rows))
 
     def closeEvent(self, event):
-        self.simulator.stop(); super().closeEvent(event)
\ No newline at end of file
+        self.simulator.frame_ready.disconnect(self.on_frame); super().closeEvent(event)
\ No newline at end of file
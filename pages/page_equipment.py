@@ -1,13 +1,18 @@
 # pages/page_equipment.py
-from collections import deque
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
-                             QListWidget, QListWidgetItem, QSplitter)
+import time
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QSplitter)
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor
 import pyqtgraph as pg
 
 # 导入我们的数据模拟器线程
-from device_simulator import DeviceSimulatorThread
+from device_simulator import create_device_thread, LINE_STATIONS, STATION_DEVICE_IDS
+from services.series_buffer import SeriesBuffer
+from services.telemetry_store import get_telemetry_store
+from services.alarm_rules import AlarmRuleEngine
+from services.alarm_correlation import AlarmCorrelator, NEW_INCIDENT, DUPLICATE, line_topology
+from services.alarm_audio import get_alarm_audio
+from .widgets.decimated_curve import DecimatedCurve
+from .widgets.event_log_view import EventLogView
 
 class StatusPanel(QFrame):
     """显示设备状态的面板"""
@@ -36,12 +41,14 @@ class PageEquipment(QWidget):
     def __init__(self):
         super().__init__()
         
-        # --- 数据存储 ---
-        self.max_data_points = 60
-        self.temp_data = deque(maxlen=self.max_data_points)
-        self.pressure_data = deque(maxlen=self.max_data_points)
-        self.speed_data = deque(maxlen=self.max_data_points)
-        self.time_labels = deque(maxlen=self.max_data_points)
+        # --- 数据存储: 保留一个班次 (8小时 @ 10Hz) 的历史，绘图时再按像素抽稀 ---
+        self.max_data_points = 8 * 3600 * 10
+        self.temp_data = SeriesBuffer(self.max_data_points)
+        self.pressure_data = SeriesBuffer(self.max_data_points)
+        self.speed_data = SeriesBuffer(self.max_data_points)
+        self.start_epoch = None
+        self._next_seq = 0
+        self.dropped_samples = 0    # 时间戳回退 (时钟回拨) 而未写入存储的样本数
         self.last_status = 'normal'
         
         # --- UI 布局 ---
@@ -61,9 +68,9 @@ class PageEquipment(QWidget):
         bottom_layout = QVBoxLayout(bottom_widget)
         bottom_title = QLabel("报警日志")
         bottom_title.setStyleSheet("font-size: 14pt; color: white;")
-        self.alarm_log_list = QListWidget()
+        self.alarm_log = EventLogView()
         bottom_layout.addWidget(bottom_title)
-        bottom_layout.addWidget(self.alarm_log_list)
+        bottom_layout.addWidget(self.alarm_log)
 
         splitter.addWidget(top_widget)
         splitter.addWidget(bottom_widget)
@@ -71,11 +78,29 @@ class PageEquipment(QWidget):
         
         main_layout.addWidget(splitter)
         
+        # --- 报警规则 (alarm_rules.json，修改后自动生效) ---
+        self.rule_engine = AlarmRuleEngine.from_file()
+        # 状态在阈值附近来回跳变时，同一报警在时间窗内只记一次；设备以采集端编号上报，拓扑按编号建立
+        self.correlator = AlarmCorrelator(line_topology(LINE_STATIONS, STATION_DEVICE_IDS))
+
         # --- 启动后台数据线程 ---
-        self.simulator_thread = DeviceSimulatorThread(self)
-        self.simulator_thread.data_updated.connect(self.update_dashboard)
+        self.store = get_telemetry_store()
+        self.simulator_thread = create_device_thread(self)
+        self._load_history(self.simulator_thread.device_id)
+        self.alarm_log.select_source(self.simulator_thread.device_id)
+        self.simulator_thread.frame_ready.connect(self.on_frame)
         self.simulator_thread.start()
 
+    def _load_history(self, device_id):
+        """从本地时序存储回填最近一个班次的历史，重启后曲线不会从零开始"""
+        now = time.time()
+        buffers = {'temperature': self.temp_data, 'pressure': self.pressure_data, 'speed': self.speed_data}
+        for signal, buffer in buffers.items():
+            t, v = self.store.query(device_id, signal, now - self.max_data_points / 10, now)
+            if len(t) == 0: continue
+            if self.start_epoch is None: self.start_epoch = t[0]
+            buffer.extend(t - self.start_epoch, v)
+
     def _create_charts_widget(self):
         widget = QWidget()
         layout = QVBoxLayout(widget)
@@ -101,11 +126,13 @@ class PageEquipment(QWidget):
         plot_widget.setYRange(*range_y)
         plot_widget.showGrid(x=True, y=True, alpha=0.3)
         
+        plot_widget.setLabel('bottom', "时间 (秒)")
+        
         pen = pg.mkPen(color=color, width=2)
         curve = plot_widget.plot(pen=pen) # 这是PlotDataItem
         
-        # --- 3. 修改：返回控件和曲线的元组 ---
-        return (plot_widget, curve)
+        # --- 3. 修改：返回控件和抽稀后的曲线 (DecimatedCurve 负责 setData) ---
+        return (plot_widget, DecimatedCurve(plot_widget.getPlotItem(), curve, parent=self))
 
     def _create_status_widget(self):
         widget = QWidget(); layout = QVBoxLayout(widget); layout.setSpacing(15)
@@ -114,13 +141,34 @@ class PageEquipment(QWidget):
         layout.addWidget(self.main_status_panel); layout.addWidget(self.temp_value_label); layout.addWidget(self.pressure_value_label); layout.addWidget(self.speed_value_label); layout.addStretch()
         return widget
 
-    def update_dashboard(self, data):
-        self.temp_data.append(data['temperature']); self.pressure_data.append(data['pressure']); self.speed_data.append(data['speed']); self.time_labels.append(data['timestamp'])
-        
-        # --- 4. 修改：使用正确的曲线对象来更新数据 ---
-        self.temp_curve.setData(list(self.temp_data))
-        self.pressure_curve.setData(list(self.pressure_data))
-        self.speed_curve.setData(list(self.speed_data))
+    def on_frame(self, seq):
+        """10Hz 帧通知；界面卡顿时把期间积压的帧一次补进曲线，只刷新一次界面"""
+        frames = self.simulator_thread.frames
+        if not frames.is_latest(seq): return
+        first = max(self._next_seq, seq - frames.slots + 1)
+        for s in range(first, seq + 1):
+            frame = frames.get(s)
+            if frame is not None: self._append_sample(frame)
+        self._next_seq = seq + 1
+        self.update_dashboard(frames.get(seq))
+
+    def _append_sample(self, frame):
+        epoch = float(frame['epoch'])
+        if self.start_epoch is None: self.start_epoch = epoch
+        values = {'temperature': float(frame['temperature']), 'pressure': float(frame['pressure']), 'speed': float(frame['speed'])}
+        if not self.simulator_thread.persists_samples:
+            self.dropped_samples += self.store.append_frame(self.simulator_thread.device_id, epoch, values)
+        t = epoch - self.start_epoch
+        self.temp_data.append(t, values['temperature']); self.pressure_data.append(t, values['pressure']); self.speed_data.append(t, values['speed'])
+
+    def update_dashboard(self, frame):
+        if frame is None: return
+        data = self.simulator_thread.frame_to_dict(frame)
+        
+        # --- 4. 修改：完整历史交给抽稀层，由它按视图宽度决定送入 pyqtgraph 的点 ---
+        self.temp_curve.set_data(self.temp_data.x(), self.temp_data.y())
+        self.pressure_curve.set_data(self.pressure_data.x(), self.pressure_data.y())
+        self.speed_curve.set_data(self.speed_data.x(), self.speed_data.y())
 
         self.temp_value_label.setText(f"温度: {data['temperature']:.1f} °C"); self.pressure_value_label.setText(f"压力: {data['pressure']:.2f} MPa"); self.speed_value_label.setText(f"速度: {data['speed']:.1f} m/min")
 
@@ -129,25 +177,27 @@ class PageEquipment(QWidget):
         self.main_status_panel.set_value(message); self.main_status_panel.set_status(status)
 
         if status != 'normal' and status != self.last_status:
-            log_item = QListWidgetItem(f"[{data['timestamp']}] {message}")
-            if status == 'warning': log_item.setForeground(QColor('#FBC02D'))
-            elif status == 'fault': log_item.setForeground(QColor('#D32F2F'))
-            self.alarm_log_list.insertItem(0, log_item)
-            if self.alarm_log_list.count() > 100: self.alarm_log_list.takeItem(100)
+            # 报警码取消息文本 (每条规则一种)；同设备的其它报警作为子报警记日志，只有新事件/升级才响铃
+            incident, kind = self.correlator.process(data['epoch'], data['device_id'], message, status, message)
+            if kind != DUPLICATE or incident.escalated:
+                self.alarm_log.log(message if kind == NEW_INCIDENT else f"{message} (关联事件 #{incident.id})", status, data['device_id'], data['epoch'])
+            if kind == NEW_INCIDENT or incident.escalated: get_alarm_audio().play(status)
+        for incident in self.correlator.expire(data['epoch']):
+            self.alarm_log.log(f"已恢复: {incident.summary()}", 'info', incident.root_source, data['epoch'])
                 
         self.last_status = status
 
     def _evaluate_status(self, data):
-        temp = data['temperature']; pressure = data['pressure']; speed = data['speed']
-        if pressure > 2.5 and speed > 10: return 'fault', "压力过载！"
-        if speed < 1 and pressure > 0.5: return 'fault', "堵料故障！"
-        if temp > 98: return 'fault', "温度严重超标！"
-        if temp > 95: return 'warning', "温度偏高"
-        if pressure > 2.2: return 'warning', "压力偏高"
-        if speed < 40 and speed > 1: return 'warning', "速度过慢"
-        return 'normal', "运行正常"
+        try:
+            self.rule_engine.reload_if_changed()
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"报警规则文件有误，继续使用旧规则: {e}")
+        frame = self.rule_engine.frame_from_dicts([data])
+        rule_index = self.rule_engine.classify(frame, data['epoch'])[0]
+        return self.rule_engine.describe(int(rule_index))
 
     def closeEvent(self, event):
         print("关闭设备监控页面，正在停止模拟器线程...")
         self.simulator_thread.stop()
+        self.store.flush()
         super().closeEvent(event)
\ No newline at end of file
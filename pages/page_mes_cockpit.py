@@ -1,15 +1,19 @@
 # pages/page_mes_cockpit.py
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
                              QPushButton, QProgressBar, QMessageBox, QInputDialog, 
-                             QListWidget, QListWidgetItem, QGroupBox, QGraphicsScene, QGraphicsView)
-from PyQt5.QtCore import Qt, QTimer, QTime, QThread
+                             QGroupBox, QGraphicsScene, QGraphicsView)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QColor, QBrush
-import time, random, os
-from playsound import playsound
+import os, time, random, math
+import numpy as np
 
-from device_simulator import SchedulingSimulatorThread
+from device_simulator import get_plant_feed, OEE_WINDOW, DEVICE_STATES, LINE_STATIONS
 # --- 核心修正点 3: 确保导入的类名与 mes_widgets.py 中定义的 PacingGauge 一致 ---
 from .widgets.mes_widgets import PacingGauge 
+from .widgets.event_log_view import EventLogView
+from .widgets.line_tile_grid import LineTileGrid
+from services.alarm_correlation import AlarmCorrelator, NEW_INCIDENT, DUPLICATE, line_topology
+from services.alarm_audio import get_alarm_audio
 
 # LineMonitor 类现在依赖 OEEGauge，但我们把它放在主类内部
 class LineMonitor(QFrame):
@@ -19,13 +23,15 @@ class LineMonitor(QFrame):
         self.setFrameShape(QFrame.StyledPanel)
         self.line_name = line_name
         self.parent_page = parent_page
+        self.status = None
         
         layout = QHBoxLayout(self)
         self.andon_light = QLabel(); self.andon_light.setFixedSize(40, 40)
         wo_layout = QVBoxLayout()
         self.wo_id_label = QLabel("<b>工单:</b> N/A")
         self.progress_bar = QProgressBar()
-        wo_layout.addWidget(self.wo_id_label); wo_layout.addWidget(self.progress_bar)
+        self.oee_label = QLabel("OEE: --")
+        wo_layout.addWidget(self.wo_id_label); wo_layout.addWidget(self.progress_bar); wo_layout.addWidget(self.oee_label)
         
         # --- 核心修正点 4: 此处也应该使用 PacingGauge ---
         self.oee_gauge = PacingGauge() # 使用 PacingGauge, 而不是 OEEGauge
@@ -39,75 +45,130 @@ class LineMonitor(QFrame):
         
     def update_data(self, line_data):
         status = line_data['status']
-        colors = {'running': 'green', 'idle': 'orange', 'fault': 'red', 'call': 'yellow'}
-        self.andon_light.setStyleSheet(f"background-color: {colors.get(status, 'gray')}; border-radius: 20px;")
+        if status != self.status:
+            # 样式表只在状态变化时重设，避免每次刷新都重新解析
+            colors = {'running': 'green', 'idle': 'orange', 'fault': 'red', 'call': 'yellow'}
+            self.andon_light.setStyleSheet(f"background-color: {colors.get(status, 'gray')}; border-radius: 20px;"); self.status = status
         self.wo_id_label.setText(f"<b>工单:</b> {line_data['wo_id']}")
         self.progress_bar.setValue(int(line_data['progress']))
+        if 'takt_time' in line_data: self.oee_gauge.takt_time = line_data['takt_time']
         self.oee_gauge.set_value(line_data['cycle_time']) # 传递 cycle_time
+        stats = line_data.get('stats')
+        if stats and stats['count']:
+            self.oee_gauge.setToolTip(f"节拍 {stats['takt_time']:.1f}s | 均值 {stats['mean']:.1f}s | EWMA {stats['ewma']:.1f}s\n"
+                                      f"P50 {stats['p50']:.1f}s | P95 {stats['p95']:.1f}s | 节拍达成率 {stats['takt_compliance']:.0%}")
         
-        if line_data['eta']: self.eta_label.setText(f"ETA: {line_data['eta'].toString('HH:mm:ss')}")
+        oee = line_data.get('oee')
+        if oee and oee['planned_time'] > 0:
+            self.oee_label.setText(f"OEE: <b>{oee['oee']:.1%}</b>")
+            self.oee_label.setToolTip(f"时间开动率 {oee['availability']:.1%} | 性能开动率 {oee['performance']:.1%} | 合格品率 {oee['quality']:.1%}")
+
+        estimate = line_data['eta']
+        if estimate and not math.isinf(estimate['eta']):
+            fmt = lambda ts: time.strftime('%H:%M', time.localtime(ts))
+            self.eta_label.setText(f"ETA: {time.strftime('%H:%M:%S', time.localtime(estimate['eta']))}<br>"
+                                   f"<small>{fmt(estimate['eta_low'])} ~ {fmt(estimate['eta_high'])}</small>")
+            self.eta_label.setToolTip(f"剩余 {estimate['remaining']} 件 | 速率 {estimate['rate']:.0f} 件/小时"
+                                      f"{'' if estimate['measured'] else ' (按目标节拍估计)'}")
         else: self.eta_label.setText("ETA: --:--:--")
             
     def handle_call(self):
-        reasons = ["缺料", "质量异常", "设备小故障", "需要技术支持"]
-        reason, ok = QInputDialog.getItem(self, "呼叫", "请选择呼叫原因:", reasons, 0, False)
-        if ok and reason:
-            self.parent_page.log_event(f"[{QTime.currentTime().toString('HH:mm:ss')}] {self.line_name} 呼叫: {reason}")
-            self.update_data({'status': 'call', 'wo_id': self.wo_id_label.text().split(':')[-1].strip(), 
-                              'progress': self.progress_bar.value(), 'cycle_time': self.oee_gauge.takt_time, 'eta': None})
+        self.parent_page.call_line(self.line_name, self)
+
 
+# 产线数超过该值时默认使用瓦片模式 (也可用 MES_COCKPIT_MODE=tiles/panels 指定)
+TILE_MODE_LINES = 6
+CALL_SECONDS = 60   # 呼叫状态保持时间
 
 class PageMesCockpit(QWidget):
     def __init__(self):
         super().__init__()
-        self.last_unit_times = {"Line A": 0, "Line B": 0}
+        self.simulator = get_plant_feed()
+        line_names = list(self.simulator.line_names)
+        self.mode = os.environ.get('MES_COCKPIT_MODE') or ('tiles' if len(line_names) > TILE_MODE_LINES else 'panels')
+        self.active_calls = {}
 
         main_layout = QVBoxLayout(self); main_layout.setContentsMargins(20, 20, 20, 20)
-        self.lines = {"Line A": LineMonitor("Line A", self), "Line B": LineMonitor("Line B", self)}
-        for line_monitor in self.lines.values(): main_layout.addWidget(line_monitor)
+        self.lines = {}; self.tile_grid = None
+        if self.mode == 'tiles':
+            # 大屏: 全部产线画在一个网格控件里，双击瓦片发起呼叫
+            self.tile_grid = LineTileGrid(line_names); self.tile_grid.line_activated.connect(lambda line: self.call_line(line, self))
+            main_layout.addWidget(self.tile_grid, 3)
+        else:
+            self.lines = {line: LineMonitor(line, self) for line in line_names}
+            for line_monitor in self.lines.values(): main_layout.addWidget(line_monitor)
         
         log_box = QGroupBox("事件日志"); log_layout = QVBoxLayout(log_box)
-        self.log_list = QListWidget(); log_layout.addWidget(self.log_list); main_layout.addWidget(log_box)
+        self.event_log = EventLogView(sources=line_names); log_layout.addWidget(self.event_log); main_layout.addWidget(log_box, 1)
+        # 报警关联: 持续/重复/上下游连锁的故障只记一条事件，恢复时再记汇总
+        self.correlator = AlarmCorrelator(line_topology(LINE_STATIONS), window=30.0)
+        self._station_lines = {station: line for line, stations in LINE_STATIONS.items() for station in stations}
         
-        self.simulator = SchedulingSimulatorThread(self); self.simulator.data_updated.connect(self.update_ui); self.simulator.start()
+        self.simulator.frame_ready.connect(self.on_frame)
+
+    def on_frame(self, seq):
+        frames = self.simulator.frames
+        if not frames.is_latest(seq): return  # 只处理最新帧
+        data = frames.get(seq)
+        if data is not None: self.update_ui(data)
 
     def update_ui(self, data):
+        """data 为共享数据流中的一帧 (见 device_simulator.scheduling_frame_dtype)"""
         current_time = time.time()
-        # Line A logic
-        if self.last_unit_times["Line A"] == 0: self.last_unit_times["Line A"] = current_time
-        cycle_time_a = self.lines["Line A"].oee_gauge.takt_time # default
-        if random.random() < 0.2: cycle_time_a = current_time - self.last_unit_times["Line A"]; self.last_unit_times["Line A"] = current_time
-        self.lines["Line A"].update_data({
-            'status': 'running' if data['oee'] > 80 else 'idle', 'wo_id': data['schedule'][0]['order'],
-            'progress': (data['actual_output'] / 25000) * 100 if data['actual_output'] < 25000 else 100,
-            'cycle_time': cycle_time_a, 'eta': QTime.currentTime().addSecs(random.randint(3600, 7200))
-        })
-        
-        # Line B logic
-        if self.last_unit_times["Line B"] == 0: self.last_unit_times["Line B"] = current_time
-        is_b_fault = random.random() < 0.1 or (hasattr(self, 'b_is_fault') and self.b_is_fault); self.b_is_fault = is_b_fault
-        cycle_time_b = self.lines["Line B"].oee_gauge.takt_time * 1.5 # Slower
-        if not is_b_fault and random.random() < 0.1: cycle_time_b = current_time - self.last_unit_times["Line B"]; self.last_unit_times["Line B"] = current_time
-        self.lines["Line B"].update_data({
-            'status': 'fault' if is_b_fault else 'idle', 'wo_id': data['schedule'][1]['order'],
-            'progress': 30, 'cycle_time': cycle_time_b, 'eta': None
-        })
+        oee_start = current_time - OEE_WINDOW
+        is_b_fault = "Line B" in self.simulator.line_names and (random.random() < 0.1 or getattr(self, 'b_is_fault', False)); self.b_is_fault = is_b_fault
+
+        # 周期/节拍来自节拍统计 (services/cycle_analytics.py)，工单进度与 ETA 来自 ETA 预测 (services/eta_engine.py)
+        for index, line in enumerate(self.simulator.line_names):
+            stats = self.simulator.cycle_analytics.stats(line)
+            estimate = self.simulator.eta.estimate(line)
+            if estimate is None: continue
+            status = self._line_status(line, stats, current_time)
+            line_data = {
+                'status': status, 'wo_id': estimate['order'], 'progress': estimate['progress'] * 100,
+                'cycle_time': stats['ewma'] or stats['takt_time'], 'takt_time': stats['takt_time'], 'stats': stats,
+                'eta': None if status == 'fault' else estimate,
+                'oee': self.simulator.line_oee([line], oee_start, current_time)
+            }
+            if self.tile_grid is not None: self.tile_grid.set_line(index, line_data)
+            else: self.lines[line].update_data(line_data)
         
-        if is_b_fault and (self.log_list.count() == 0 or "故障" not in self.log_list.item(0).text()):
-            self.log_event(f"[{QTime.currentTime().toString('HH:mm:ss')}] 严重: Line B 发生未知故障！", 'red')
-            QThread.create(self.play_alarm).start()
-            
-    def log_event(self, message, color_name=None):
-        item = QListWidgetItem(message); 
-        if color_name: item.setForeground(QColor(color_name))
-        self.log_list.insertItem(0, item)
-        if self.log_list.count() > 100: self.log_list.takeItem(100)
+        if is_b_fault:
+            self._raise_alarm(current_time, "Line B", 'unknown_fault', "Line B 发生未知故障", "Line B")
+        # 工位故障: 同一产线上下游工位的连锁故障归入同一事件
+        states = data['device_state']
+        for index in np.flatnonzero(states == DEVICE_STATES.index('fault')).tolist():
+            station = self.simulator.device_names[index]; line = self._station_lines.get(station, station)
+            self._raise_alarm(current_time, station, 'station_fault', f"{station} 故障停机", line)
+        for incident in self.correlator.expire(current_time):
+            self.log_event(f"已恢复: {incident.summary()}", None, source=incident.root_source)
+
+    def _raise_alarm(self, now, source, code, message, line):
+        """新事件记日志并响铃；归入已有事件的子报警只记日志；重复报警只计数"""
+        incident, kind = self.correlator.process(now, source, code, 'fault', message)
+        if kind == DUPLICATE and not incident.escalated: return
+        if kind == NEW_INCIDENT: self.log_event(f"严重: {message}！", 'red', source=line)
+        else: self.log_event(f"关联 #{incident.id} ({incident.root_source}): {message}", 'red', source=line)
+        if kind == NEW_INCIDENT or incident.escalated: get_alarm_audio().play('fault')
+
+    def _line_status(self, line, stats, now):
+        if line == "Line B" and self.b_is_fault: return 'fault'
+        if now - self.active_calls.get(line, float('-inf')) < CALL_SECONDS: return 'call'
+        last = stats['last_unit_ts']
+        return 'running' if last is not None and now - last < stats['takt_time'] * 3 else 'idle'
 
-    def play_alarm(self):
-        alarm_file = os.path.join("assets", "alarm.wav")
-        try:
-            if os.path.exists(alarm_file): playsound(alarm_file)
-        except Exception as e: print(f"无法播放声音: {e}")
+    def call_line(self, line, parent):
+        reasons = ["缺料", "质量异常", "设备小故障", "需要技术支持"]
+        reason, ok = QInputDialog.getItem(parent, f"呼叫 - {line}", "请选择呼叫原因:", reasons, 0, False)
+        if ok and reason:
+            self.log_event(f"呼叫: {reason}", 'orange', source=line)
+            get_alarm_audio().play('call')
+            self.active_calls[line] = time.time()
             
+    def log_event(self, message, color_name=None, source=''):
+        """写入持久化事件日志；颜色沿用原有约定: red=故障, orange=警告"""
+        severity = {'red': 'fault', 'orange': 'warning'}.get(color_name, 'info')
+        self.event_log.log(message, severity, source)
+
     def closeEvent(self, event):
-        self.simulator.stop(); super().closeEvent(event)
\ No newline at end of file
+        self.simulator.frame_ready.disconnect(self.on_frame); super().closeEvent(event)
@@ -1,18 +1,20 @@
 # pages/page_order_pool.py
 import datetime
-from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QLabel, QListWidget, 
-                             QListWidgetItem, QPushButton, QGroupBox, QVBoxLayout, QDialog,
+from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QDialog,
                              QMessageBox, QMenu)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor
 
-from widgets.order_card import OrderCard
 from widgets.order_dialog import OrderDialog
+from .widgets.order_kanban import OrderListModel, OrderKanban
+from services.order_repository import OrderRepository
+
+LANES = [("new", "新订单"), ("approved", "已审核"), ("ready", "待排程")]
 
 class PageOrderPool(QWidget):
     def __init__(self):
         super().__init__()
-        self.orders = self._create_mock_data()
+        # 订单仓库按 id/状态/交期/优先级建索引；三个泳道共享同一个列表模型，各自通过代理筛选/排序，状态变化只移动对应的一行
+        self.orders = OrderRepository(self._create_mock_data())
+        self.order_model = OrderListModel(self.orders, self)
         
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -23,57 +25,14 @@ class PageOrderPool(QWidget):
         controls.addWidget(add_button)
         main_layout.addLayout(controls)
 
-        kanban_layout = QHBoxLayout()
-        self.lanes = {
-            "new": self._create_lane("新订单"),
-            "approved": self._create_lane("已审核"),
-            "ready": self._create_lane("待排程")
-        }
-        for name, lane_box in self.lanes.items(): 
-            kanban_layout.addWidget(lane_box)
-            lane_box.findChild(QListWidget).setObjectName(name)
-        main_layout.addLayout(kanban_layout)
-
-        self._refresh_kanban()
-
-    def _create_lane(self, title):
-        box = QGroupBox(title); layout = QVBoxLayout(box)
-        list_widget = QListWidget()
-        list_widget.setDragDropMode(QListWidget.DragDrop)
-        list_widget.setDefaultDropAction(Qt.MoveAction)
-        list_widget.setSpacing(10)
-        list_widget.setStyleSheet("QListWidget::item:selected { border: 2px solid #0288D1; }")
-        list_widget.model().rowsMoved.connect(self._on_item_moved)
-        layout.addWidget(list_widget); return box
-
-    def _refresh_kanban(self):
-        for lane_box in self.lanes.values():
-            lane_box.findChild(QListWidget).clear()
-        
-        for order in self.orders:
-            card = OrderCard(order)
-            # --- 核心交互 1: 连接卡片的右键菜单信号 ---
-            card.request_context_menu.connect(self._show_context_menu)
-            
-            item = QListWidgetItem(); item.setSizeHint(card.sizeHint()); item.setData(Qt.UserRole, order['id'])
-            lane_box = self.lanes.get(order['status'])
-            if lane_box:
-                list_widget = lane_box.findChild(QListWidget)
-                list_widget.addItem(item); list_widget.setItemWidget(item, card)
-
-    def _on_item_moved(self, parent, start, end, dest, row):
-        target_list_widget = self.sender().parent();
-        if not target_list_widget: return
-        item = target_list_widget.item(row);
-        if not item: return
-        order_id = item.data(Qt.UserRole); order = next((o for o in self.orders if o['id'] == order_id), None)
-        if order:
-            new_status = target_list_widget.objectName()
-            if order['status'] != new_status: order['status'] = new_status
+        self.kanban = OrderKanban(self.order_model, LANES, self)
+        # --- 核心交互 1: 卡片的右键菜单 ---
+        self.kanban.context_menu_requested.connect(self._show_context_menu)
+        main_layout.addWidget(self.kanban)
 
-    def _show_context_menu(self, order_id, event):
+    def _show_context_menu(self, order_id, global_pos):
         """核心交互 2: 创建并显示动态的右键菜单"""
-        order = next((o for o in self.orders if o['id'] == order_id), None)
+        order = self.orders.get(order_id)
         if not order: return
 
         menu = QMenu(self)
@@ -96,40 +55,37 @@ class PageOrderPool(QWidget):
         delete_action = menu.addAction("❌ 删除订单"); delete_action.triggered.connect(lambda: self._delete_order(order_id))
 
         # 在鼠标点击的位置显示菜单
-        menu.exec_(event.globalPos())
+        menu.exec_(global_pos)
 
     def _change_order_status(self, order_id, new_status):
         """核心交互 3: 处理状态流转"""
-        order = next((o for o in self.orders if o['id'] == order_id), None)
-        if order:
-            order['status'] = new_status
-            self._refresh_kanban() # 重新渲染整个看板以移动卡片
+        self.orders.set_status([order_id], new_status)   # 卡片由泳道代理移动到新泳道
 
     def _add_order(self):
         dialog = OrderDialog(self)
         if dialog.exec_() == QDialog.Accepted:
             data = dialog.get_data()
-            if not data.get('id'): data['id'] = f"ORD-{len(self.orders) + 5:03d}"
+            if not data.get('id'): data['id'] = self.orders.next_id('ORD-')
+            if data['id'] in self.orders:
+                QMessageBox.warning(self, "新增失败", f"订单 {data['id']} 已存在"); return
             data['status'] = 'new'; data['priority'] = self._calculate_priority_score(data)
-            self.orders.append(data); self._refresh_kanban()
+            self.orders.add(data)
             
     def _edit_order(self, order_id):
-        order = next((o for o in self.orders if o['id'] == order_id), None)
+        order = self.orders.get(order_id)
         if not order: return
         
         dialog = OrderDialog(self, order_data=order)
         if dialog.exec_() == QDialog.Accepted:
             updated_data = dialog.get_data()
-            order.update(updated_data)
-            # 重新计算优先级并刷新
-            order['priority'] = self._calculate_priority_score(order)
-            self._refresh_kanban()
+            # 重新计算优先级，只刷新这一张卡片 (泳道内按新优先级重排)
+            updated_data['priority'] = self._calculate_priority_score({**order, **updated_data})
+            self.orders.update(order_id, updated_data)
 
     def _delete_order(self, order_id):
         reply = QMessageBox.question(self, "确认删除", f"您确定要删除订单 {order_id} 吗？", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.orders = [o for o in self.orders if o['id'] != order_id]
-            self._refresh_kanban()
+            self.orders.remove(order_id)
 
     def _calculate_priority_score(self, order_data):
         score = 0; days_left = (order_data['due_date'] - datetime.date.today()).days
@@ -8,12 +8,15 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
 
 from .widgets.order_dialog import OrderDialog
+from services.order_repository import OrderRepository
 
 class PageOrders(QWidget):
     def __init__(self):
         super().__init__()
         
-        self.orders_data = self._create_mock_data()
+        # 工单按 id/状态 建索引，任何修改都通过仓库的变更通知刷新表格
+        self.orders_data = OrderRepository(self._create_mock_data())
+        self.orders_data.add_listener(self._on_orders_changed)
         self.current_filter_text = ""
         self.current_filter_status = "所有状态"
 
@@ -65,54 +68,79 @@ class PageOrders(QWidget):
         return layout
 
     def _populate_table(self):
-        self.table.setRowCount(0)
-        filtered_data = self._get_filtered_data()
-
-        for row, order in enumerate(filtered_data):
-            self.table.insertRow(row)
-            
-            # ... (前5列的逻辑保持不变)
-            status_colors = {"待处理": QColor("#FFC107"), "生产中": QColor("#00BCD4"), "已完成": QColor("#4CAF50"), "已取消": QColor("#F44336")}
-            self.table.setItem(row, 0, QTableWidgetItem(order["id"]))
-            self.table.setItem(row, 1, QTableWidgetItem(order["product"]))
-            self.table.setItem(row, 2, QTableWidgetItem(f"{order['quantity_plan']} 米"))
-            progress = QProgressBar(); progress.setRange(0, 100); percentage = (order["quantity_done"] / order["quantity_plan"]) * 100; progress.setValue(int(percentage)); progress.setFormat(f"{order['quantity_done']} / {order['quantity_plan']}"); progress.setAlignment(Qt.AlignCenter); self.table.setCellWidget(row, 3, progress)
-            status_item = QTableWidgetItem(order["status"]); status_item.setBackground(status_colors.get(order["status"], QColor("white"))); self.table.setItem(row, 4, status_item)
-            self.table.setItem(row, 5, QTableWidgetItem(order["date"]))
-            
-            # --- 5. 创建并添加操作按钮 ---
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            actions_layout.setSpacing(5)
-
-            view_button = QPushButton("查看")
-            edit_button = QPushButton("编辑")
-            delete_button = QPushButton("删除")
-            
-            # 使用 functools.partial 将当前行的 order_id 传递给槽函数
-            view_button.clicked.connect(partial(self._view_order, order["id"]))
-            edit_button.clicked.connect(partial(self._edit_order, order["id"]))
-            delete_button.clicked.connect(partial(self._delete_order, order["id"]))
-            
-            actions_layout.addWidget(view_button)
-            actions_layout.addWidget(edit_button)
-            actions_layout.addWidget(delete_button)
-            
-            self.table.setCellWidget(row, 6, actions_widget)
+        """按当前筛选条件重建整张表 (只在切换筛选条件和初始化时)，同时建立 工单ID -> 行号 索引"""
+        self.table.setRowCount(0); self._rows = {}
+        for order in self._get_filtered_data(): self._append_row(order)
+
+    def _append_row(self, order):
+        row = self.table.rowCount()
+        self.table.insertRow(row); self._rows[order["id"]] = row
+        self._fill_row(row, order)
+
+        # --- 5. 创建并添加操作按钮 ---
+        actions_widget = QWidget()
+        actions_layout = QHBoxLayout(actions_widget)
+        actions_layout.setContentsMargins(0, 0, 0, 0)
+        actions_layout.setSpacing(5)
+
+        view_button = QPushButton("查看")
+        edit_button = QPushButton("编辑")
+        delete_button = QPushButton("删除")
+
+        # 使用 functools.partial 将当前行的 order_id 传递给槽函数
+        view_button.clicked.connect(partial(self._view_order, order["id"]))
+        edit_button.clicked.connect(partial(self._edit_order, order["id"]))
+        delete_button.clicked.connect(partial(self._delete_order, order["id"]))
+
+        actions_layout.addWidget(view_button)
+        actions_layout.addWidget(edit_button)
+        actions_layout.addWidget(delete_button)
+
+        self.table.setCellWidget(row, 6, actions_widget)
+
+    def _fill_row(self, row, order):
+        """写入前 6 列；进度条已存在时原地更新，操作按钮不重建"""
+        status_colors = {"待处理": QColor("#FFC107"), "生产中": QColor("#00BCD4"), "已完成": QColor("#4CAF50"), "已取消": QColor("#F44336")}
+        self.table.setItem(row, 0, QTableWidgetItem(order["id"]))
+        self.table.setItem(row, 1, QTableWidgetItem(order["product"]))
+        self.table.setItem(row, 2, QTableWidgetItem(f"{order['quantity_plan']} 米"))
+        progress = self.table.cellWidget(row, 3)
+        if progress is None: progress = QProgressBar(); progress.setRange(0, 100); progress.setAlignment(Qt.AlignCenter); self.table.setCellWidget(row, 3, progress)
+        percentage = (order["quantity_done"] / order["quantity_plan"]) * 100; progress.setValue(int(percentage)); progress.setFormat(f"{order['quantity_done']} / {order['quantity_plan']}")
+        status_item = QTableWidgetItem(order["status"]); status_item.setBackground(status_colors.get(order["status"], QColor("white"))); self.table.setItem(row, 4, status_item)
+        self.table.setItem(row, 5, QTableWidgetItem(order["date"]))
+
+    def _remove_row(self, order_id):
+        row = self._rows.pop(order_id, None)
+        if row is None: return
+        self.table.removeRow(row)
+        for other, other_row in self._rows.items():
+            if other_row > row: self._rows[other] = other_row - 1
 
     # _get_filtered_data, _filter_table, _show_add_dialog 保持不变
     def _get_filtered_data(self):
-        data = self.orders_data
-        if self.current_filter_status != "所有状态": data = [o for o in data if o["status"] == self.current_filter_status]
-        if self.current_filter_text: text = self.current_filter_text.lower(); data = [o for o in data if text in o["id"].lower() or text in o["product"].lower()]
-        return data
+        data = list(self.orders_data) if self.current_filter_status == "所有状态" else self.orders_data.by_status(self.current_filter_status)
+        return [o for o in data if self._matches_text(o)]
+    def _matches_text(self, order):
+        text = self.current_filter_text.lower()
+        return not text or text in order["id"].lower() or text in order["product"].lower()
+    def _matches(self, order):
+        return (self.current_filter_status == "所有状态" or order["status"] == self.current_filter_status) and self._matches_text(order)
     def _filter_table(self):
         self.current_filter_text = self.search_input.text(); self.current_filter_status = self.status_filter.currentText(); self._populate_table()
     def _show_add_dialog(self):
         dialog = OrderDialog(self)
         if dialog.exec_() == QDialog.Accepted:
-            new_data = dialog.get_data(); new_data["quantity_done"] = 0; new_data["date"] = "2023-10-28"; self.orders_data.append(new_data); self._populate_table()
+            new_data = dialog.get_data(); new_data["quantity_done"] = 0; new_data["date"] = "2023-10-28"
+            if new_data["id"] in self.orders_data: QMessageBox.warning(self, "新建失败", f"工单 {new_data['id']} 已存在"); return
+            self.orders_data.add(new_data)
+    def _on_orders_changed(self, event, ids):
+        """仓库变更通知: 只插入/刷新/删除受影响的行 (新行追加在末尾)，不重建整张表"""
+        for order_id in ids:
+            order = self.orders_data.get(order_id)
+            if order is None or not self._matches(order): self._remove_row(order_id)
+            elif order_id in self._rows: self._fill_row(self._rows[order_id], order)
+            else: self._append_row(order)
 
     # _show_context_menu 保持不变 (作为辅助功能)
     def _show_context_menu(self, pos):
@@ -130,7 +158,7 @@ class PageOrders(QWidget):
     # --- 6. 新增“查看”和“双击”的槽函数 ---
     def _view_order(self, order_id):
         """查看指定ID的工单详情"""
-        order_to_view = next((o for o in self.orders_data if o["id"] == order_id), None)
+        order_to_view = self.orders_data.get(order_id)
         if not order_to_view: return
         
         dialog = OrderDialog(self, order_data=order_to_view, view_only=True)
@@ -143,17 +171,18 @@ class PageOrders(QWidget):
 
     # _edit_order, _delete_order, _change_order_status, _create_mock_data 保持不变
     def _edit_order(self, order_id):
-        order_to_edit = next((o for o in self.orders_data if o["id"] == order_id), None)
+        order_to_edit = self.orders_data.get(order_id)
         if not order_to_edit: return
         dialog = OrderDialog(self, order_data=order_to_edit)
-        if dialog.exec_() == QDialog.Accepted: updated_data = dialog.get_data(); order_to_edit.update(updated_data); self._populate_table()
+        if dialog.exec_() == QDialog.Accepted: self.orders_data.update(order_id, dialog.get_data())
     def _delete_order(self, order_id):
         reply = QMessageBox.question(self, "确认删除", f"您确定要删除工单 {order_id} 吗？\n此操作不可撤销。", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes: self.orders_data = [o for o in self.orders_data if o["id"] != order_id]; self._populate_table()
+        if reply == QMessageBox.Yes: self.orders_data.remove(order_id)
     def _change_order_status(self, order_id, new_status):
-        order_to_change = next((o for o in self.orders_data if o["id"] == order_id), None)
+        order_to_change = self.orders_data.get(order_id)
         if not order_to_change: return
-        if new_status == "已完成": order_to_change["quantity_done"] = order_to_change["quantity_plan"]
-        order_to_change["status"] = new_status; self._populate_table()
+        changes = {"status": new_status}
+        if new_status == "已完成": changes["quantity_done"] = order_to_change["quantity_plan"]
+        self.orders_data.update(order_id, changes)
     def _create_mock_data(self):
         return [{"id": "WO-20231027-001", "product": "5mm 滴灌管 (黑色)", "quantity_plan": 5000, "quantity_done": 5000, "status": "已完成", "date": "2023-10-27"}, {"id": "WO-20231027-002", "product": "8mm 滴灌管 (蓝色)", "quantity_plan": 8000, "quantity_done": 3200, "status": "生产中", "date": "2023-10-27"}, {"id": "WO-20231028-001", "product": "5mm 滴灌管 (黑色)", "quantity_plan": 12000, "quantity_done": 0, "status": "待处理", "date": "2023-10-28"}, {"id": "WO-20231026-003", "product": "压力补偿滴头", "quantity_plan": 25000, "quantity_done": 0, "status": "已取消", "date": "2023-10-26"}, {"id": "WO-20231028-002", "product": "12mm PE管", "quantity_plan": 7500, "quantity_done": 1500, "status": "生产中", "date": "2023-10-28"}]
\ No newline at end of file
@@ -1,54 +1,77 @@
 # pages/page_performance_kpi.py
 import numpy as np
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
-                             QGroupBox, QCheckBox, QSplitter, QMessageBox, 
-                             QGraphicsPolygonItem)
+                             QGroupBox, QCheckBox, QSplitter, QMessageBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPolygonF, QPainter # 导入 QPainter
 import pyqtgraph as pg
 
+from .widgets.paint_cache import static_layer, draw_layer, item_scale
+
+def radar_angles(num_vars):
+    return np.linspace(0, 2 * np.pi, num_vars, endpoint=False) + np.pi / 2
+
 # --- 核心修正点 1: 彻底重写 RadarChartItem ---
 class RadarChartItem(pg.GraphicsObject):
     def __init__(self, data, ranges, pen, brush=None):
         super().__init__()
-        self.data = data
         self.ranges = ranges
         self.pen = pen
         self.brush = brush
-        # 我们不再预先生成 QPicture
+        self.set_data(data)
+
+    def set_data(self, data):
+        """数据变化时才重新计算角度和缩放后的多边形，paint 中只画缓存好的多边形"""
+        self.data = data
+        num_vars = len(data); scaled_data = []
+        for i in range(num_vars):
+            r_min, r_max = self.ranges[i]; val = data[i]
+            if r_min > r_max: scaled_data.append((r_min - val) / (r_min - r_max))
+            else: scaled_data.append((val - r_min) / (r_max - r_min))
+        radius = np.clip(scaled_data, 0, 1) * 100; angles = radar_angles(num_vars)
+        self.polygon = QPolygonF([pg.QtCore.QPointF(x, y) for x, y in zip(radius * np.cos(angles), radius * np.sin(angles))])
+        self.update()
 
     def boundingRect(self):
         # 返回一个足够大的固定边界框
         return pg.QtCore.QRectF(-125, -125, 250, 250)
 
     def paint(self, painter, option, widget=None):
-        """直接在 paint 方法中进行绘制"""
+        if self.polygon.isEmpty(): return
         painter.setRenderHint(QPainter.Antialiasing) # 开启抗锯齿
-        
-        num_vars = len(self.data)
-        if num_vars == 0: return
-        
-        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False) + np.pi / 2
-        scaled_data = []
-        for i in range(num_vars):
-            r_min, r_max = self.ranges[i]; val = self.data[i]
-            if r_min > r_max: scaled_data.append((r_min - val) / (r_min - r_max))
-            else: scaled_data.append((val - r_min) / (r_max - r_min))
-        
-        points = [pg.QtCore.QPointF(np.clip(s, 0, 1) * 100 * np.cos(a), 
-                                    np.clip(s, 0, 1) * 100 * np.sin(a)) for s, a in zip(scaled_data, angles)]
-        
-        polygon = QPolygonF(points)
-        
         if self.brush:
             painter.setBrush(self.brush)
             painter.setPen(pg.mkPen(None))
-            painter.drawPolygon(polygon)
+            painter.drawPolygon(self.polygon)
             
         painter.setPen(self.pen)
         painter.setBrush(pg.mkBrush(None))
         # 绘制封闭的多边形边框
-        painter.drawPolygon(polygon)
+        painter.drawPolygon(self.polygon)
+
+
+class RadarGridItem(pg.GraphicsObject):
+    """雷达图的网格 (同心多边形 + 辐条)，作为静态图层缓存，只在视图缩放或像素比变化时重新渲染"""
+    def __init__(self, num_vars, rings=(25, 50, 75, 100)):
+        super().__init__()
+        self.num_vars = num_vars; self.rings = rings
+        self.grid_pen = pg.mkPen(color='#BDBDBD', style=Qt.DotLine)
+
+    def boundingRect(self):
+        return pg.QtCore.QRectF(-105, -105, 210, 210)
+
+    def _paint_grid(self, painter):
+        painter.setPen(self.grid_pen); painter.setBrush(pg.mkBrush(None))
+        angles = radar_angles(self.num_vars)
+        for r in self.rings:
+            painter.drawPolygon(QPolygonF([pg.QtCore.QPointF(r * np.cos(a), r * np.sin(a)) for a in angles]))
+        outer = max(self.rings)
+        for a in angles: painter.drawLine(pg.QtCore.QPointF(0, 0), pg.QtCore.QPointF(outer * np.cos(a), outer * np.sin(a)))
+
+    def paint(self, painter, option, widget=None):
+        rect = self.boundingRect()
+        key = f"RadarGrid:{self.num_vars}:{self.rings}"
+        draw_layer(painter, rect, static_layer(key, rect, item_scale(painter), self._paint_grid))
 
 
 class PagePerformanceKpi(QWidget):
@@ -67,6 +90,7 @@ class PagePerformanceKpi(QWidget):
         self.radar_plot.setBackground(None)
         self.radar_plot.hideAxis('left'); self.radar_plot.hideAxis('bottom')
         self.radar_plot.setAspectLocked(True)
+        self.radar_plot.setMouseEnabled(False, False)    # 雷达图是固定布局，不需要鼠标缩放/平移
         self._draw_radar_background_and_data()
         layout.addWidget(self.radar_plot)
         return panel
@@ -75,16 +99,9 @@ class PagePerformanceKpi(QWidget):
         self.kpi_labels = ["计划达成率", "OEE", "合格率", "准时交付率", "单位成本"]
         self.kpi_ranges = [(80, 100), (75, 95), (98, 100), (95, 100), (0.15, 0.1)]
         num_vars = len(self.kpi_labels)
-        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False) + np.pi / 2
-
-        grid_pen = pg.mkPen(color='#BDBDBD', style=Qt.DotLine)
-        for r in [25, 50, 75, 100]:
-            points = [pg.QtCore.QPointF(r * np.cos(a), r * np.sin(a)) for a in angles]
-            polygon_item = QGraphicsPolygonItem(QPolygonF(points + [points[0]]))
-            polygon_item.setPen(grid_pen)
-            self.radar_plot.addItem(polygon_item)
+        angles = radar_angles(num_vars)
 
-        for a in angles: self.radar_plot.plot([0, 100 * np.cos(a)], [0, 100 * np.sin(a)], pen=grid_pen)
+        self.radar_plot.addItem(RadarGridItem(num_vars))
         
         for i in range(num_vars):
             text = pg.TextItem(self.kpi_labels[i], anchor=(0.5, 0.5), color='#616161')
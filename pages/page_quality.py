@@ -6,6 +6,10 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 import pyqtgraph as pg
 import random
+from datetime import datetime
+
+from services.telemetry_store import get_telemetry_store
+from .widgets.decimated_curve import DecimatedCurve
 
 class PageQuality(QWidget):
     def __init__(self):
@@ -13,6 +17,7 @@ class PageQuality(QWidget):
         
         # 1. 模拟一个关系型数据库
         self._create_mock_database()
+        self.store = get_telemetry_store()
 
         # UI 布局
         main_layout = QVBoxLayout(self)
@@ -150,10 +155,19 @@ class PageQuality(QWidget):
             graph_layout = QVBoxLayout()
             plot_widget = pg.PlotWidget()
             plot_widget.setBackground('#263238')
-            plot_widget.setTitle(f"设备 {node_id} 在 {node_data['timestamp']} 附近的参数", color="#B0BEC5")
-            plot_widget.plot(self._get_mock_sensor_data(), pen='r', name='温度')
-            plot_widget.plot(self._get_mock_sensor_data(base=2.0, var=0.2), pen='g', name='压力')
             plot_widget.addLegend()
+            history = self._get_sensor_history(node_id, node_data['timestamp'])
+            if history:
+                plot_widget.setTitle(f"设备 {node_id} 在 {node_data['timestamp']} 前后30分钟的参数", color="#B0BEC5")
+                plot_widget.setLabel('bottom', "相对生产时间 (分钟)")
+                for (signal, (t, v)), pen, name in zip(history.items(), ['r', 'g'], ['温度', '压力']):
+                    curve = plot_widget.plot(pen=pen, name=name)
+                    DecimatedCurve(plot_widget.getPlotItem(), curve, parent=plot_widget).set_data(t, v)
+            else:
+                # 存储中没有该时段的记录 (例如历史批次早于数据采集上线)
+                plot_widget.setTitle(f"设备 {node_id} 在 {node_data['timestamp']} 附近无历史记录 (模拟数据)", color="#B0BEC5")
+                plot_widget.plot(self._get_mock_sensor_data(), pen='r', name='温度')
+                plot_widget.plot(self._get_mock_sensor_data(base=2.0, var=0.2), pen='g', name='压力')
             graph_layout.addWidget(plot_widget)
             graph_box.setLayout(graph_layout)
             self.details_layout.addWidget(graph_box)
@@ -178,5 +192,15 @@ class PageQuality(QWidget):
         self.db_material_batches = { "RM-PP-001-B789": {"supplier": "巴斯夫化工", "inbound_date": "2023-10-15"}, "AD-CB-001-B112": {"supplier": "陶氏化学", "inbound_date": "2023-10-12"}, }
         self.db_qc_records = { "QC-20231028-001": {"inspector": "张三", "time": "2023-10-28 16:00", "result": "合格", "details": "外观检测: OK\n尺寸检测: OK\n耐压测试: OK"} }
 
+    def _get_sensor_history(self, device_id, production_time, window_minutes=30):
+        """从本地时序存储读取生产时刻前后的温度/压力，x 轴换算为相对生产时刻的分钟数"""
+        center = datetime.strptime(production_time, "%Y-%m-%d %H:%M").timestamp()
+        t0, t1 = center - window_minutes * 60, center + window_minutes * 60
+        history = {}
+        for signal in ('temperature', 'pressure'):
+            t, v = self.store.query(device_id, signal, t0, t1)
+            if len(t): history[signal] = ((t - center) / 60.0, v)
+        return history
+
     def _get_mock_sensor_data(self, base=85, var=2):
         return [base + random.uniform(-var, var) for _ in range(20)]
\ No newline at end of file
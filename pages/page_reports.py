@@ -1,14 +1,29 @@
 # pages/page_reports.py
 import csv
-import random
+import time
 from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, 
-                             QTabWidget, QDateEdit, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QFileDialog, QGroupBox)
-from PyQt5.QtCore import QDate, Qt
+                             QTabWidget, QDateEdit, QTableView, QComboBox,
+                             QHeaderView, QFileDialog, QGroupBox, QProgressDialog, QMessageBox, QApplication)
+from PyQt5.QtCore import QDate, Qt, QTimer
 from PyQt5.QtGui import QPainter, QColor, QBrush, QPen
 import pyqtgraph as pg
 
+import numpy as np
+
+from device_simulator import get_plant_feed
+from services.report_rollups import ReportRollups
+from services.window_aggregates import ShiftCalendar
+from services.report_builder import GROUP_KEYS, mock_production_dataset, daily_summary, oee_detail, shift_oee, group_oee
+from .widgets.column_table_model import Column, ColumnTableModel
+from services.report_export import (CsvExportThread, dataset_chunks, oee_chunks, oee_row_count,
+                                    DATASET_HEADER, OEE_HEADER)
+
+METERS_PER_UNIT = 10.0      # 实时数据按件计，报表按米计 (与采集端 UNIT_LENGTH 一致)
+SHIFT_CHECK_MS = 60 * 1000  # 检查换班的间隔
+OEE_GRAINS = [("按天", 1440), ("按小时", 60), ("按10分钟", 10), ("按分钟", 1)]   # OEE 明细粒度 (分钟)
+OEE_GROUPS = {'line': "产线", 'product': "产品", 'shift': "班次", 'date': "日期"}   # 分组对比的维度，下钻按 GROUP_KEYS 的顺序
+
 # 自定义饼图项
 class PieChartItem(pg.GraphicsObject):
     def __init__(self, data):
@@ -42,8 +57,24 @@ class PageReports(QWidget):
         super().__init__()
         
         # --- 数据 ---
+        # OEE 统一由数据流中的 OEE 引擎按状态区间计算，与驾驶舱/看板一致
+        self.feed = get_plant_feed()
+        # 数据流在后台生成 OEE 历史，生成完之前打开的报表在完成后重新计算一次
+        self.feed.history_ready.connect(self._on_history_ready)
+        self.shifts = ShiftCalendar()
+        # 产量数据为按日期排序的列式数据集，筛选与分组均为向量化运算
         self.full_production_data = self._create_mock_data(days=30)
-        self.filtered_data = []
+        # 日/周/月汇总随新记录增量更新，区间查询结果按 (区间, 数据版本) 缓存
+        self.rollups = ReportRollups(self.full_production_data)
+        self.report = None
+        self.export_job = None; self.export_progress = None   # 进度框只建一个，各次导出复用
+        # 退出时取消并等待仍在运行的导出线程，避免线程对象随页面销毁时仍在运行
+        app = QApplication.instance()
+        if app is not None: app.aboutToQuit.connect(self._stop_export)
+
+        # 每个班次结束后，把该班各产线的实绩 (来自 OEE 引擎) 作为新记录追加到报表数据
+        self._shift_start = self.shifts.start(time.time())
+        self.shift_timer = QTimer(self); self.shift_timer.timeout.connect(self._collect_shift_records); self.shift_timer.start(SHIFT_CHECK_MS)
 
         # --- UI 布局 ---
         main_layout = QVBoxLayout(self)
@@ -77,6 +108,8 @@ class PageReports(QWidget):
         
         generate_button = QPushButton("生成报表")
         generate_button.clicked.connect(self._generate_reports)
+        month_button = QPushButton("本月")
+        month_button.clicked.connect(self._select_this_month)
         
         export_button = QPushButton("导出为CSV")
         export_button.clicked.connect(self._export_to_csv)
@@ -85,6 +118,7 @@ class PageReports(QWidget):
         layout.addWidget(QLabel("至"))
         layout.addWidget(self.end_date_edit)
         layout.addWidget(generate_button)
+        layout.addWidget(month_button)
         layout.addStretch()
         layout.addWidget(export_button)
         return widget
@@ -93,9 +127,8 @@ class PageReports(QWidget):
         layout = QHBoxLayout(self.prod_summary_tab)
         
         # 左侧表格
-        self.prod_table = QTableWidget()
-        self.prod_table.setColumnCount(4)
-        self.prod_table.setHorizontalHeaderLabels(["日期", "计划产量(米)", "实际产量(米)", "合格率(%)"])
+        self.prod_model = ColumnTableModel(parent=self)
+        self.prod_table = self._create_table_view(self.prod_model)
         
         # 右侧图表
         charts_layout = QVBoxLayout()
@@ -124,14 +157,54 @@ class PageReports(QWidget):
         kpi_layout.addWidget(self.performance_label)
         kpi_layout.addWidget(self.quality_label)
         
-        # 底部原始数据表格
-        self.oee_table = QTableWidget()
-        self.oee_table.setColumnCount(6)
-        self.oee_table.setHorizontalHeaderLabels(["日期", "计划运行(h)", "故障停机(h)", "实际产量", "理论产量", "合格品数"])
+        # 分组对比: 按产线/产品/班次/日期汇总 OEE 组成，双击一组下钻到下一个维度 (产线 -> 产品 -> 班次 -> 日期)
+        group_layout = QHBoxLayout()
+        self.group_combo = QComboBox()
+        for key in GROUP_KEYS: self.group_combo.addItem(f"按{OEE_GROUPS[key]}", key)
+        self.group_combo.currentIndexChanged.connect(self._reset_group_drill)
+        self.group_path_label = QLabel("全部")
+        self.group_back_button = QPushButton("返回上级"); self.group_back_button.setEnabled(False)
+        self.group_back_button.clicked.connect(self._group_drill_up)
+        group_layout.addWidget(QLabel("分组对比:")); group_layout.addWidget(self.group_combo)
+        group_layout.addWidget(self.group_path_label); group_layout.addStretch(); group_layout.addWidget(self.group_back_button)
+        self.group_model = ColumnTableModel(parent=self)
+        self.group_table = self._create_table_view(self.group_model)
+        self.group_table.doubleClicked.connect(self._group_drill_down)
+        self._shift_rows = None; self._group_drill = []   # 下钻路径 [(维度, 编码), ...]
+        
+        # 底部明细表格: 粒度可细到分钟，双击一行下钻到该产线该时段的下一级粒度
+        detail_layout = QHBoxLayout()
+        self.grain_combo = QComboBox()
+        for label, minutes in OEE_GRAINS: self.grain_combo.addItem(label, minutes)
+        self.line_filter = QComboBox(); self.line_filter.addItem("全部产线", None)
+        for line in self.feed.line_names: self.line_filter.addItem(line, line)
+        self.grain_combo.currentIndexChanged.connect(self._clear_drill_down)
+        self.line_filter.currentIndexChanged.connect(self._on_line_filter_changed)
+        detail_layout.addWidget(QLabel("明细粒度:")); detail_layout.addWidget(self.grain_combo)
+        detail_layout.addWidget(QLabel("产线:")); detail_layout.addWidget(self.line_filter); detail_layout.addStretch()
+        self.oee_model = ColumnTableModel(parent=self)
+        self.oee_table = self._create_table_view(self.oee_model)
+        self.oee_table.doubleClicked.connect(self._drill_down)
+        self._oee_span = None   # 下钻时限定的时间范围
         
         layout.addLayout(kpi_layout)
+        layout.addLayout(group_layout)
+        layout.addWidget(self.group_table)
+        layout.addLayout(detail_layout)
         layout.addWidget(self.oee_table)
+
+    def _create_table_view(self, model):
+        view = QTableView(); view.setModel(model)
+        view.verticalHeader().setDefaultSectionSize(22); view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive); view.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        view.setSortingEnabled(True)
+        return view
         
+    def _sort_by_first_column(self, view):
+        """新数据按第一列升序显示；排序标记本来就是第一列升序时视图不会再调用 sort()，因此直接排一次"""
+        view.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        view.model().sort(0, Qt.AscendingOrder)
+
     def _create_kpi_card(self, title, value):
         box = QGroupBox(title)
         box_layout = QVBoxLayout(box)
@@ -145,52 +218,71 @@ class PageReports(QWidget):
         start_date = self.start_date_edit.date().toPyDate()
         end_date = self.end_date_edit.date().toPyDate()
         
-        self.filtered_data = [d for d in self.full_production_data if start_date <= d['date'] <= end_date]
+        self.report = self.rollups.query(start_date, end_date)
         
-        if not self.filtered_data:
+        if not len(self.report['daily'][0]):
             print("该日期范围内没有数据。")
             return
             
         self._update_production_summary()
         self._update_oee_analysis()
 
+    def _on_history_ready(self):
+        if self.report is not None: self._update_oee_analysis()
+
+    def _select_this_month(self):
+        today = QDate.currentDate()
+        self.start_date_edit.setDate(QDate(today.year(), today.month(), 1)); self.end_date_edit.setDate(today)
+        self._generate_reports()
+
+    def _collect_shift_records(self):
+        now = time.time(); start = self.shifts.start(now)
+        if start == self._shift_start: return
+        # 两次检查之间可能跨过多个班次 (休眠、事件循环阻塞)，逐班结转，每班一组记录
+        shift_start, self._shift_start = self._shift_start, start
+        while shift_start < start:
+            shift_end = min(self.shifts.end(shift_start), start)
+            self._append_shift_records(shift_start, shift_end)
+            shift_start = shift_end
+
+    def _append_shift_records(self, previous, start):
+        dataset = self.full_production_data; lines = list(self.feed.line_names)
+        results = [self.feed.line_oee([line], previous, start) for line in lines]
+        keep = [i for i, result in enumerate(results) if result['planned_time'] > 0]
+        if not keep: return
+        pick = lambda field, scale=1.0: np.array([results[i][field] * scale for i in keep])
+        self.rollups.append({
+            'date': np.full(len(keep), np.datetime64(datetime.fromtimestamp(previous).date(), 'D')),
+            'shift': np.full(len(keep), dataset.category_code('shift', self.shifts.name(previous))),
+            'line': np.array([dataset.category_code('line', lines[i]) for i in keep]),
+            'product': np.full(len(keep), dataset.category_code('product', '未登记')),
+            'plan_output': pick('ideal_output', METERS_PER_UNIT), 'actual_output': pick('total', METERS_PER_UNIT),
+            'defects': pick('total', METERS_PER_UNIT) - pick('good', METERS_PER_UNIT),
+            'downtime_hours': pick('fault_time', 1 / 3600),
+        })
+
     def _update_production_summary(self):
-        # 按日期聚合数据
-        summary = {}
-        for record in self.filtered_data:
-            date_str = record['date'].strftime("%Y-%m-%d")
-            if date_str not in summary:
-                summary[date_str] = {'plan': 0, 'actual': 0, 'qualified': 0}
-            summary[date_str]['plan'] += record['plan_output']
-            summary[date_str]['actual'] += record['actual_output']
-            summary[date_str]['qualified'] += record['actual_output'] - record['defects']
+        # 按日期聚合数据 (取自日汇总)
+        summary = daily_summary(*self.report['daily'])
+        dates, actual = summary['date'], summary['actual_output']
+        sorted_dates = np.datetime_as_string(dates).tolist()
             
-        # 填充表格
-        self.prod_table.setRowCount(len(summary))
-        sorted_dates = sorted(summary.keys())
-        for row, date_str in enumerate(sorted_dates):
-            data = summary[date_str]
-            quality_rate = (data['qualified'] / data['actual'] * 100) if data['actual'] > 0 else 0
-            self.prod_table.setItem(row, 0, QTableWidgetItem(date_str))
-            self.prod_table.setItem(row, 1, QTableWidgetItem(str(data['plan'])))
-            self.prod_table.setItem(row, 2, QTableWidgetItem(str(data['actual'])))
-            self.prod_table.setItem(row, 3, QTableWidgetItem(f"{quality_rate:.2f}"))
+        # 表格 (虚拟模型，单元格文本在绘制时才生成)
+        self.prod_model.set_columns([Column("日期", dates), Column("计划产量(米)", summary['plan_output'], '{:.0f}'),
+                                     Column("实际产量(米)", actual, '{:.0f}'), Column("合格率(%)", summary['quality_rate'], '{:.2f}')])
             
         # 更新条形图
         self.bar_chart.clear()
         ticks = [(i, date) for i, date in enumerate(sorted_dates)]
         self.bar_chart.getAxis('bottom').setTicks([ticks])
-        bar_item = pg.BarGraphItem(x=range(len(summary)), height=[summary[d]['actual'] for d in sorted_dates], width=0.6)
+        bar_item = pg.BarGraphItem(x=np.arange(len(sorted_dates)), height=actual, width=0.6)
         self.bar_chart.addItem(bar_item)
         
         # 更新饼图
-        product_summary = {}
-        for record in self.filtered_data:
-            product = record['product']
-            product_summary[product] = product_summary.get(product, 0) + record['actual_output']
+        products, product_sums = self.report['by']['product']
         
         colors = [QColor("#00BCD4"), QColor("#FFC107"), QColor("#8BC34A"), QColor("#D32F2F")]
-        pie_data = [(v, colors[i % len(colors)]) for i, v in enumerate(product_summary.values())]
+        pie_data = [(v, colors[i % len(colors)]) for i, v in enumerate(product_sums['actual_output'].tolist())]
         pie = PieChartItem(pie_data)
         scene = pg.QtWidgets.QGraphicsScene()
         scene.addItem(pie)
@@ -199,7 +291,8 @@ class PageReports(QWidget):
         
     def _update_oee_analysis(self):
         # --- 特色逻辑：OEE计算 ---
-        oee_results = self._calculate_oee(self.filtered_data)
+        start_date = self.start_date_edit.date().toPyDate(); end_date = self.end_date_edit.date().toPyDate()
+        oee_results = self._calculate_oee(start_date, end_date)
         
         # 更新KPI卡片
         self.oee_score_label.findChild(QLabel).setText(f"{oee_results['oee']:.1%}")
@@ -207,74 +300,160 @@ class PageReports(QWidget):
         self.performance_label.findChild(QLabel).setText(f"{oee_results['performance']:.1%}")
         self.quality_label.findChild(QLabel).setText(f"{oee_results['quality']:.1%}")
         
-        # 填充原始数据表格
-        self.oee_table.setRowCount(len(self.filtered_data))
-        for row, record in enumerate(self.filtered_data):
-            self.oee_table.setItem(row, 0, QTableWidgetItem(record['date'].strftime("%Y-%m-%d")))
-            self.oee_table.setItem(row, 1, QTableWidgetItem(str(8.0))) # 假设每天8小时
-            self.oee_table.setItem(row, 2, QTableWidgetItem(str(record['downtime_hours'])))
-            self.oee_table.setItem(row, 3, QTableWidgetItem(str(record['actual_output'])))
-            self.oee_table.setItem(row, 4, QTableWidgetItem(str(record['plan_output'])))
-            self.oee_table.setItem(row, 5, QTableWidgetItem(str(record['actual_output'] - record['defects'])))
-            
-    def _calculate_oee(self, data):
-        total_planned_time = len(set(d['date'] for d in data)) * 8.0 # 每天8小时
-        total_downtime = sum(d['downtime_hours'] for d in data)
-        actual_run_time = total_planned_time - total_downtime
-        
-        total_actual_output = sum(d['actual_output'] for d in data)
-        total_plan_output = sum(d['plan_output'] for d in data)
-        total_defects = sum(d['defects'] for d in data)
-        
-        availability = actual_run_time / total_planned_time if total_planned_time > 0 else 0
-        performance = total_actual_output / total_plan_output if total_plan_output > 0 else 0
-        quality = (total_actual_output - total_defects) / total_actual_output if total_actual_output > 0 else 0
+        # 每条产线每班一行的 OEE 合计，分组/下钻都在它上面做向量化汇总
+        self._shift_rows = shift_oee(self.feed.line_oee_series, self.feed.line_names, start_date, end_date,
+                                     self.shifts, self.full_production_data)
+        self._reset_group_drill()
+        self._clear_drill_down()
+
+    # ---------------- 分组对比 ----------------
+    def _reset_group_drill(self):
+        self._group_drill = []
+        self._update_oee_groups()
+
+    def _update_oee_groups(self):
+        if self._shift_rows is None: return
+        rows, categories = self._shift_rows
+        key = self.group_combo.currentData()
+        mask = np.ones(len(rows['line']), dtype=bool)
+        for drill_key, code in self._group_drill: mask &= rows[drill_key] == code
+        groups, oee = group_oee(rows, key, mask)
+        codes = groups[key]
+        first = Column(OEE_GROUPS[key], categories['date'][codes]) if key == 'date' else Column(OEE_GROUPS[key], codes, labels=categories[key])
+        self.group_model.set_columns([
+            first,
+            Column("计划运行(h)", oee['planned_time'] / 3600, '{:.1f}'), Column("故障停机(h)", oee['fault_time'] / 3600, '{:.1f}'),
+            Column("换型(h)", oee['setup_time'] / 3600, '{:.1f}'), Column("实际产量", oee['total'], '{:.0f}'), Column("合格品数", oee['good'], '{:.0f}'),
+            Column("时间开动率(%)", oee['availability'] * 100, '{:.1f}'), Column("性能开动率(%)", oee['performance'] * 100, '{:.1f}'),
+            Column("合格品率(%)", oee['quality'] * 100, '{:.1f}'), Column("OEE(%)", oee['oee'] * 100, '{:.1f}'),
+        ])
+        self._group_codes = codes
+        self._sort_by_first_column(self.group_table)
+        path = [str(categories['date'][code]) if k == 'date' else categories[k][code] for k, code in self._group_drill]
+        self.group_path_label.setText(" / ".join(["全部"] + path))
+        self.group_back_button.setEnabled(bool(self._group_drill))
+
+    def _group_drill_down(self, index):
+        """双击一组: 固定该维度的取值，切换到下一个尚未固定的维度"""
+        key = self.group_combo.currentData()
+        fixed = {k for k, _ in self._group_drill} | {key}
+        remaining = [k for k in GROUP_KEYS if k not in fixed]
+        if not remaining: return
+        self._group_drill.append((key, int(self._group_codes[self.group_model.source_row(index.row())])))
+        self._set_group_key(remaining[0])
+
+    def _group_drill_up(self):
+        if not self._group_drill: return
+        key, _ = self._group_drill.pop()
+        self._set_group_key(key)
+
+    def _set_group_key(self, key):
+        self.group_combo.blockSignals(True); self.group_combo.setCurrentIndex(GROUP_KEYS.index(key)); self.group_combo.blockSignals(False)
+        self._update_oee_groups()
+
+    # ---------------- 时间明细 ----------------
+    def _clear_drill_down(self):
+        self._oee_span = None
+        self._update_oee_details()
+
+    def _update_oee_details(self):
+        """按所选粒度为每条产线计算 OEE 序列 (每条产线一次向量化查询)，拼成列式明细"""
+        start_date = self.start_date_edit.date().toPyDate(); end_date = self.end_date_edit.date().toPyDate()
+        lines = list(self.feed.line_names)
+        # 下钻后只计算该时段、所选产线的格子，不重算整个日期范围
+        line = self.line_filter.currentData()
+        codes = [lines.index(line)] if self._oee_span is not None and line is not None else None
+        detail = oee_detail(self.feed.line_oee_series, lines, start_date, end_date, self.grain_combo.currentData(),
+                            span=self._oee_span, line_codes=codes)
+        self._oee_times, self._oee_lines = detail['start'], detail['line']
+        self.oee_model.set_columns([
+            Column("时间", detail['time']), Column("产线", detail['line'], labels=lines),
+            Column("计划运行(h)", detail['planned_time'] / 3600, '{:.2f}'), Column("故障停机(h)", detail['fault_time'] / 3600, '{:.2f}'),
+            Column("实际产量", detail['total'], '{:.0f}'), Column("理论产量", detail['ideal_output'], '{:.0f}'),
+            Column("合格品数", detail['good'], '{:.0f}'), Column("OEE(%)", detail['oee'] * 100, '{:.1f}'),
+        ])
+        self._sort_by_first_column(self.oee_table)
+        self._apply_oee_filter()
+
+    def _on_line_filter_changed(self):
+        # 下钻明细只含下钻的那条产线，换产线时需要重新计算
+        if self._oee_span is not None: self._update_oee_details()
+        else: self._apply_oee_filter()
+
+    def _apply_oee_filter(self):
+        line = self.line_filter.currentData()
+        mask = None
+        if line is not None: mask = self._oee_lines == list(self.feed.line_names).index(line)
+        if self._oee_span is not None:
+            span = (self._oee_times >= self._oee_span[0]) & (self._oee_times < self._oee_span[1])
+            mask = span if mask is None else mask & span
+        self.oee_model.set_filter(mask)
+
+    def _drill_down(self, index):
+        """双击: 只看该行的产线与时段，粒度细一级"""
+        grain = self.grain_combo.currentIndex()
+        if grain + 1 >= len(OEE_GRAINS): return
+        row = self.oee_model.source_row(index.row())
+        t0 = float(self._oee_times[row]); self._oee_span = (t0, t0 + OEE_GRAINS[grain][1] * 60)
+        for combo, index in ((self.line_filter, int(self._oee_lines[row]) + 1), (self.grain_combo, grain + 1)):
+            combo.blockSignals(True); combo.setCurrentIndex(index); combo.blockSignals(False)
+        self._update_oee_details()
         
-        oee = availability * performance * quality
-        return {
-            "oee": oee, "availability": availability, 
-            "performance": performance, "quality": quality
-        }
+    def _calculate_oee(self, start_date, end_date):
+        """日期范围 (含首尾两天) 内全部产线的 OEE"""
+        start = datetime.combine(start_date, datetime.min.time()).timestamp()
+        end = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp()
+        return self.feed.line_oee(None, start, end)
         
     def _export_to_csv(self):
+        """在后台线程中直接从数据集/OEE 引擎导出所选日期范围 (不读表格单元格)，可选 gzip 压缩"""
+        if self.export_job is not None: return
+        start_date = self.start_date_edit.date().toPyDate(); end_date = self.end_date_edit.date().toPyDate()
         current_tab_index = self.tabs.currentIndex()
         if current_tab_index == 0:
-            table = self.prod_table
-            default_filename = "production_summary.csv"
+            default_filename = "production_records.csv"
         elif current_tab_index == 1:
-            table = self.oee_table
             default_filename = "oee_analysis_data.csv"
         else:
             return
 
-        path, _ = QFileDialog.getSaveFileName(self, "保存文件", default_filename, "CSV Files (*.csv)")
-        
-        if path:
-            with open(path, 'w', newline='', encoding='utf-8-sig') as stream:
-                writer = csv.writer(stream)
-                # 写入表头
-                headers = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount())]
-                writer.writerow(headers)
-                # 写入数据
-                for row in range(table.rowCount()):
-                    row_data = [table.item(row, col).text() for col in range(table.columnCount())]
-                    writer.writerow(row_data)
+        path, _ = QFileDialog.getSaveFileName(self, "保存文件", default_filename, "CSV Files (*.csv);;Gzip CSV (*.csv.gz)")
+        if not path: return
+        if current_tab_index == 0:
+            records = self.full_production_data.select(start_date, end_date)
+            job = CsvExportThread(path, DATASET_HEADER, dataset_chunks(records), len(records), parent=self)
+        else:
+            lines = list(self.feed.line_names)
+            job = CsvExportThread(path, OEE_HEADER, oee_chunks(self.feed, lines, start_date, end_date),
+                                  oee_row_count(start_date, end_date, lines), parent=self)
+
+        if self.export_progress is None:
+            self.export_progress = QProgressDialog("正在导出...", "取消", 0, 100, self)
+            self.export_progress.setWindowModality(Qt.NonModal); self.export_progress.setMinimumDuration(500)
+            self.export_progress.canceled.connect(self._cancel_export)
+        progress = self.export_progress; progress.reset(); progress.setValue(0)
+        job.progress.connect(lambda done, total: progress.setValue(min(99, done * 100 // total) if total else 0))
+        job.completed.connect(lambda path, rows: QMessageBox.information(self, "导出完成", f"已导出 {rows:,} 行到\n{path}"))
+        job.failed.connect(lambda message: QMessageBox.warning(self, "导出失败", message))
+        job.finished.connect(progress.reset); job.finished.connect(self._export_finished)
+        self.export_job = job; job.start()
+
+    def _export_finished(self):
+        if self.export_job is None: return
+        self.export_job.deleteLater(); self.export_job = None
+
+    def _cancel_export(self):
+        if self.export_job is not None: self.export_job.cancel()
+
+    def _stop_export(self):
+        if self.export_job is not None: self.export_job.cancel(); self.export_job.wait()
+
+    def closeEvent(self, event):
+        self._stop_export()
+        super().closeEvent(event)
 
     def _create_mock_data(self, days=30):
-        data = []
-        products = ["5mm 滴灌管", "8mm 滴灌管", "12mm PE管"]
-        today = datetime.now().date()
-        for i in range(days):
-            current_date = today - timedelta(days=i)
-            for _ in range(random.randint(2, 4)): # 每天有多条记录
-                plan = random.randint(3000, 5000)
-                actual = int(plan * random.uniform(0.85, 0.98))
-                data.append({
-                    "date": current_date,
-                    "product": random.choice(products),
-                    "plan_output": plan,
-                    "actual_output": actual,
-                    "defects": int(actual * random.uniform(0.01, 0.05)),
-                    "downtime_hours": round(random.uniform(0.1, 1.0), 2)
-                })
-        return data
\ No newline at end of file
+        # 模拟历史截止到当前班次开始: 今天只含已结束的班次，当前班结束后由 _collect_shift_records 追加实绩，不会重复计入
+        now = time.time()
+        shift_day = datetime.fromtimestamp(self.shifts.start(now)).date()
+        return mock_production_dataset(self.feed.line_names, days, shift_day, last_day_shifts=self.shifts.names.index(self.shifts.name(now)))
@@ -1,20 +1,27 @@
 # pages/page_scheduling_workbench.py
-from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, QListWidget, 
-                             QPushButton, QGroupBox, QListWidgetItem, QGraphicsRectItem)
+from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, QListView,
+                             QPushButton, QGroupBox, QGraphicsRectItem)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QBrush
 import pyqtgraph as pg
 import datetime # 确保导入 datetime
 
 # 使用绝对路径导入
-from widgets.order_card import OrderCard
+from widgets.order_card import OrderCardDelegate
+from pages.widgets.order_kanban import OrderListModel, LaneProxy
+from services.order_repository import OrderRepository
 from pages.widgets.scheduling_algorithm import HeuristicScheduler
+from device_simulator import get_plant_feed
 
 class PageSchedulingWorkbench(QWidget):
     def __init__(self):
         super().__init__()
         
         self._load_mock_data()
+        # 订单列表只显示待排程 (ready) 的订单，按优先级排序；排程后状态变化由代理移出列表
+        self.orders = OrderRepository(self.all_orders)
+        self.order_model = OrderListModel(self.orders, self)
+        self.pending_orders = LaneProxy('ready', self); self.pending_orders.setSourceModel(self.order_model)
         
         main_layout = QHBoxLayout(self); main_layout.setSpacing(15)
         
@@ -23,11 +30,10 @@ class PageSchedulingWorkbench(QWidget):
         
         main_layout.addWidget(left_panel, 1); main_layout.addWidget(right_panel, 3)
 
-        self._refresh_order_list()
-
     def _create_order_list_panel(self):
         panel = QGroupBox("待排程订单 (按优先级排序)"); layout = QVBoxLayout(panel)
-        self.order_list = QListWidget()
+        self.order_list = QListView(); self.order_list.setModel(self.pending_orders)
+        self.order_list.setItemDelegate(OrderCardDelegate(self.order_list)); self.order_list.setUniformItemSizes(True)
         run_scheduler_button = QPushButton("🚀 一键智能排程"); run_scheduler_button.setMinimumHeight(40)
         run_scheduler_button.clicked.connect(self._run_auto_scheduling)
         layout.addWidget(self.order_list); layout.addWidget(run_scheduler_button)
@@ -44,25 +50,19 @@ class PageSchedulingWorkbench(QWidget):
         self.gantt_plot.getAxis('left').setTicks(ticks); self.gantt_plot.setYRange(-0.5, len(self.resources)-0.5, padding=0)
         layout.addWidget(self.gantt_plot); return panel
 
-    def _refresh_order_list(self):
-        self.order_list.clear()
-        pending_orders = [o for o in self.all_orders if o['status'] == 'ready']
-        pending_orders.sort(key=lambda o: o.get('priority', 0), reverse=True)
-        for order in pending_orders:
-            card = OrderCard(order); item = QListWidgetItem()
-            item.setSizeHint(card.sizeHint()); self.order_list.addItem(item)
-            self.order_list.setItemWidget(item, card)
-
     def _run_auto_scheduling(self):
-        pending_orders = [o for o in self.all_orders if o['status'] == 'ready']
+        pending_orders = self.orders.by_status('ready')
         if not pending_orders: return
         resources_info = {
             'Line A (5mm)': {'specs': ['5mm']}, 'Line B (5mm/8mm)': {'specs': ['5mm', '8mm']}, 'Line C (8mm)': {'specs': ['8mm']}
         }
-        scheduler = HeuristicScheduler(pending_orders, resources_info); schedule_result = scheduler.run()
+        # 冻结区: 各产线在制工单按 ETA 预测 (置信上界) 完工前不排入新订单
+        estimates = get_plant_feed().eta.estimates(); busy_hours = get_plant_feed().eta.busy_until_hours()
+        busy_until = {name: busy_hours[name.split(' (')[0]] for name in resources_info if name.split(' (')[0] in busy_hours}
+        scheduler = HeuristicScheduler(pending_orders, resources_info, busy_until=busy_until); schedule_result = scheduler.run()
         self._draw_schedule(schedule_result)
-        for order in pending_orders: order['status'] = 'scheduled'
-        self._refresh_order_list()
+        self._draw_frozen(busy_until, estimates)
+        self.orders.set_status([order['id'] for order in pending_orders], 'scheduled')
 
     def _draw_schedule(self, schedule):
         self.gantt_plot.clear()
@@ -77,6 +77,14 @@ class PageSchedulingWorkbench(QWidget):
                 text = pg.TextItem(task['order']['id'], anchor=(0, 0.5)); text.setPos(task['start'] + 0.1, y)
                 self.gantt_plot.addItem(text)
 
+    def _draw_frozen(self, busy_until, estimates):
+        for line_name, hours in busy_until.items():
+            y = self.resources[line_name]; estimate = estimates.get(line_name.split(' (')[0])
+            bar = QGraphicsRectItem(0, y - 0.4, hours, 0.8)
+            bar.setBrush(QBrush(QColor(150, 150, 150, 120))); bar.setPen(pg.mkPen(None))
+            if estimate: bar.setToolTip(f"在制工单: {estimate['order']}\n剩余 {estimate['remaining']} 件 (冻结区)")
+            self.gantt_plot.addItem(bar)
+
     # --- 核心修正点：补全所有模拟数据的字段 ---
     def _load_mock_data(self):
         today = datetime.date.today()
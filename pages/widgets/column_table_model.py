@@ -0,0 +1,102 @@
+# pages/widgets/column_table_model.py
+"""
+列式数据的虚拟表格模型。
+
+模型只持有若干 NumPy 列和一个 "可见行 -> 数据行" 的索引数组，不为单元格创建任何对象；
+文本在 data() 中按列的格式串即时生成，视图只会请求可见区域的单元格，因此百万行也能瞬间打开。
+排序: 每列第一次排序时计算一次稳定 argsort 并缓存 (排序键)，之后升降序切换只是反转；
+筛选: set_filter(mask) 给出布尔掩码，可见行 = 当前排序顺序中掩码为真的行，同样是一次向量化运算。
+"""
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+class Column:
+    """
+    values: 一维数组；labels 不为 None 时 values 是类别编码，显示 labels[编码]
+    fmt:    数值的格式串 (如 '{:.2f}')，日期列 (datetime64) 自动转为 YYYY-MM-DD / HH:MM
+    """
+    def __init__(self, header, values, fmt='{}', labels=None):
+        self.header = header; self.values = np.asarray(values); self.fmt = fmt; self.labels = labels
+        self.numeric = labels is None and np.issubdtype(self.values.dtype, np.number)
+
+    def text(self, row):
+        value = self.values[row]
+        if self.labels is not None: return self.labels[value]
+        if np.issubdtype(self.values.dtype, np.datetime64): return str(value).replace('T', ' ')
+        return self.fmt.format(value)
+
+
+class ColumnTableModel(QAbstractTableModel):
+    def __init__(self, columns=(), parent=None):
+        super().__init__(parent)
+        self.set_columns(columns)
+
+    def set_columns(self, columns):
+        """整体替换数据 (新的查询结果)"""
+        self.beginResetModel()
+        self.columns = list(columns)
+        self._length = len(self.columns[0].values) if self.columns else 0
+        self._sort_keys = {}
+        self._order = np.arange(self._length)
+        self._mask = None
+        self._sort = None
+        self._rows = self._order
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return QVariant()
+        if orientation == Qt.Horizontal: return self.columns[section].header
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return QVariant()
+        column = self.columns[index.column()]
+        if role == Qt.DisplayRole: return column.text(self._rows[index.row()])
+        if role == Qt.TextAlignmentRole and column.numeric: return int(Qt.AlignRight | Qt.AlignVCenter)
+        return QVariant()
+
+    def source_row(self, row):
+        """可见行号 -> 数据行号"""
+        return int(self._rows[row])
+
+    # ---------------- 排序 / 筛选 ----------------
+    def _sort_key(self, column):
+        key = self._sort_keys.get(column)
+        if key is None:
+            col = self.columns[column]
+            values = col.values
+            if col.labels is not None:   # 类别列按名称排序: 先给名称排名，再按编码取排名
+                rank = np.empty(len(col.labels), dtype=np.int64); rank[np.argsort(np.asarray(col.labels, dtype=object), kind='stable')] = np.arange(len(col.labels))
+                values = rank[values]
+            key = self._sort_keys[column] = np.argsort(values, kind='stable')
+        return key
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not 0 <= column < len(self.columns): return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        source = [int(self._rows[index.row()]) for index in persistent]
+        key = self._sort_key(column)
+        self._order = key if order == Qt.AscendingOrder else key[::-1]
+        self._sort = (column, order)
+        self._apply()
+        if persistent:   # 选中行/当前行跟随数据行移动到新位置
+            position = np.empty(self._length, dtype=np.int64); position[self._rows] = np.arange(len(self._rows))
+            self.changePersistentIndexList(persistent, [self.index(int(position[row]), index.column()) for row, index in zip(source, persistent)])
+        self.layoutChanged.emit()
+
+    def set_filter(self, mask=None):
+        """mask: 与数据等长的布尔数组，None 表示不筛选"""
+        self.beginResetModel()
+        self._mask = mask
+        self._apply()
+        self.endResetModel()
+
+    def _apply(self):
+        self._rows = self._order if self._mask is None else self._order[self._mask[self._order]]
@@ -0,0 +1,63 @@
+# pages/widgets/decimated_curve.py
+import numpy as np
+from PyQt5.QtCore import QObject
+
+from services.decimation import decimate
+
+class DecimatedCurve(QObject):
+    """
+    历史数据与 PlotDataItem.setData 之间的抽稀层。
+    曲线只拿到与当前视图宽度相当的点数；只有在数据变化、
+    视图范围(缩放/平移)或视图宽度变化时才会重新计算。
+    """
+    def __init__(self, plot_item, curve, method='minmax', parent=None):
+        super().__init__(parent)
+        self.curve = curve
+        self.method = method
+        self.view_box = plot_item.getViewBox()
+        self._x = np.empty(0); self._y = np.empty(0)
+        self._data_version = 0
+        self._last_key = None
+        self._view_complete = False
+
+        self.view_box.sigXRangeChanged.connect(self._on_range_changed)
+        self.view_box.sigResized.connect(self.refresh)
+
+    def set_data(self, x, y):
+        """传入完整的历史数据 (x 需单调递增，通常是 SeriesBuffer 的视图)"""
+        self._x = x; self._y = y
+        self._data_version += 1
+        self.refresh()
+
+    def set_method(self, method):
+        self.method = method
+        self._last_key = None; self.refresh()
+
+    def refresh(self):
+        if len(self._x) == 0:
+            self.curve.setData([], []); self._last_key = None
+            return
+
+        pixels = max(1, int(self.view_box.width()))
+        if self.view_box.state['autoRange'][0]:
+            # 自动量程时视图跟随数据，按全量数据的范围抽稀
+            x_min, x_max = self._x[0], self._x[-1]
+            view = ('auto', pixels, self.method)
+        else:
+            x_min, x_max = self.view_box.viewRange()[0]
+            view = (x_min, x_max, pixels, self.method)
+            # 用户回看历史时，视图内的数据已经完整，新追加的点都落在视图之外，无需重算
+            if self._last_key and self._last_key[0] == view and self._view_complete: return
+
+        key = (view, self._data_version)
+        if key == self._last_key: return
+        self._last_key = key
+        self._view_complete = self._x[-1] > x_max
+
+        x, y = decimate(self._x, self._y, x_min, x_max, pixels, self.method)
+        self.curve.setData(x, y)
+
+    def _on_range_changed(self, *args):
+        # 自动量程下的范围变化由 set_data 引起，已经算过
+        if self.view_box.state['autoRange'][0]: return
+        self.refresh()
@@ -0,0 +1,106 @@
+# pages/widgets/event_log_view.py
+import time
+from datetime import datetime
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListView, QComboBox, QLineEdit)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QVariant
+from PyQt5.QtGui import QColor
+
+from services.event_log import get_event_log, SEVERITIES, GrowableArray
+
+SEVERITY_COLORS = {'info': None, 'warning': QColor('#FBC02D'), 'fault': QColor('#D32F2F')}
+SEVERITY_LABELS = {'info': "提示", 'warning': "警告", 'fault': "故障"}
+TIME_RANGES = [("全部时间", None), ("最近1小时", 3600), ("最近24小时", 86400), ("最近7天", 7 * 86400)]
+
+class EventLogModel(QAbstractListModel):
+    """
+    事件日志的虚拟列表模型：只保存筛选结果的行号，
+    文本在 data() 中按需读取，因此可以承载数百万条事件。最新事件显示在最上方。
+    """
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or get_event_log()
+        self.filters = {}
+        self._rows = GrowableArray('i8')
+        self.store.add_listener(self._on_event_appended)
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return QVariant()
+        row = int(self._rows.view()[len(self._rows) - 1 - index.row()])
+        if role == Qt.DisplayRole:
+            ts, severity, source, message = self.store.record(row)
+            prefix = f"[{datetime.fromtimestamp(ts).strftime('%m-%d %H:%M:%S')}]"
+            return f"{prefix} {source}: {message}" if source else f"{prefix} {message}"
+        if role == Qt.ForegroundRole:
+            color = SEVERITY_COLORS.get(self.store.severity(row))
+            return color if color is not None else QVariant()
+        return QVariant()
+
+    def set_filters(self, severities=None, sources=None, t0=None, t1=None, text=None):
+        self.filters = {'severities': severities, 'sources': sources, 't0': t0, 't1': t1, 'text': text or None}
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self._rows = GrowableArray('i8', self.store.query(**self.filters))
+        self.endResetModel()
+
+    def _on_event_appended(self, row):
+        """新事件只在满足当前筛选条件时插入到顶部，不重建整个模型"""
+        ts, severity, source, message = self.store.record(row)
+        f = self.filters
+        if f.get('severities') is not None and severity not in f['severities']: return
+        if f.get('sources') is not None and source not in f['sources']: return
+        if f.get('t1') is not None and ts > f['t1']: return
+        if f.get('t0') is not None and ts < f['t0']: return
+        if f.get('text') and f['text'] not in message: return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.append(row)
+        self.endInsertRows()
+
+
+class EventLogView(QWidget):
+    """带筛选栏的事件日志视图 (级别 / 来源 / 时间范围 / 关键字)，sources 缺省时列出日志中已有的来源"""
+    def __init__(self, sources=None, parent=None):
+        super().__init__(parent)
+        self.model = EventLogModel(parent=self)
+        self.store = self.model.store
+
+        layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0)
+        filter_layout = QHBoxLayout()
+        self.severity_filter = QComboBox(); self.severity_filter.addItem("所有级别", None)
+        for severity in reversed(SEVERITIES): self.severity_filter.addItem(SEVERITY_LABELS[severity], [severity])
+        self.source_filter = QComboBox(); self.source_filter.addItem("所有来源", None)
+        for source in (sources if sources is not None else [s for s in self.store.sources if s]):
+            self.source_filter.addItem(source, [source])
+        self.time_filter = QComboBox()
+        for label, seconds in TIME_RANGES: self.time_filter.addItem(label, seconds)
+        self.search_input = QLineEdit(); self.search_input.setPlaceholderText("搜索事件内容...")
+
+        for combo in (self.severity_filter, self.source_filter, self.time_filter): combo.currentIndexChanged.connect(self.apply_filters)
+        self.search_input.returnPressed.connect(self.apply_filters)
+        filter_layout.addWidget(self.severity_filter); filter_layout.addWidget(self.source_filter)
+        filter_layout.addWidget(self.time_filter); filter_layout.addWidget(self.search_input)
+
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True) # 定高行，滚动时无需逐行测量
+        self.list_view.setModel(self.model)
+        layout.addLayout(filter_layout); layout.addWidget(self.list_view)
+
+    def apply_filters(self):
+        seconds = self.time_filter.currentData()
+        self.model.set_filters(severities=self.severity_filter.currentData(), sources=self.source_filter.currentData(),
+                               t0=time.time() - seconds if seconds else None, text=self.search_input.text())
+
+    def select_source(self, source):
+        """只显示指定来源的事件 (来源不在下拉框中时先加入)"""
+        index = self.source_filter.findText(source)
+        if index < 0:
+            self.source_filter.addItem(source, [source]); index = self.source_filter.count() - 1
+        self.source_filter.setCurrentIndex(index)
+
+    def log(self, message, severity='info', source='', ts=None):
+        return self.store.append(message, severity, source, ts)
@@ -0,0 +1,154 @@
+# pages/widgets/line_tile_grid.py
+"""
+控制室大屏用的产线瓦片网格。
+
+整个网格只有一个视口控件，所有产线瓦片都在 paintEvent 中直接绘制 (没有子控件、不使用样式表)；
+每块瓦片的显示内容先归约为一个小元组，只有元组变化的瓦片才会对其所在矩形发起重绘，
+绘制时也只遍历与重绘区域相交的行。默认自动选择列数，让全部产线刚好铺满视口；
+瓦片小于 MIN_TILE_WIDTH 时改为固定宽度并出现竖向滚动条。
+"""
+import math
+import time
+from PyQt5.QtWidgets import QAbstractScrollArea, QToolTip
+from PyQt5.QtCore import Qt, QRectF, QEvent, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen
+
+STATUS_COLORS = {'running': QColor('#4CAF50'), 'idle': QColor('#FFA000'), 'fault': QColor('#D32F2F'),
+                 'call': QColor('#FDD835'), 'offline': QColor('#9E9E9E')}
+STATUS_LABELS = {'running': '运行', 'idle': '待机', 'fault': '故障', 'call': '呼叫', 'offline': '离线'}
+SPACING = 6
+MIN_TILE_WIDTH = 170
+ASPECT = 1.8   # 瓦片宽高比
+
+class LineTileGrid(QAbstractScrollArea):
+    line_activated = pyqtSignal(str)   # 双击瓦片
+
+    def __init__(self, lines, parent=None):
+        super().__init__(parent)
+        self.lines = list(lines)
+        self._states = [None] * len(self.lines)
+        self._tooltips = [''] * len(self.lines)
+        self._cols, self._tile_w, self._tile_h = 1, MIN_TILE_WIDTH, MIN_TILE_WIDTH / ASPECT
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.viewport().setAttribute(Qt.WA_OpaquePaintEvent)
+        self._background = QColor('#ECEFF1'); self._tile_brush = QColor('#FFFFFF'); self._fault_brush = QColor('#FFEBEE')
+        self._border = QPen(QColor('#CFD8DC')); self._text = QPen(QColor('#212121')); self._muted = QPen(QColor('#607D8B'))
+        self._track = QColor('#E0E0E0')
+        self._relayout()
+
+    # ---------------- 数据 ----------------
+    def set_line(self, index, line_data):
+        """line_data 与 LineMonitor.update_data 的参数相同；显示内容不变时不重绘"""
+        stats = line_data.get('stats') or {}
+        estimate = line_data.get('eta')
+        eta = '--:--'
+        if estimate and not math.isinf(estimate['eta']): eta = time.strftime('%H:%M', time.localtime(estimate['eta']))
+        oee = line_data.get('oee')
+        oee = f"{oee['oee']:.0%}" if oee and oee['planned_time'] > 0 else '--'
+        state = (line_data['status'], line_data['wo_id'], int(line_data['progress']),
+                 round(line_data['cycle_time'], 1), round(line_data.get('takt_time', 0.0), 1), eta, oee)
+        if stats.get('count'):
+            self._tooltips[index] = (f"{self.lines[index]}  工单 {line_data['wo_id']}\n"
+                                     f"P50 {stats['p50']:.1f}s | P95 {stats['p95']:.1f}s | 节拍达成率 {stats['takt_compliance']:.0%}")
+        if state == self._states[index]: return
+        self._states[index] = state
+        self.viewport().update(self._tile_rect(index).toAlignedRect())
+
+    def state(self, index):
+        return self._states[index]
+
+    # ---------------- 布局 ----------------
+    def _relayout(self):
+        n = max(1, len(self.lines)); vw = max(1, self.viewport().width()); vh = max(1, self.viewport().height())
+        best = None
+        for cols in range(1, n + 1):
+            rows = math.ceil(n / cols)
+            w = (vw - (cols + 1) * SPACING) / cols; h = (vh - (rows + 1) * SPACING) / rows
+            tile_w = min(w, h * ASPECT)
+            if best is None or tile_w > best[1]: best = (cols, tile_w)
+        cols, tile_w = best
+        if tile_w < MIN_TILE_WIDTH:
+            cols = max(1, int((vw - SPACING) // (MIN_TILE_WIDTH + SPACING)))
+            tile_w = (vw - (cols + 1) * SPACING) / cols
+        self._cols, self._tile_w, self._tile_h = cols, tile_w, tile_w / ASPECT
+        rows = math.ceil(n / cols)
+        content_h = rows * (self._tile_h + SPACING) + SPACING
+        self.verticalScrollBar().setRange(0, max(0, int(content_h - vh)))
+        self.verticalScrollBar().setPageStep(vh); self.verticalScrollBar().setSingleStep(int(self._tile_h / 2) or 1)
+        # 字号随瓦片高度缩放
+        self._title_font = QFont(); self._title_font.setBold(True); self._title_font.setPixelSize(max(9, int(self._tile_h * 0.16)))
+        self._body_font = QFont(); self._body_font.setPixelSize(max(8, int(self._tile_h * 0.12)))
+
+    def _tile_rect(self, index):
+        row, col = divmod(index, self._cols)
+        x = SPACING + col * (self._tile_w + SPACING)
+        y = SPACING + row * (self._tile_h + SPACING) - self.verticalScrollBar().value()
+        return QRectF(x, y, self._tile_w, self._tile_h)
+
+    def index_at(self, pos):
+        row = int((pos.y() + self.verticalScrollBar().value() - SPACING) // (self._tile_h + SPACING))
+        col = int((pos.x() - SPACING) // (self._tile_w + SPACING))
+        if row < 0 or not 0 <= col < self._cols: return -1
+        index = row * self._cols + col
+        return index if index < len(self.lines) and self._tile_rect(index).contains(pos) else -1
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event); self._relayout(); self.viewport().update()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    # ---------------- 绘制 ----------------
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        dirty = event.rect()
+        painter.fillRect(dirty, self._background)
+        offset = self.verticalScrollBar().value(); pitch = self._tile_h + SPACING
+        first_row = max(0, int((dirty.top() + offset - SPACING) // pitch))
+        last_row = int((dirty.bottom() + offset) // pitch)
+        for index in range(first_row * self._cols, min(len(self.lines), (last_row + 1) * self._cols)):
+            rect = self._tile_rect(index)
+            if rect.intersects(QRectF(dirty)): self._paint_tile(painter, rect, self.lines[index], self._states[index])
+
+    def _paint_tile(self, painter, rect, name, state):
+        status, wo_id, progress, cycle, takt, eta, oee = state or ('offline', 'N/A', 0, 0.0, 0.0, '--:--', '--')
+        color = STATUS_COLORS.get(status, STATUS_COLORS['offline'])
+        painter.fillRect(rect, self._fault_brush if status == 'fault' else self._tile_brush)
+        painter.setPen(self._border); painter.drawRect(rect)
+        painter.fillRect(QRectF(rect.left(), rect.top(), max(4.0, rect.width() * 0.03), rect.height()), color)
+
+        pad = rect.height() * 0.08; left = rect.left() + max(4.0, rect.width() * 0.03) + pad
+        inner = QRectF(left, rect.top() + pad, rect.right() - pad - left, rect.height() - 2 * pad)
+        row_h = inner.height() / 4
+        painter.setFont(self._title_font); painter.setPen(self._text)
+        painter.drawText(QRectF(inner.left(), inner.top(), inner.width(), row_h), Qt.AlignLeft | Qt.AlignVCenter, name)
+        painter.setPen(QPen(color.darker(130)))
+        painter.drawText(QRectF(inner.left(), inner.top(), inner.width(), row_h), Qt.AlignRight | Qt.AlignVCenter, STATUS_LABELS.get(status, status))
+
+        painter.setFont(self._body_font); painter.setPen(self._muted)
+        painter.drawText(QRectF(inner.left(), inner.top() + row_h, inner.width(), row_h), Qt.AlignLeft | Qt.AlignVCenter, wo_id)
+        painter.drawText(QRectF(inner.left(), inner.top() + row_h, inner.width(), row_h), Qt.AlignRight | Qt.AlignVCenter, f"{progress}%  OEE {oee}")
+
+        bar = QRectF(inner.left(), inner.top() + row_h * 2 + row_h * 0.3, inner.width(), row_h * 0.4)
+        painter.fillRect(bar, self._track)
+        painter.fillRect(QRectF(bar.left(), bar.top(), bar.width() * min(100, max(0, progress)) / 100, bar.height()), color)
+
+        # 周期对比节拍: 达标绿色，超 20% 以内黄色，否则红色
+        ratio = cycle / takt if takt else 0
+        pace = STATUS_COLORS['running'] if ratio <= 1.05 else STATUS_COLORS['idle'] if ratio <= 1.2 else STATUS_COLORS['fault']
+        bottom = QRectF(inner.left(), inner.top() + row_h * 3, inner.width(), row_h)
+        painter.setPen(QPen(pace.darker(120))); painter.drawText(bottom, Qt.AlignLeft | Qt.AlignVCenter, f"{cycle:.1f}/{takt:.0f}s")
+        painter.setPen(self._text); painter.drawText(bottom, Qt.AlignRight | Qt.AlignVCenter, f"ETA {eta}")
+
+    # ---------------- 交互 ----------------
+    def mouseDoubleClickEvent(self, event):
+        index = self.index_at(event.pos())
+        if index >= 0: self.line_activated.emit(self.lines[index])
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.ToolTip:
+            index = self.index_at(event.pos())
+            if index >= 0 and self._tooltips[index]: QToolTip.showText(event.globalPos(), self._tooltips[index], self.viewport())
+            else: QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
@@ -3,6 +3,8 @@ from PyQt5.QtWidgets import QWidget
 from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QPolygonF
 from PyQt5.QtCore import Qt, QPointF, QRectF
 
+from .paint_cache import static_layer, draw_layer, widget_scale
+
 # --- 核心修正点 1: 确保 PacingGauge 类被正确定义 ---
 class PacingGauge(QWidget):
     """一个用于显示节拍/周期对比的仪表盘控件"""
@@ -18,15 +20,14 @@ class PacingGauge(QWidget):
         self.value = min(1, max(0, self.value))
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        side = min(self.width(), self.height())
-        painter.translate(self.width() / 2, self.height() / 1.2)
+    def _transform(self, painter, width, height):
+        side = min(width, height)
+        painter.translate(width / 2, height / 1.2)
         painter.scale(side / 250.0, side / 250.0)
-        
-        painter.save()
+
+    def _paint_scale(self, painter, width, height):
+        """静态部分: 三段色弧，只在尺寸/像素比变化时重新渲染"""
+        self._transform(painter, width, height)
         pen = QPen(); pen.setWidth(20)
         
         pen.setColor(QColor("#D32F2F")); painter.setPen(pen)
@@ -37,8 +38,16 @@ class PacingGauge(QWidget):
 
         pen.setColor(QColor("#4CAF50")); painter.setPen(pen)
         painter.drawArc(-100, -100, 200, 200, -120 * 16, -60 * 16) # Green
-        painter.restore()
-        
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = QRectF(self.rect()); width, height = self.width(), self.height()
+        draw_layer(painter, rect, static_layer("PacingGauge", rect, widget_scale(self),
+                                               lambda p: self._paint_scale(p, width, height)))
+
+        # 动态部分: 指针与中心轴
+        painter.setRenderHint(QPainter.Antialiasing)
+        self._transform(painter, width, height)
         painter.save()
         pen = QPen(Qt.white, 4); painter.setPen(pen)
         painter.setBrush(Qt.white)
@@ -52,4 +61,4 @@ class PacingGauge(QWidget):
         painter.restore()
         
         painter.setBrush(QColor("#37474F"))
-        painter.drawEllipse(-15, -15, 30, 30)
\ No newline at end of file
+        painter.drawEllipse(-15, -15, 30, 30)
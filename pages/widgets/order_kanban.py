@@ -0,0 +1,229 @@
+# pages/widgets/order_kanban.py
+"""
+订单看板的 模型/视图 实现。
+
+    OrderListModel  订单仓库的共享列表模型 (订单 id -> 行号 索引)，按仓库的变更通知只发出对应行的信号:
+                    少量修改按连续行段逐段 dataChanged，批量修改 (超过 RESET_ROWS 行) 直接重置模型
+    LaneProxy       每个泳道一个代理: 自己维护本泳道的有序 (排序键, 订单 id) 列表，按 优先级 (降序) + 交期 (升序) 排列，
+                    某行状态改变只会让它从一个泳道移除、插入另一个泳道；源模型重置时在 Python 中一次排序重建
+    OrderKanban     若干泳道 (QListView + OrderCardDelegate)，支持在泳道之间拖放改变状态
+筛选与排序直接读取源模型的订单与排序键，不经由 data() 逐行回调 (QSortFilterProxyModel 重新筛选/排序 5000 行需数百毫秒)。
+"""
+from bisect import bisect_left
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QGroupBox, QListView, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractListModel, QAbstractProxyModel, QModelIndex, QVariant, QMimeData, pyqtSignal
+
+from widgets.order_card import ORDER_ROLE, OrderCardDelegate
+from services.order_repository import ADDED, UPDATED, REMOVED
+
+ID_ROLE = Qt.UserRole + 1
+STATUS_ROLE = Qt.UserRole + 2
+SORT_ROLE = Qt.UserRole + 3
+ORDER_MIME = 'application/x-mes-order-ids'
+RESET_ROWS = 128    # 一次修改超过这么多行时重置模型，泳道整体重建比逐行移动更快
+
+def sort_key(order):
+    """优先级高的在前，同优先级交期早的在前 (降序排序用)"""
+    return int(order.get('priority', 0)) * 1000000 - order['due_date'].toordinal()
+
+
+class OrderListModel(QAbstractListModel):
+    """订单仓库 (services/order_repository.py) 的列表视图，监听仓库的变更通知，只插入/删除/刷新受影响的行"""
+    def __init__(self, repository, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self._orders = list(repository)
+        self._keys = [sort_key(order) for order in self._orders]    # 排序键随订单修改更新，代理排序时直接取用
+        self._rows = {order['id']: row for row, order in enumerate(self._orders)}
+        repository.add_listener(self._on_repository_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._orders)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return QVariant()
+        row = index.row()
+        if role == SORT_ROLE: return self._keys[row]
+        if role == STATUS_ROLE: return self._orders[row]['status']
+        if role == ORDER_ROLE: return self._orders[row]
+        if role in (Qt.DisplayRole, ID_ROLE): return self._orders[row]['id']
+        return QVariant()
+
+    def order_at(self, row): return self._orders[row]
+    def key_at(self, row): return self._keys[row]
+    def row_of(self, order_id): return self._rows[order_id]
+    def keyed_orders(self): return zip(self._keys, self._orders)
+
+    def flags(self, index):
+        if not index.isValid(): return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemNeverHasChildren
+
+    # ---------------- 仓库变更 ----------------
+    def _on_repository_changed(self, event, ids):
+        if event == ADDED:
+            row = len(self._orders)
+            self.beginInsertRows(QModelIndex(), row, row + len(ids) - 1)
+            for order_id in ids:
+                order = self.repository.get(order_id)
+                self._rows[order_id] = len(self._orders); self._orders.append(order); self._keys.append(sort_key(order))
+            self.endInsertRows()
+        elif event == UPDATED:
+            rows = sorted({self._rows[order_id] for order_id in ids if order_id in self._rows})
+            if not rows: return
+            if len(rows) > RESET_ROWS:
+                self.beginResetModel()
+                for row in rows: self._keys[row] = sort_key(self._orders[row])
+                self.endResetModel(); return
+            for row in rows: self._keys[row] = sort_key(self._orders[row])
+            # 按连续行段发出 dataChanged，避免一个大范围让泳道把中间未修改的行也重新检查一遍
+            start = previous = rows[0]
+            for row in rows[1:]:
+                if row != previous + 1:
+                    self.dataChanged.emit(self.index(start), self.index(previous)); start = row
+                previous = row
+            self.dataChanged.emit(self.index(start), self.index(previous))
+        elif event == REMOVED:
+            for order_id in ids:
+                row = self._rows.pop(order_id, None)
+                if row is None: continue
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._orders[row]; del self._keys[row]
+                for later in self._orders[row:]: self._rows[later['id']] -= 1
+                self.endRemoveRows()
+
+    # ---------------- 拖放 (只携带订单 id) ----------------
+    def mimeTypes(self):
+        return [ORDER_MIME]
+
+    def mimeData(self, indexes):
+        data = QMimeData()
+        data.setData(ORDER_MIME, "\n".join(self._orders[i.row()]['id'] for i in indexes if i.isValid()).encode())
+        return data
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        # 拖放到其他泳道后视图会尝试删除源行；订单只是改变了状态，因此忽略
+        return False
+
+
+class LaneProxy(QAbstractProxyModel):
+    """一个泳道: 源模型中状态为 status 的订单，按排序键降序排列 (_entries 为升序的 (-排序键, 订单 id) 列表)"""
+    def __init__(self, status, parent=None):
+        super().__init__(parent)
+        self.status = status
+        self._entries = []; self._entry_of = {}    # 订单 id -> 它在 _entries 中的条目
+
+    def setSourceModel(self, model):
+        old = self.sourceModel()
+        if old is not None:
+            old.dataChanged.disconnect(self._on_data_changed); old.rowsInserted.disconnect(self._on_rows_inserted)
+            old.rowsAboutToBeRemoved.disconnect(self._on_rows_removed); old.modelReset.disconnect(self._rebuild)
+        super().setSourceModel(model)
+        model.dataChanged.connect(self._on_data_changed); model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_removed); model.modelReset.connect(self._rebuild)
+        self._rebuild()
+
+    # ---------------- 代理映射 ----------------
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < len(self._entries): return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def mapToSource(self, index):
+        if not index.isValid() or self.sourceModel() is None: return QModelIndex()
+        source = self.sourceModel()
+        return source.index(source.row_of(self._entries[index.row()][1]))
+
+    def mapFromSource(self, index):
+        if not index.isValid(): return QModelIndex()
+        entry = self._entry_of.get(self.sourceModel().order_at(index.row())['id'])
+        return QModelIndex() if entry is None else self.createIndex(bisect_left(self._entries, entry), 0)
+
+    # ---------------- 源模型变更 ----------------
+    def _entry(self, row):
+        """源模型第 row 行在本泳道中应有的条目，不属于本泳道时为 None"""
+        source = self.sourceModel(); order = source.order_at(row)
+        return (-source.key_at(row), order['id']) if order['status'] == self.status else None
+
+    def _rebuild(self):
+        self.beginResetModel()
+        self._entries = sorted((-key, order['id']) for key, order in self.sourceModel().keyed_orders()
+                               if order['status'] == self.status)
+        self._entry_of = {entry[1]: entry for entry in self._entries}
+        self.endResetModel()
+
+    def _remove(self, entry):
+        position = bisect_left(self._entries, entry)
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._entries[position]; del self._entry_of[entry[1]]
+        self.endRemoveRows()
+
+    def _insert(self, entry):
+        position = bisect_left(self._entries, entry)
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._entries.insert(position, entry); self._entry_of[entry[1]] = entry
+        self.endInsertRows()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            entry = self._entry(row); old = self._entry_of.get(self.sourceModel().order_at(row)['id'])
+            if entry is not None and entry == old:
+                index = self.createIndex(bisect_left(self._entries, entry), 0); self.dataChanged.emit(index, index)
+                continue
+            if old is not None: self._remove(old)
+            if entry is not None: self._insert(entry)
+
+    def _on_rows_inserted(self, parent, first, last):
+        for row in range(first, last + 1):
+            entry = self._entry(row)
+            if entry is not None: self._insert(entry)
+
+    def _on_rows_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            old = self._entry_of.get(self.sourceModel().order_at(row)['id'])
+            if old is not None: self._remove(old)
+
+    def dropMimeData(self, data, action, row, column, parent):
+        """放入本泳道 = 把这些订单的状态改为本泳道的状态 (位置由排序决定)"""
+        if not data.hasFormat(ORDER_MIME): return False
+        order_ids = [order_id for order_id in bytes(data.data(ORDER_MIME)).decode().split("\n") if order_id]
+        self.sourceModel().repository.set_status(order_ids, self.status)
+        return True
+
+
+class OrderKanban(QWidget):
+    """lanes: [(状态, 标题), ...]；泳道标题显示订单数"""
+    context_menu_requested = pyqtSignal(str, object)   # 订单 id, 全局坐标
+
+    def __init__(self, model, lanes, parent=None):
+        super().__init__(parent)
+        self.model = model; self.delegate = OrderCardDelegate(self)
+        self.delegate.request_context_menu.connect(self.context_menu_requested)
+        self.proxies = {}; self.views = {}; self._boxes = {}
+        layout = QHBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0)
+        for status, title in lanes:
+            proxy = LaneProxy(status, self); proxy.setSourceModel(model)
+            box = QGroupBox(title); box_layout = QVBoxLayout(box)
+            view = QListView(); view.setModel(proxy); view.setItemDelegate(self.delegate)
+            view.setUniformItemSizes(True)    # 定高卡片，滚动时无需逐行测量
+            view.setDragDropMode(QAbstractItemView.DragDrop); view.setDefaultDropAction(Qt.MoveAction)
+            view.setSelectionMode(QAbstractItemView.SingleSelection)
+            for signal in (proxy.rowsInserted, proxy.rowsRemoved, proxy.modelReset):
+                signal.connect(lambda *args, status=status: self._update_title(status))
+            box_layout.addWidget(view); layout.addWidget(box)
+            self.proxies[status] = proxy; self.views[status] = view; self._boxes[status] = (box, title)
+            self._update_title(status)
+
+    def _update_title(self, status):
+        box, title = self._boxes[status]
+        box.setTitle(f"{title} ({self.proxies[status].rowCount()})")
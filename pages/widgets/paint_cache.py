@@ -0,0 +1,55 @@
+# pages/widgets/paint_cache.py
+"""
+自绘控件的静态图层缓存。
+
+仪表盘刻度弧、环形图底环、雷达图网格这类内容只和尺寸/样式有关，
+第一次绘制时渲染到 QPixmap (按物理像素分辨率)，之后每帧只贴图，再画指针/数值等动态部分。
+缓存放在全局 QPixmapCache 中 (LRU，有容量上限)，键包含样式、逻辑尺寸和缩放倍数:
+尺寸或设备像素比变化后自然换新键，旧图层随 LRU 淘汰；同尺寸同样式的多个控件共用一张图。
+"""
+import math
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QPixmap, QPixmapCache, QPainter
+
+CACHE_LIMIT_KB = 32 * 1024
+MAX_ITEM_ZOOM = 4.0     # 图元图层最多按视图放大 4 倍渲染，再放大时贴图拉伸 (位图大小有上限)
+
+def static_layer(key, rect, scale, render):
+    """
+    返回 key 对应的静态图层。
+    rect:   图层覆盖的逻辑坐标矩形
+    scale:  逻辑单位 -> 物理像素的倍数 (控件用 widget_scale，图元用 item_scale)
+    render: render(painter)，在逻辑坐标中绘制静态内容
+    """
+    if QPixmapCache.cacheLimit() < CACHE_LIMIT_KB: QPixmapCache.setCacheLimit(CACHE_LIMIT_KB)
+    scale = round(scale, 3)
+    cache_key = f"{key}|{rect.x():.1f},{rect.y():.1f},{rect.width():.1f}x{rect.height():.1f}@{scale}"
+    pixmap = QPixmapCache.find(cache_key)
+    if pixmap is None:
+        pixmap = QPixmap(max(1, math.ceil(rect.width() * scale)), max(1, math.ceil(rect.height() * scale)))
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(scale, scale); painter.translate(-rect.x(), -rect.y())
+        render(painter)
+        painter.end()
+        QPixmapCache.insert(cache_key, pixmap)
+    return pixmap
+
+def draw_layer(painter, rect, pixmap):
+    """把图层按逻辑矩形贴回去 (源矩形为整张位图，因此不依赖 setDevicePixelRatio)"""
+    painter.drawPixmap(QRectF(rect), pixmap, QRectF(pixmap.rect()))
+
+def widget_scale(widget):
+    return widget.devicePixelRatioF()
+
+def item_scale(painter):
+    """
+    QGraphicsItem.paint 中: 图元坐标到物理像素的倍数 (视图缩放 x 设备像素比)。
+    视图缩放向上取到 2 的整数次幂并限制在 MAX_ITEM_ZOOM 以内: 鼠标连续缩放时不会每一步都生成新键，
+    放得再大位图也不超过 图层尺寸 x MAX_ITEM_ZOOM x 设备像素比。
+    """
+    t = painter.worldTransform()
+    zoom = max(math.hypot(t.m11(), t.m12()), math.hypot(t.m21(), t.m22()))
+    zoom = min(2.0 ** math.ceil(math.log2(zoom)), MAX_ITEM_ZOOM) if zoom > 0 else 1.0
+    return zoom * painter.device().devicePixelRatioF()
@@ -2,15 +2,18 @@
 import random
 
 class HeuristicScheduler:
-    def __init__(self, orders, resources, setup_time=1):
+    def __init__(self, orders, resources, setup_time=1, busy_until=None):
         """
         :param orders: list of order dicts, sorted by priority
         :param resources: dict of resource info, e.g., {'Line A': {'specs': ['5mm']}}
         :param setup_time: hours needed for changing specs
+        :param busy_until: frozen horizon, hours from now until each line finishes its running work order,
+                           e.g. {'Line A': 1.5} (来自 ETA 预测)；新订单不会排在冻结区内
         """
         self.orders = sorted(orders, key=lambda o: o.get('priority', 0), reverse=True)
         self.resources = resources
         self.setup_time = setup_time
+        self.busy_until = busy_until or {}
         self.schedule = {res: [] for res in resources} # {line: [{'order':..., 'start':..., 'end':...}]}
 
     def run(self):
@@ -26,7 +29,7 @@ class HeuristicScheduler:
                     continue
                 
                 # 2. 寻找最早可开始时间
-                last_task_end = 0
+                last_task_end = self.busy_until.get(line_name, 0)
                 last_spec = None
                 if self.schedule[line_name]:
                     last_task = self.schedule[line_name][-1]
@@ -0,0 +1,182 @@
+# report_cli.py
+"""
+批量报表命令行 (无界面，供 cron 夜间运行)。
+
+    python report_cli.py --lines 40 --days 30               # 截至昨天的 30 天，输出到 reports/<日期>/
+    python report_cli.py --end 2026-10-18 --jobs 8 --no-png
+
+报表按 产线 / 产品 / 周期 拆成互相独立的任务，由进程池并行执行:
+    line/<产线>.csv|png        该产线按日的产量、合格率与 OEE 组成
+    product/<产品>.csv|png     该产品按日的产量与合格率
+    period/<day|week|month>.csv|png   全厂按周期的产量与 OEE
+计算与报表页面共用 services/report_builder.py 与 OEE 引擎；数据和界面一样来自模拟源，
+随机种子默认取结束日期，同一天重跑结果相同。每个产线任务在自己的进程里回放该产线的 OEE 历史并返回按日合计，
+周期报表需要全部产线的合计，因此在产线任务全部完成后再提交。
+PNG 用 QPainter 画在 QImage 上 (offscreen 平台的 QGuiApplication，不创建窗口)。
+"""
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from device_simulator import LINE_COUNT, LINE_TAKT, LINE_STATIONS, STATION_KINDS, make_line_names, seed_oee_history
+from services.oee_engine import OEE_TOTALS, OeeEngine, oee_from_totals
+from services.report_dataset import ReportDataset, VALUE_COLUMNS
+from services.report_builder import PERIODS, mock_production_dataset, daily_summary, period_starts
+
+# --- 配置 ---
+DEFAULT_TAKT = 10.0         # 未配置节拍的产线 (与 LINE_TAKT 的默认值一致)
+PRODUCTION_HEADER = ["计划产量(米)", "实际产量(米)", "不良(米)", "停机(h)", "合格率(%)"]
+OEE_HEADER = ["计划运行(h)", "故障停机(h)", "时间开动率", "性能开动率", "合格品率", "OEE"]
+CHART_SIZE = (960, 420)
+
+_gui = None
+
+def _init_worker(png):
+    """进程池初始化: 需要画图时创建 offscreen 的 QGuiApplication (每个进程一个)"""
+    global _gui
+    if not png: return
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtGui import QGuiApplication
+    _gui = QGuiApplication.instance() or QGuiApplication([])
+
+def _output_device(line):
+    """产线的出料工位 (与 device_simulator.LINE_STATIONS 的命名一致)"""
+    return LINE_STATIONS.get(line, (f"{STATION_KINDS[-1]} {line.split(' ', 1)[1]}",))[-1]
+
+def _file_name(name):
+    return "".join('_' if c in '/\\:' else c for c in name)
+
+# ---------------- 输出 ----------------
+def _production_columns(summary):
+    return [np.char.mod('%.2f', summary[name]).tolist() for name in VALUE_COLUMNS] + [np.char.mod('%.2f', summary['quality_rate']).tolist()]
+
+def _oee_columns(oee):
+    return [np.char.mod('%.2f', oee['planned_time'] / 3600).tolist(), np.char.mod('%.2f', oee['fault_time'] / 3600).tolist()] + \
+           [np.char.mod('%.4f', oee[name]).tolist() for name in ('availability', 'performance', 'quality', 'oee')]
+
+def _write_csv(path, header, columns):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as stream:    # utf-8-sig 让 Excel 正确识别中文
+        writer = csv.writer(stream); writer.writerow(header); writer.writerows(zip(*columns))
+
+def _render_bars(path, title, labels, values, unit=''):
+    """简单柱状图: 标题、纵轴最大值、隔若干个标注的横轴标签"""
+    from PyQt5.QtCore import Qt, QRectF
+    from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+    width, height = CHART_SIZE; left, right, top, bottom = 70, 20, 40, 50
+    image = QImage(width, height, QImage.Format_RGB32); image.fill(QColor("#FFFFFF"))
+    painter = QPainter(image); painter.setRenderHint(QPainter.Antialiasing)
+    painter.setFont(QFont("Sans", 12, QFont.Bold)); painter.drawText(QRectF(0, 6, width, 28), Qt.AlignCenter, title)
+    painter.setFont(QFont("Sans", 8))
+    plot_w, plot_h = width - left - right, height - top - bottom
+    painter.setPen(QColor("#888888")); painter.drawLine(left, top + plot_h, left + plot_w, top + plot_h); painter.drawLine(left, top, left, top + plot_h)
+    values = np.asarray(values, dtype=np.float64); peak = float(values.max()) if len(values) and values.max() > 0 else 1.0
+    painter.drawText(QRectF(0, top - 8, left - 6, 16), Qt.AlignRight | Qt.AlignVCenter, f"{peak:,.1f}{unit}")
+    painter.drawText(QRectF(0, top + plot_h - 8, left - 6, 16), Qt.AlignRight | Qt.AlignVCenter, "0")
+    if len(values):
+        slot = plot_w / len(values); step = max(1, int(np.ceil(len(values) * 70 / plot_w)))
+        painter.setPen(Qt.NoPen); painter.setBrush(QColor("#00BCD4"))
+        for i, value in enumerate(values):
+            bar = plot_h * max(0.0, value) / peak
+            painter.drawRect(QRectF(left + i * slot + slot * 0.15, top + plot_h - bar, slot * 0.7, bar))
+        painter.setPen(QColor("#333333"))
+        for i in range(0, len(values), step):
+            painter.drawText(QRectF(left + i * slot - 35 + slot / 2, top + plot_h + 6, 70, 16), Qt.AlignCenter, str(labels[i]))
+    painter.end()
+    image.save(path, "PNG")
+
+# ---------------- 任务 (在子进程中执行) ----------------
+def line_report(line, columns, categories, start, end, seed, out, png):
+    """回放该产线 [start, end] 的 OEE 历史，写出按日报表；返回 (产线, 按日 OEE 合计)"""
+    random.seed(f"{seed}:{line}")
+    device = _output_device(line); engine = OeeEngine({device: LINE_TAKT.get(line, DEFAULT_TAKT)})
+    days = (end - start).days + 1
+    edges = np.array([datetime.combine(start + timedelta(days=i), datetime.min.time()).timestamp() for i in range(days + 1)])
+    seed_oee_history(engine, {line: device}, edges[-1], days)
+    oee = engine.series(device, edges)
+
+    dates = np.datetime64(start, 'D') + np.arange(days)
+    production_dates, sums = ReportDataset(columns, categories).group_by_date()
+    slots = (production_dates - dates[0]).astype(np.int64)
+    aligned = {name: np.zeros(days) for name in VALUE_COLUMNS}
+    for name in VALUE_COLUMNS: aligned[name][slots] = sums[name]
+    summary = daily_summary(dates, aligned)
+
+    path = os.path.join(out, 'line', _file_name(line))
+    _write_csv(path + '.csv', ["日期"] + PRODUCTION_HEADER + OEE_HEADER,
+               [np.datetime_as_string(dates).tolist()] + _production_columns(summary) + _oee_columns(oee))
+    if png: _render_bars(path + '.png', f"{line} 日 OEE (%)", np.datetime_as_string(dates).tolist(), oee['oee'] * 100, '%')
+    return line, {name: oee[name] for name in OEE_TOTALS}
+
+def product_report(product, columns, categories, out, png):
+    dates, sums = ReportDataset(columns, categories).group_by_date()
+    summary = daily_summary(dates, sums)
+    path = os.path.join(out, 'product', _file_name(product))
+    _write_csv(path + '.csv', ["日期"] + PRODUCTION_HEADER, [np.datetime_as_string(dates).tolist()] + _production_columns(summary))
+    if png: _render_bars(path + '.png', f"{product} 日产量 (米)", np.datetime_as_string(dates).tolist(), summary['actual_output'])
+    return product
+
+def period_report(period, dates, sums, oee_totals, out, png):
+    """dates: 每日日期；sums/oee_totals: 全厂按日合计，按 period 再分组"""
+    starts, groups = np.unique(period_starts(dates, period), return_inverse=True)
+    grouped = {name: np.bincount(groups, weights=values, minlength=len(starts)) for name, values in sums.items()}
+    oee = oee_from_totals({name: np.bincount(groups, weights=values, minlength=len(starts)) for name, values in oee_totals.items()})
+    summary = daily_summary(starts, grouped)
+    labels = np.datetime_as_string(starts if period != 'month' else starts.astype('datetime64[M]')).tolist()
+    path = os.path.join(out, 'period', period)
+    _write_csv(path + '.csv', ["周期"] + PRODUCTION_HEADER + OEE_HEADER, [labels] + _production_columns(summary) + _oee_columns(oee))
+    if png: _render_bars(path + '.png', f"全厂 OEE (%) - {period}", labels, oee['oee'] * 100, '%')
+    return period
+
+# ---------------- 调度 ----------------
+def _subset(dataset, key, code):
+    mask = dataset[key] == code
+    return {name: array[mask] for name, array in dataset.columns.items()}
+
+def run(lines, start, end, out, jobs, png, seed):
+    days = (end - start).days + 1
+    dataset = mock_production_dataset(lines, days, end, np.random.default_rng(seed))
+    for folder in ('line', 'product', 'period'): os.makedirs(os.path.join(out, folder), exist_ok=True)
+    written = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(png,)) as pool:
+        line_jobs = [pool.submit(line_report, line, _subset(dataset, 'line', code), dataset.categories, start, end, seed, out, png)
+                     for code, line in enumerate(lines)]
+        other_jobs = [pool.submit(product_report, product, _subset(dataset, 'product', code), dataset.categories, out, png)
+                      for code, product in enumerate(dataset.categories['product'])]
+        oee_totals = {name: np.zeros(days) for name in OEE_TOTALS}
+        for job in as_completed(line_jobs):
+            line, totals = job.result(); written += 1
+            for name in OEE_TOTALS: oee_totals[name] += totals[name]
+            print(f"[{written}/{len(lines)}] {line}")
+        dates, sums = dataset.group_by_date()
+        other_jobs += [pool.submit(period_report, period, dates, sums, oee_totals, out, png) for period in PERIODS]
+        for job in as_completed(other_jobs): job.result(); written += 1
+    return written
+
+def main(argv=None):
+    yesterday = date.today() - timedelta(days=1)
+    parser = argparse.ArgumentParser(description="批量生成产线/产品/周期报表 (CSV 与 PNG)")
+    parser.add_argument('--lines', type=int, default=LINE_COUNT, help="产线数量 (Line A, Line B ...)")
+    parser.add_argument('--days', type=int, default=30, help="报表覆盖的天数 (含结束日)")
+    parser.add_argument('--end', type=date.fromisoformat, default=yesterday, help="结束日期 YYYY-MM-DD，默认昨天")
+    parser.add_argument('--out', default=None, help="输出目录，默认 reports/<结束日期>")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="并行进程数")
+    parser.add_argument('--seed', type=int, default=None, help="模拟数据的随机种子，默认取结束日期")
+    parser.add_argument('--no-png', action='store_true', help="只输出 CSV")
+    args = parser.parse_args(argv)
+
+    start = args.end - timedelta(days=args.days - 1)
+    out = args.out or os.path.join('reports', args.end.isoformat())
+    seed = args.seed if args.seed is not None else int(args.end.strftime('%Y%m%d'))
+    started = time.time()
+    count = run(make_line_names(args.lines), start, args.end, out, max(1, args.jobs), not args.no_png, seed)
+    print(f"完成: {count} 组报表 ({start} 至 {args.end})，用时 {time.time() - started:.1f} 秒 -> {out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
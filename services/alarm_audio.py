@@ -0,0 +1,117 @@
+# services/alarm_audio.py
+"""
+报警声音服务。
+
+整个程序只有一个常驻的播放线程: 声音文件在首次使用时读入内存，Windows 下之后不再访问磁盘
+(其它平台的 playsound 只接受文件路径，每次播放仍会由它重新读取文件)；
+播放请求按优先级排队，同类报警在最小间隔内只响一次，排队中已有同类请求时直接合并。
+故障风暴时调用方只是往队列里放一个元组，不会创建新线程，也不会阻塞界面。
+"""
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import QThread
+from PyQt5.QtWidgets import QApplication
+
+ASSETS_DIR = "assets"
+# 报警类别 -> 声音文件，缺失的文件退回 alarm.wav
+SOUND_FILES = {'fault': 'alarm.wav', 'call': 'call.wav', 'warning': 'warning.wav'}
+DEFAULT_SOUND = 'alarm.wav'
+# 数字越小越先播放
+PRIORITIES = {'fault': 0, 'call': 1, 'warning': 2}
+# 同类报警两次播放的最小间隔 (秒)
+MIN_INTERVALS = {'fault': 5.0, 'call': 2.0, 'warning': 15.0}
+MAX_PENDING = 8
+
+_STOP = object()
+
+class AlarmAudioService(QThread):
+    def __init__(self, assets_dir=ASSETS_DIR, parent=None):
+        super().__init__(parent)
+        self.assets_dir = assets_dir
+        self._queue = queue.PriorityQueue(MAX_PENDING + 1)   # 多留一个位置给停止信号
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._last_played = {}   # 类别 -> 最近一次入队时间
+        self._pending = set()    # 已在队列中的类别
+        self._sounds = {}        # 类别 -> (路径, wav 字节)
+        self._player = self._select_player()
+
+    def _select_player(self):
+        """
+        Windows 下用 winsound 直接播放内存中的 wav；其它平台退回 playsound，
+        它没有内存播放接口，只能传路径，缓存的字节在这里仅用于判断文件是否可读。
+        """
+        if sys.platform == 'win32':
+            import winsound
+            return lambda path, data: winsound.PlaySound(data, winsound.SND_MEMORY)
+        try:
+            from playsound import playsound
+        except ImportError:
+            return None
+        return lambda path, data: playsound(path)
+
+    def _load(self, alarm_class):
+        """读取并缓存某类报警的声音，只在播放线程中调用"""
+        if alarm_class not in self._sounds:
+            path = os.path.join(self.assets_dir, SOUND_FILES.get(alarm_class, DEFAULT_SOUND))
+            if not os.path.exists(path): path = os.path.join(self.assets_dir, DEFAULT_SOUND)
+            data = None
+            try:
+                with open(path, 'rb') as f: data = f.read()
+            except OSError as e:
+                print(f"无法读取报警声音 {path}: {e}")
+            self._sounds[alarm_class] = (path, data)
+        return self._sounds[alarm_class]
+
+    def play(self, alarm_class='fault'):
+        """请求播放一次报警声音；返回是否真的入队 (被限流/合并时返回 False)"""
+        now = time.monotonic()
+        with self._lock:
+            if alarm_class in self._pending: return False
+            if now - self._last_played.get(alarm_class, float('-inf')) < MIN_INTERVALS.get(alarm_class, 5.0): return False
+            try:
+                self._queue.put_nowait((PRIORITIES.get(alarm_class, len(PRIORITIES)), next(self._seq), alarm_class))
+            except queue.Full:
+                return False
+            self._pending.add(alarm_class); self._last_played[alarm_class] = now
+        return True
+
+    def run(self):
+        while True:
+            _, _, alarm_class = self._queue.get()
+            if alarm_class is _STOP: break
+            with self._lock: self._pending.discard(alarm_class)
+            path, data = self._load(alarm_class)
+            if data is None or self._player is None: continue
+            try:
+                self._player(path, data)
+            except Exception as e:
+                print(f"无法播放声音: {e}")
+
+    def stop(self):
+        # 停止信号优先级最高，排在所有未播放的声音之前
+        self._queue.put((-1, next(self._seq), _STOP))
+        self.wait()
+
+
+_service = None
+
+def get_alarm_audio():
+    """进程内共享的报警声音服务，首次调用时启动，程序退出时停止"""
+    global _service
+    if _service is None:
+        _service = AlarmAudioService()
+        _service.start()
+        app = QApplication.instance()
+        if app is not None: app.aboutToQuit.connect(shutdown_alarm_audio)
+    return _service
+
+def shutdown_alarm_audio():
+    global _service
+    if _service is not None:
+        _service.stop(); _service = None
@@ -0,0 +1,132 @@
+# services/alarm_correlation.py
+"""
+报警风暴抑制与关联。
+
+同一来源、同一报警码在时间窗内重复出现只计数，不再产生通知；
+同一来源的其它报警码，以及沿因果拓扑 (上游 -> 下游，例如 挤出机 -> 牵引机 -> 切割机) 相连、且在时间窗内的报警，
+作为子报警归入同一个事件 (仍要记日志，但不再单独响铃)，事件以最上游的来源作为根因。结束时再给出汇总计数。
+
+process() 只查找当前来源、它的上游链路和直接下游 (拓扑深度/扇出都是常数)，
+过期检查使用按时间排序的队列，每条记录只入队出队一次，因此每个报警的处理是均摊 O(1)。
+"""
+from collections import deque
+import itertools
+
+# process() 返回的报警类别
+NEW_INCIDENT, RELATED, DUPLICATE = 'new', 'related', 'duplicate'
+
+def line_topology(line_stations, device_ids=None):
+    """
+    由产线工位 {产线: (工位, ...) 按物流顺序} 生成 {下游: 上游}: 首工位的上游是产线本身。
+    device_ids: {工位名: 设备编号}，报警来源用设备编号 (如 EXTRUDER-A) 上报时用它代替工位名。
+    """
+    device_ids = device_ids or {}
+    topology = {}
+    for line, stations in line_stations.items():
+        nodes = [line] + [device_ids.get(station, station) for station in stations]
+        for parent, child in zip(nodes, nodes[1:]): topology[child] = parent
+    return topology
+
+class Incident:
+    """一个关联后的父事件"""
+    _ids = itertools.count(1)
+
+    def __init__(self, ts, source, code, severity, message):
+        self.id = next(Incident._ids)
+        self.root_source = source
+        self.code = code
+        self.severity = severity
+        self.message = message
+        self.first_ts = self.last_ts = ts
+        self.count = 0
+        self.sources = {}   # 来源 -> 报警次数
+        self.alarms = {}    # (来源, 报警码) -> 报警次数
+        self.open = True
+        self.escalated = False  # 最近一条报警是否把事件从警告升级为故障
+
+    def add(self, ts, source, code, severity):
+        self.count += 1
+        self.sources[source] = self.sources.get(source, 0) + 1
+        self.alarms[(source, code)] = self.alarms.get((source, code), 0) + 1
+        self.last_ts = max(self.last_ts, ts)
+        self.escalated = self.count > 1 and severity == 'fault' and self.severity != 'fault'
+        if severity == 'fault': self.severity = 'fault'
+
+    def summary(self):
+        related = "、".join(f"{s}×{n}" for s, n in self.sources.items())
+        return (f"事件 #{self.id} [{self.root_source}] {self.message}: 共 {self.count} 条报警 ({related})，"
+                f"持续 {self.last_ts - self.first_ts:.0f} 秒")
+
+
+class AlarmCorrelator:
+    def __init__(self, topology=None, window=60.0):
+        """
+        topology: {下游来源: 上游来源} (见 line_topology)，None 表示不做上下游关联
+        window:   同一事件内两条报警的最大间隔 (秒)，超过后事件结束
+        """
+        self.upstream = dict(topology or {})
+        self.downstream = {}
+        for child, parent in self.upstream.items(): self.downstream.setdefault(parent, []).append(child)
+        self.window = window
+        self._by_alarm = {}        # (来源, 报警码) -> 它最近所属的事件
+        self._by_source = {}       # 来源 -> 它最近所属的事件
+        self._expiry = deque()     # (最后活动时间, 事件)，按时间递增
+        self._closed = []          # process() 中关闭、尚未由 expire() 交给调用方的事件
+
+    def _alive(self, incident, ts):
+        return incident is not None and incident.open and ts - incident.last_ts <= self.window
+
+    def _find_related(self, source, code, ts):
+        """依次查找: 同一报警 -> 同一来源 -> 上游链路 -> 直接下游；返回 (事件, 类别, 是否来自下游)"""
+        incident = self._by_alarm.get((source, code))
+        if self._alive(incident, ts): return incident, DUPLICATE, False
+        incident = self._by_source.get(source)
+        if self._alive(incident, ts): return incident, RELATED, False
+        parent = self.upstream.get(source); seen = {source}
+        while parent is not None and parent not in seen:
+            incident = self._by_source.get(parent)
+            if self._alive(incident, ts): return incident, RELATED, False
+            seen.add(parent); parent = self.upstream.get(parent)
+        for child in self.downstream.get(source, ()):
+            incident = self._by_source.get(child)
+            if self._alive(incident, ts): return incident, RELATED, True
+        return None, NEW_INCIDENT, False
+
+    def process(self, ts, source, code, severity='fault', message=''):
+        """
+        处理一条原始报警，返回 (事件, 类别):
+            NEW_INCIDENT  新事件，写日志并响铃
+            RELATED       同来源的其它报警码或上下游连锁报警，作为子报警归入已有事件，写日志但不响铃
+            DUPLICATE     同一来源同一报警码的重复报警，只计数
+        incident.escalated 为真时表示这条报警把事件从警告升级为故障，也应通知。
+        期间超时关闭的事件暂存起来，由下一次 expire() 一并返回。
+        """
+        self._closed.extend(self._close_expired(ts))
+        incident, kind, from_downstream = self._find_related(source, code, ts)
+        if incident is None:
+            incident = Incident(ts, source, code, severity, message)
+        elif from_downstream:
+            # 上游晚于下游报警: 根因改为上游来源
+            incident.root_source, incident.code, incident.message = source, code, message
+        incident.add(ts, source, code, severity)
+        self._by_alarm[(source, code)] = incident; self._by_source[source] = incident
+        self._expiry.append((incident.last_ts, incident))
+        return incident, kind
+
+    def expire(self, now):
+        """关闭超过时间窗没有新报警的事件，返回刚关闭的事件列表 (含上次 expire() 之后在 process() 中关闭的)"""
+        closed, self._closed = self._closed, []
+        return closed + self._close_expired(now)
+
+    def _close_expired(self, now):
+        closed = []
+        while self._expiry and now - self._expiry[0][0] > self.window:
+            last_ts, incident = self._expiry.popleft()
+            # 队列中较早的记录在事件有新报警后就作废了，只有最后一条记录决定事件是否结束
+            if incident.open and incident.last_ts == last_ts:
+                incident.open = False
+                closed.append(incident)
+        return closed
+
+    def open_incidents(self):
+        return list({id(i): i for i in self._by_source.values() if i.open}.values())
@@ -0,0 +1,150 @@
+# services/alarm_rules.py
+"""
+声明式报警规则引擎。
+
+规则写在 alarm_rules.json 中，修改规则无需改代码 (引擎会在文件变化后自动重新加载)。
+每条规则支持:
+    "all": [[信号, 比较符, 阈值], ...]   所有条件同时成立
+    "any": [[信号, 比较符, 阈值], ...]   任一条件成立 (与 all 同时出现时两者都要满足)
+    "for": 秒数                          条件需持续成立的时间
+规则按文件中的顺序排列优先级，每台设备取第一条命中的规则 (与原来的 if 级联一致)。
+
+评估时输入的是一整帧设备数据 (n_devices × n_signals 的数组)，
+所有比较按比较符分组后一次性向量化完成，再用矩阵乘法把条件组合成规则。
+"""
+import os
+import json
+import numpy as np
+
+RULES_FILE = 'alarm_rules.json'
+# 随程序发布的规则文件 (仓库根目录)，工作目录下没有规则文件时使用，默认规则只维护这一份
+BUNDLED_RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), RULES_FILE)
+
+_OPERATORS = {'>': np.greater, '>=': np.greater_equal, '<': np.less,
+              '<=': np.less_equal, '==': np.equal, '!=': np.not_equal}
+
+def load_rule_config(path=RULES_FILE):
+    """读取规则文件；文件不存在时使用随程序发布的 alarm_rules.json"""
+    if not os.path.exists(path): path = BUNDLED_RULES_FILE
+    with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+
+
+class AlarmRuleEngine:
+    def __init__(self, config=None, path=None):
+        self.path = path
+        self._mtime = None
+        if config is None: config = self._read_file()
+        self._compile(config)
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE):
+        return cls(path=path)
+
+    def _read_file(self):
+        path = self.path or RULES_FILE
+        self._mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        return load_rule_config(path)
+
+    def reload_if_changed(self):
+        """规则文件修改后重新编译；规则有误时保留旧规则并抛出 ValueError"""
+        if not self.path: return False
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime == self._mtime: return False
+        self._compile(self._read_file())
+        return True
+
+    def _compile(self, config):
+        """规则格式有误时一律抛出 ValueError，且在修改任何状态之前，旧规则保持不变"""
+        try:
+            rules, signals, conditions, compiled_all, compiled_any, durations = self._parse(config)
+        except (TypeError, KeyError, AttributeError) as e:
+            raise ValueError(f"规则格式有误: {e!r}") from e
+        n_rules = len(rules)
+
+        # 规则-条件关联矩阵: 条件命中矩阵与之相乘即得到每条规则命中的条件数
+        self.all_matrix = np.zeros((n_rules, len(conditions)), dtype=np.float32)
+        self.any_matrix = np.zeros((n_rules, len(conditions)), dtype=np.float32)
+        for r in range(n_rules):
+            self.all_matrix[r, compiled_all[r]] = 1
+            self.any_matrix[r, compiled_any[r]] = 1
+        self.all_required = self.all_matrix.sum(axis=1)
+        self.has_any = self.any_matrix.sum(axis=1) > 0
+
+        # 按比较符分组: 每组一次向量化比较
+        self.signals = signals
+        self.signal_index = {s: i for i, s in enumerate(signals)}
+        self.groups = []
+        by_op = {}
+        for (signal, op, threshold), idx in conditions.items():
+            by_op.setdefault(op, []).append((idx, self.signal_index[signal], threshold))
+        for op, items in by_op.items():
+            idx, cols, thresholds = (np.array(x) for x in zip(*items))
+            self.groups.append((_OPERATORS[op], idx, cols, thresholds.astype(np.float64)))
+        self.n_conditions = len(conditions)
+
+        self.rules = rules
+        self.rule_ids = [r.get('id', str(i)) for i, r in enumerate(rules)]
+        self.levels = [r.get('level', 'warning') for r in rules]
+        self.messages = [r.get('message', r.get('id', '')) for r in rules]
+        self.durations = durations
+        self._since = None
+
+    @staticmethod
+    def _parse(config):
+        rules = list(config['rules'])
+        signals = list(config.get('signals') or [])
+        conditions = {} # (信号, 比较符, 阈值) -> 条件编号，相同条件只计算一次
+
+        def condition_index(condition):
+            signal, op, threshold = condition
+            if op not in _OPERATORS: raise ValueError(f"不支持的比较符: {op}")
+            if signal not in signals: signals.append(signal)
+            return conditions.setdefault((signal, op, float(threshold)), len(conditions))
+
+        compiled_all, compiled_any = [], []
+        for rule in rules:
+            compiled_all.append([condition_index(c) for c in rule.get('all', [])])
+            compiled_any.append([condition_index(c) for c in rule.get('any', [])])
+            if not compiled_all[-1] and not compiled_any[-1]: raise ValueError(f"规则 {rule.get('id')} 没有任何条件")
+        durations = np.array([float(r.get('for', 0)) for r in rules])
+        return rules, signals, conditions, compiled_all, compiled_any, durations
+
+    def frame_from_dicts(self, records):
+        """把 [{'temperature':..., 'pressure':...}, ...] 转成评估用的帧，缺失的信号记为 NaN"""
+        frame = np.full((len(records), len(self.signals)), np.nan)
+        for row, record in enumerate(records):
+            for signal, col in self.signal_index.items():
+                if signal in record: frame[row, col] = record[signal]
+        return frame
+
+    def evaluate(self, frame, now):
+        """
+        frame: (n_devices, n_signals) 数组，列顺序与 self.signals 一致
+        返回 (n_rules, n_devices) 的布尔矩阵，表示每条规则在每台设备上是否处于报警状态 (已考虑持续时间)
+        """
+        frame = np.asarray(frame, dtype=np.float64)
+        n_devices = frame.shape[0]
+        hits = np.empty((self.n_conditions, n_devices), dtype=np.float32)
+        with np.errstate(invalid='ignore'):
+            for compare, idx, cols, thresholds in self.groups:
+                hits[idx] = compare(frame[:, cols].T, thresholds[:, None])
+
+        mask = (self.all_matrix @ hits) >= self.all_required[:, None]
+        mask &= ~self.has_any[:, None] | ((self.any_matrix @ hits) > 0)
+
+        # 持续时间: 记录每条规则在每台设备上连续成立的起始时刻
+        if self._since is None or self._since.shape[1] != n_devices:
+            self._since = np.full((len(self.rules), n_devices), np.nan)
+        self._since = np.where(mask, np.fmin(self._since, now), np.nan)
+        return mask & ((now - self._since) >= self.durations[:, None])
+
+    def classify(self, frame, now):
+        """返回每台设备命中的第一条规则编号 (无报警为 -1)"""
+        active = self.evaluate(frame, now)
+        first = np.argmax(active, axis=0)
+        return np.where(active.any(axis=0), first, -1)
+
+    def describe(self, rule_index):
+        """规则编号 -> (级别, 提示信息)，-1 表示正常"""
+        if rule_index < 0: return 'normal', "运行正常"
+        return self.levels[rule_index], self.messages[rule_index]
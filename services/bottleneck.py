@@ -0,0 +1,154 @@
+# services/bottleneck.py
+"""
+产线瓶颈识别 (流式)。
+
+每条产线是按物流顺序排列的一串工位 (挤出机 -> 牵引机 -> 切割机 ...)，数据线程每帧送入各工位的状态与累计产量。
+工位状态归为四类:
+    active   加工或故障维修中 (running / call / fault)，工位本身占用时间
+    blocked  下游满，做完的料送不出去
+    starved  上游空，没有料可做
+    idle     其他 (离线、无法判断)
+上报为 idle 的工位按相邻工位推断: 上游不在运行 -> starved，否则下游不在运行 -> blocked。
+
+采用活跃周期法 (active period method): 任一时刻，当前连续活跃时间最长的工位就是该产线的瞬时瓶颈；
+滚动窗口内各工位作为瞬时瓶颈的时间占比即瓶颈份额，排名按 (瓶颈份额, 活跃率) 降序。
+阻塞/饥饿率作为佐证: 瓶颈上游多为阻塞，下游多为饥饿。
+
+每类时间用 "区间队列 + 累计和" 维护，相邻同类区间合并，过期时从队首扣除，因此 update 为均摊 O(工位数)。
+"""
+import threading
+from collections import deque
+
+WINDOW = 10 * 60        # 滚动窗口 (秒)
+ACTIVE_STATES = {'running', 'call', 'fault'}
+WAITING_STATES = {'blocked', 'starved'}
+
+class _IntervalWindow:
+    """最近 window 秒内各类别的累计时长"""
+    def __init__(self, window):
+        self.window = window
+        self.intervals = deque()    # [开始, 结束, 类别]
+        self.totals = {}
+
+    def add(self, t0, t1, category):
+        if t1 <= t0: return
+        last = self.intervals[-1] if self.intervals else None
+        if last is not None and last[2] == category and last[1] == t0: last[1] = t1
+        else: self.intervals.append([t0, t1, category])
+        self.totals[category] = self.totals.get(category, 0.0) + (t1 - t0)
+        self.trim(t1)
+
+    def trim(self, now):
+        cutoff = now - self.window
+        while self.intervals and self.intervals[0][0] < cutoff:
+            first = self.intervals[0]
+            end = min(first[1], cutoff)
+            self.totals[first[2]] -= end - first[0]
+            if first[1] <= cutoff: self.intervals.popleft()
+            else: first[0] = cutoff
+
+    def get(self, category):
+        return max(0.0, self.totals.get(category, 0.0))
+
+    def span(self):
+        return self.intervals[-1][1] - self.intervals[0][0] if self.intervals else 0.0
+
+
+class _Station:
+    def __init__(self, name, window):
+        self.name = name
+        self.state = None
+        self.category = None
+        self.active_since = None    # 当前活跃周期的开始时刻
+        self.time = _IntervalWindow(window)
+        self.output = deque()       # (时刻, 产量增量)
+        self.output_sum = 0.0
+        self.counter = None
+
+
+class BottleneckAnalyzer:
+    """
+    line_stations: {产线: (工位1, 工位2, ...)}，按物流顺序
+    update() 在数据线程中调用，ranking()/bottleneck() 在界面线程中读取。
+    """
+    def __init__(self, line_stations, window=WINDOW):
+        self._lock = threading.Lock()
+        self.window = window
+        self.line_stations = {line: tuple(stations) for line, stations in line_stations.items()}
+        self._stations = {line: [_Station(name, window) for name in stations] for line, stations in self.line_stations.items()}
+        self._share = {line: _IntervalWindow(window) for line in self.line_stations}   # 类别为瞬时瓶颈工位名
+        self._last_ts = None
+
+    def lines(self):
+        return list(self.line_stations)
+
+    @staticmethod
+    def _classify(states, index):
+        state = states[index]
+        if state in ACTIVE_STATES or state in WAITING_STATES: return 'active' if state in ACTIVE_STATES else state
+        if state != 'idle': return 'idle'
+        if index > 0 and states[index - 1] != 'running': return 'starved'
+        if index + 1 < len(states) and states[index + 1] != 'running': return 'blocked'
+        return 'idle'
+
+    def update(self, ts, states, counters=None):
+        """
+        states:   {工位: 状态}，缺失的工位按 offline 处理
+        counters: {工位: 累计产量}，可选；用于计算窗口内产出率
+        """
+        with self._lock:
+            previous, self._last_ts = self._last_ts, ts
+            for line, stations in self._stations.items():
+                line_states = [states.get(station.name, 'offline') for station in stations]
+                # 上一帧到本帧的时间按上一帧的状态计入
+                if previous is not None and ts > previous:
+                    for station in stations:
+                        if station.category is not None: station.time.add(previous, ts, station.category)
+                    leader = self._leader(stations)
+                    if leader is not None: self._share[line].add(previous, ts, leader.name)
+                for index, station in enumerate(stations):
+                    station.state = line_states[index]
+                    station.category = self._classify(line_states, index)
+                    if station.category != 'active': station.active_since = None
+                    elif station.active_since is None: station.active_since = ts
+                    self._count_output(station, ts, counters)
+
+    @staticmethod
+    def _leader(stations):
+        """当前连续活跃时间最长的工位"""
+        active = [s for s in stations if s.active_since is not None]
+        return min(active, key=lambda s: s.active_since) if active else None
+
+    def _count_output(self, station, ts, counters):
+        if counters is None or station.name not in counters: return
+        value = counters[station.name]
+        if station.counter is not None and value > station.counter:
+            station.output.append((ts, value - station.counter)); station.output_sum += value - station.counter
+        station.counter = value
+        while station.output and station.output[0][0] < ts - self.window:
+            station.output_sum -= station.output.popleft()[1]
+
+    def ranking(self, line):
+        """产线各工位的窗口统计，瓶颈在前"""
+        with self._lock:
+            stations = self._stations[line]; share = self._share[line]
+            share_span = share.span(); leader = self._leader(stations)
+            result = []
+            for station in stations:
+                span = station.time.span(); scale = 1.0 / span if span > 0 else 0.0
+                result.append({
+                    'device': station.name, 'state': station.state,
+                    'active': station.time.get('active') * scale, 'blocked': station.time.get('blocked') * scale,
+                    'starved': station.time.get('starved') * scale,
+                    'share': share.get(station.name) / share_span if share_span > 0 else 0.0,
+                    'active_period': self._last_ts - station.active_since if station.active_since is not None else 0.0,
+                    'momentary': station is leader,
+                    'throughput': station.output_sum * scale * 3600 if span > 0 else None,   # 件/小时
+                })
+            result.sort(key=lambda r: (r['share'], r['active']), reverse=True)
+            return result
+
+    def bottleneck(self, line):
+        """窗口内的主瓶颈工位；还没有数据时返回 None"""
+        ranking = self.ranking(line)
+        return ranking[0] if ranking and (ranking[0]['share'] > 0 or ranking[0]['active'] > 0) else None
@@ -0,0 +1,116 @@
+# services/cycle_analytics.py
+"""
+产线节拍 (cycle time) 流式统计。
+
+每条产线只接收 "完成一件" 事件，用相邻两件的时间差作为周期时间，不保存样本:
+    Welford 算法       累计均值/方差
+    EWMA               近期趋势 (指针显示用)
+    P² 分位数估计       p50 / p95，每个分位数 5 个标记，O(1) 更新
+    节拍达成率          周期 <= 目标节拍 x 容差 的比例
+停机后第一件的间隔 (超过 max_gap) 不计入周期统计，只重新起算。
+"""
+import math
+import threading
+
+EWMA_ALPHA = 0.2
+TAKT_TOLERANCE = 1.05   # 周期不超过目标节拍 5% 视为达成
+
+class P2Quantile:
+    """Jain & Chlamtac 的 P² 分位数估计"""
+    def __init__(self, p):
+        self.p = p
+        self._initial = []
+        self.q = self.n = self.np = self.dn = None
+
+    def add(self, x):
+        if self.q is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                p = self.p
+                self.q = sorted(self._initial)
+                self.n = [0, 1, 2, 3, 4]
+                self.np = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+                self.dn = [0, p / 2, p, (1 + p) / 2, 1]
+            return
+        q, n = self.q, self.n
+        if x < q[0]: q[0] = x; k = 0
+        elif x >= q[4]: q[4] = x; k = 3
+        else: k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5): n[i] += 1
+        for i in range(5): self.np[i] += self.dn[i]
+        for i in range(1, 4):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # 抛物线插值，越界时退回线性插值
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                         + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]: qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp; n[i] += d
+
+    def value(self):
+        if self.q is not None: return self.q[2]
+        if not self._initial: return None
+        data = sorted(self._initial)
+        return data[min(len(data) - 1, int(round(self.p * (len(data) - 1))))]
+
+
+class CycleStats:
+    """单条产线的周期统计"""
+    def __init__(self, takt_time, max_gap=None):
+        self.takt_time = takt_time
+        self.max_gap = max_gap if max_gap is not None else takt_time * 10
+        self.units = 0
+        self.last_unit_ts = None
+        self.count = 0; self.mean = 0.0; self._m2 = 0.0
+        self.ewma = None; self.last_cycle = None
+        self.on_takt = 0
+        self.p50 = P2Quantile(0.5); self.p95 = P2Quantile(0.95)
+
+    def add_unit(self, ts):
+        self.units += 1
+        previous, self.last_unit_ts = self.last_unit_ts, ts
+        if previous is None: return
+        cycle = ts - previous
+        if cycle <= 0 or cycle > self.max_gap: return
+        self.last_cycle = cycle
+        self.count += 1
+        delta = cycle - self.mean; self.mean += delta / self.count; self._m2 += delta * (cycle - self.mean)
+        self.ewma = cycle if self.ewma is None else self.ewma + EWMA_ALPHA * (cycle - self.ewma)
+        self.p50.add(cycle); self.p95.add(cycle)
+        if cycle <= self.takt_time * TAKT_TOLERANCE: self.on_takt += 1
+
+    def snapshot(self):
+        return {
+            'takt_time': self.takt_time, 'units': self.units, 'last_unit_ts': self.last_unit_ts,
+            'count': self.count, 'last': self.last_cycle,
+            'mean': self.mean if self.count else None,
+            'std': math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else None,
+            'ewma': self.ewma, 'p50': self.p50.value(), 'p95': self.p95.value(),
+            'takt_compliance': self.on_takt / self.count if self.count else None,
+        }
+
+
+class CycleTimeAnalytics:
+    """
+    各产线的周期统计。unit_completed 在数据线程中调用，stats 在界面线程中读取。
+    takt_times: {产线: 目标节拍 (秒)}
+    """
+    def __init__(self, takt_times):
+        self._lock = threading.Lock()
+        self._lines = {line: CycleStats(takt) for line, takt in takt_times.items()}
+
+    def lines(self):
+        return list(self._lines)
+
+    def unit_completed(self, line, ts, count=1):
+        """count > 1 表示同一时刻完成多件 (例如按计数器差值上报)，只有第一件形成周期样本"""
+        with self._lock:
+            stats = self._lines[line]
+            for _ in range(count): stats.add_unit(ts)
+
+    def set_takt_time(self, line, takt_time):
+        with self._lock: self._lines[line].takt_time = takt_time
+
+    def stats(self, line):
+        with self._lock: return self._lines[line].snapshot()
@@ -0,0 +1,89 @@
+# services/decimation.py
+import numpy as np
+
+def visible_slice(x, x_min, x_max):
+    """
+    返回 x 落在 [x_min, x_max] 内的下标区间 (start, stop)。
+    两端各多保留一个点，保证曲线在视图边缘是连续的。x 必须单调递增。
+    """
+    start = max(0, int(np.searchsorted(x, x_min, side='left')) - 1)
+    stop = min(len(x), int(np.searchsorted(x, x_max, side='right')) + 1)
+    return start, stop
+
+def minmax_decimate(x, y, n_buckets):
+    """
+    按像素桶做 min/max 抽稀：把 x 轴等宽切成 n_buckets 个桶，
+    每个桶只保留最小值和最大值两个点 (按原顺序)，最多输出 2*n_buckets 个点。
+    尖峰不会丢失，适合压力/温度这类需要看极值的曲线。
+    """
+    x = np.asarray(x, dtype=np.float64); y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_buckets < 1 or n <= 2 * n_buckets or x[-1] <= x[0]:
+        return x, y
+
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)[1:-1]
+    bounds = np.searchsorted(x, edges, side='left')
+    starts = np.unique(np.concatenate(([0], bounds)))
+    starts = starts[starts < n]
+
+    # 每个点所属的桶，以及桶内最小/最大值
+    counts = np.diff(np.append(starts, n))
+    bucket = np.repeat(np.arange(len(starts)), counts)
+    y_min = np.minimum.reduceat(y, starts)
+    y_max = np.maximum.reduceat(y, starts)
+
+    # 取每个桶内第一次出现最小/最大值的位置 (每个桶至少有一个命中点)
+    hits = np.flatnonzero(y == y_min[bucket])
+    i_min = hits[np.searchsorted(hits, starts)]
+    hits = np.flatnonzero(y == y_max[bucket])
+    i_max = hits[np.searchsorted(hits, starts)]
+
+    # 首尾两点始终保留，保证自动量程与视图边缘正确；np.unique 同时完成排序与去重
+    picked = np.unique(np.concatenate(([0], i_min, i_max, [n - 1])))
+    return x[picked], y[picked]
+
+def lttb_decimate(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 抽稀，输出 n_out 个点。
+    视觉形状比 min/max 更平滑，适合趋势类曲线。首尾两点始终保留。
+    """
+    x = np.asarray(x, dtype=np.float64); y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out < 3 or n <= n_out:
+        return x, y
+
+    # 中间 n-2 个点平均分到 n_out-2 个桶中
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.intp) + 1
+    edges[-1] = n - 1
+
+    # 预先算出每个桶的均值 (用作下一个桶的第三个顶点)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    avg_x = np.append(sums_x / sizes, x[-1])
+    avg_y = np.append(sums_y / sizes, y[-1])
+
+    picked = np.empty(n_out, dtype=np.intp)
+    picked[0] = 0; picked[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        ax, ay = x[a], y[a]
+        # 三角形面积 (省略常数 1/2)
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return x[picked], y[picked]
+
+def decimate(x, y, x_min, x_max, pixels, method='minmax'):
+    """
+    抽稀入口：先按视图范围裁剪，再按屏幕像素宽度抽稀。
+    method: 'minmax' (默认, 保留极值) 或 'lttb' (保留形状)。
+    """
+    start, stop = visible_slice(x, x_min, x_max)
+    x, y = x[start:stop], y[start:stop]
+    pixels = max(1, int(pixels))
+    if method == 'lttb':
+        return lttb_decimate(x, y, pixels * 2)
+    return minmax_decimate(x, y, pixels)
@@ -0,0 +1,144 @@
+# services/eta_engine.py
+"""
+在制工单的完工时间 (ETA) 预测。
+
+每条产线按排程顺序把累计完工件数分配给各工单，得到当前工单及其已完成数量；
+产线速率取最近 RATE_WINDOW 秒内的完工件数 (滑动窗口，包含期间的停机)，
+剩余生产时间 = 剩余件数 / 速率，再从当前时刻向后推进，跳过计划停机 (午休/交接班等)。
+
+置信区间按泊松过程近似: 窗口内观测到 n 件、还剩 R 件时，生产时间的相对标准差约为 sqrt(1/n + 1/R)，
+取 CONFIDENCE_Z 倍作为上下界。窗口内完工数不足 MIN_EVENTS 时先用目标节拍估计，区间放宽。
+
+update() 由数据线程每帧调用 (只做常数次运算和一次停机表推进)，界面线程通过 estimates() 读取结果。
+"""
+import math
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+RATE_WINDOW = 15 * 60       # 速率滑动窗口 (秒)
+MIN_EVENTS = 5              # 窗口内完工数达到该值后才用实测速率
+CONFIDENCE_Z = 1.64         # 约 90% 置信区间
+FALLBACK_REL_STD = 0.5      # 用目标节拍估计时的相对标准差
+
+# 每天的计划停机 (HH:MM, HH:MM)，所有产线相同
+DEFAULT_PLANNED_DOWNTIME = [('12:00', '12:30'), ('17:30', '18:00')]
+
+class PlannedDowntime:
+    """按天重复的计划停机时段"""
+    def __init__(self, windows=None):
+        windows = DEFAULT_PLANNED_DOWNTIME if windows is None else windows
+        self.windows = sorted((self._minutes(a), self._minutes(b)) for a, b in windows)
+
+    @staticmethod
+    def _minutes(text):
+        hour, minute = text.split(':'); return int(hour) * 60 + int(minute)
+
+    def advance(self, start, seconds):
+        """从 start (epoch) 起累计 seconds 秒的生产时间，返回结束时刻 (epoch)"""
+        if not self.windows or math.isinf(seconds): return start + seconds
+        current = datetime.fromtimestamp(start); remaining = seconds
+        while True:
+            midnight = current.replace(hour=0, minute=0, second=0, microsecond=0)
+            for begin, end in self.windows:
+                w0 = midnight + timedelta(minutes=begin); w1 = midnight + timedelta(minutes=end)
+                if w1 <= current: continue
+                if w0 <= current: current = w1; continue
+                gap = (w0 - current).total_seconds()
+                if remaining <= gap: return (current + timedelta(seconds=remaining)).timestamp()
+                remaining -= gap; current = w1
+            gap = (midnight + timedelta(days=1) - current).total_seconds()
+            if remaining <= gap: return (current + timedelta(seconds=remaining)).timestamp()
+            remaining -= gap; current = midnight + timedelta(days=1)
+
+
+class _LineTracker:
+    def __init__(self, takt_time):
+        self.takt_time = takt_time
+        self.samples = deque()     # (时间, 累计件数)
+        self.units = 0
+        self.estimate = None
+
+    def add(self, ts, units):
+        self.units = units
+        self.samples.append((ts, units))
+        while len(self.samples) > 2 and ts - self.samples[1][0] >= RATE_WINDOW: self.samples.popleft()
+
+    def rate(self):
+        """返回 (件/秒, 窗口内完工数)"""
+        if len(self.samples) >= 2:
+            (t0, u0), (t1, u1) = self.samples[0], self.samples[-1]
+            if t1 > t0 and u1 - u0 >= MIN_EVENTS: return (u1 - u0) / (t1 - t0), u1 - u0
+        return 1.0 / self.takt_time, 0
+
+
+class EtaEngine:
+    """
+    schedule: [{'line', 'order', 'quantity', ...}]，同一产线的工单按列表顺序生产
+    takt_times: {产线: 目标节拍 (秒)}，实测数据不足时使用
+    """
+    def __init__(self, schedule, takt_times, downtime=None):
+        self._lock = threading.Lock()
+        self.downtime = downtime if downtime is not None else PlannedDowntime()
+        self._lines = {line: _LineTracker(takt) for line, takt in takt_times.items()}
+        self.set_schedule(schedule)
+
+    def set_schedule(self, schedule):
+        """缺少数量的条目按 0 件处理 (视为已完成)，缺少产线的条目忽略，不在数据线程里抛出 KeyError"""
+        tasks = [dict(task, quantity=task.get('quantity') or 0, order=task.get('order')) for task in schedule if task.get('line') in self._lines]
+        with self._lock:
+            self._orders = {line: [task for task in tasks if task['line'] == line] for line in self._lines}
+
+    def update(self, line, units, now=None):
+        """一帧数据: 产线 line 的累计完工件数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            tracker = self._lines[line]
+            tracker.add(now, units)
+            tracker.estimate = self._estimate(line, tracker, now)
+
+    def _estimate(self, line, tracker, now):
+        tasks = self._orders.get(line) or []
+        if not tasks: return None
+        done = tracker.units
+        for task in tasks:
+            if done < task['quantity']: break
+            done -= task['quantity']
+        else:
+            task, done = tasks[-1], tasks[-1]['quantity']
+        remaining = task['quantity'] - done
+        rate, observed = tracker.rate()
+        seconds = remaining / rate if rate > 0 else float('inf')
+        if remaining <= 0: rel_std = 0.0
+        elif observed: rel_std = math.sqrt(1.0 / observed + 1.0 / remaining)
+        else: rel_std = FALLBACK_REL_STD
+        band = CONFIDENCE_Z * rel_std
+        return {
+            'line': line, 'order': task['order'], 'quantity': task['quantity'], 'produced': done, 'remaining': remaining,
+            'progress': done / task['quantity'] if task['quantity'] else 1.0,
+            'rate': rate * 3600, 'measured': bool(observed),   # 件/小时
+            'eta': self.downtime.advance(now, seconds),
+            'eta_low': self.downtime.advance(now, seconds * max(0.0, 1 - band)),
+            'eta_high': self.downtime.advance(now, seconds * (1 + band)),
+            'updated': now,
+        }
+
+    def estimate(self, line):
+        with self._lock:
+            estimate = self._lines[line].estimate
+            return dict(estimate) if estimate else None
+
+    def estimates(self):
+        with self._lock:
+            return {line: dict(t.estimate) for line, t in self._lines.items() if t.estimate}
+
+    def busy_until_hours(self, now=None, conservative=True):
+        """
+        各产线当前工单预计占用到的时刻 (距 now 的小时数)，供排程冻结区使用:
+        新排入的订单不能早于该时刻开工。conservative 时取置信区间上界。
+        """
+        now = time.time() if now is None else now
+        key = 'eta_high' if conservative else 'eta'
+        return {line: max(0.0, est[key] - now) / 3600 for line, est in self.estimates().items()
+                if not math.isinf(est[key])}
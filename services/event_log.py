@@ -0,0 +1,190 @@
+# services/event_log.py
+"""
+持久化的事件/报警日志。
+
+磁盘上是三个只追加的文件 (默认位于 data/events/):
+    events.bin    定宽记录: 时间戳, 级别, 来源编号, 消息偏移, 消息长度
+    messages.txt  UTF-8 消息正文，按偏移读取
+    sources.txt   来源名称表 (产线/设备)，行号即来源编号
+
+记录按时间递增追加，时间范围用二分查找；级别与来源各维护一份倒排表 (有序行号数组)，
+筛选时只在命中的行号上做交集，不需要扫描全部事件。消息正文只在显示或全文搜索时才读取。
+"""
+import os
+import time
+import threading
+import weakref
+import numpy as np
+
+DEFAULT_ROOT = os.path.join('data', 'events')
+SEVERITIES = ('info', 'warning', 'fault')
+
+RECORD_DTYPE = np.dtype([('ts', '<f8'), ('severity', 'u1'), ('source', '<u2'),
+                         ('offset', '<u8'), ('length', '<u4')])
+
+class GrowableArray:
+    """按需倍增容量的一维数组，append 均摊 O(1)，view() 不拷贝"""
+    def __init__(self, dtype, initial=None):
+        initial = np.asarray(initial if initial is not None else [], dtype=dtype)
+        self._data = np.empty(max(1024, len(initial) * 2), dtype=dtype)
+        self._data[:len(initial)] = initial
+        self._size = len(initial)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        if self._size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size] = value
+        self._size += 1
+
+    def view(self):
+        return self._data[:self._size]
+
+
+class EventLogStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._listeners = []
+
+        self._records_path = os.path.join(root, 'events.bin')
+        self._messages_path = os.path.join(root, 'messages.txt')
+        self._sources_path = os.path.join(root, 'sources.txt')
+
+        records = np.fromfile(self._records_path, dtype=RECORD_DTYPE) if os.path.exists(self._records_path) else np.empty(0, RECORD_DTYPE)
+        self._records = GrowableArray(RECORD_DTYPE, records)
+        self.sources = []
+        if os.path.exists(self._sources_path):
+            with open(self._sources_path, 'r', encoding='utf-8') as f: self.sources = f.read().splitlines()
+        self._source_ids = {name: i for i, name in enumerate(self.sources)}
+
+        # 倒排索引: 级别/来源 -> 有序行号
+        self._by_severity = [GrowableArray(np.int64, np.flatnonzero(records['severity'] == i)) for i in range(len(SEVERITIES))]
+        self._by_source = [GrowableArray(np.int64, np.flatnonzero(records['source'] == i)) for i in range(len(self.sources))]
+
+        self._records_file = open(self._records_path, 'ab')
+        self._messages_file = open(self._messages_path, 'ab')
+        self._message_end = self._messages_file.tell()
+        self._reader = open(self._messages_path, 'rb')
+
+    def __len__(self):
+        return len(self._records)
+
+    # --- 写入 ---
+
+    def add_listener(self, callback):
+        """注册新事件回调 callback(row)。只保存弱引用，视图销毁后自动失效"""
+        self._listeners.append(weakref.WeakMethod(callback) if hasattr(callback, '__self__') else (lambda cb=callback: cb))
+
+    def _source_id(self, source):
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            source_id = self._source_ids[source] = len(self.sources)
+            self.sources.append(source); self._by_source.append(GrowableArray(np.int64))
+            with open(self._sources_path, 'a', encoding='utf-8') as f: f.write(source + '\n')
+        return source_id
+
+    def append(self, message, severity='info', source='', ts=None):
+        """追加一条事件并返回行号；时间戳不得早于上一条 (早于时按上一条处理，保证有序)"""
+        with self._lock:
+            ts = time.time() if ts is None else ts
+            if len(self._records): ts = max(ts, float(self._records.view()['ts'][-1]))
+            severity_id = SEVERITIES.index(severity)
+            source_id = self._source_id(source)
+            payload = message.encode('utf-8')
+            record = np.array((ts, severity_id, source_id, self._message_end, len(payload)), dtype=RECORD_DTYPE)
+
+            self._messages_file.write(payload); self._messages_file.flush()
+            self._records_file.write(record.tobytes()); self._records_file.flush()
+            self._message_end += len(payload)
+
+            row = len(self._records)
+            self._records.append(record)
+            self._by_severity[severity_id].append(row)
+            self._by_source[source_id].append(row)
+
+        for listener in list(self._listeners):
+            callback = listener()
+            if callback is None: self._listeners.remove(listener); continue
+            try:
+                callback(row)
+            except RuntimeError: # 视图对应的 Qt 对象已被删除
+                self._listeners.remove(listener)
+        return row
+
+    # --- 读取 ---
+
+    def record(self, row):
+        """返回 (时间戳, 级别, 来源, 消息)"""
+        r = self._records.view()[row]
+        return float(r['ts']), SEVERITIES[r['severity']], self.sources[r['source']], self.message(row)
+
+    def severity(self, row):
+        return SEVERITIES[self._records.view()[row]['severity']]
+
+    def message(self, row):
+        r = self._records.view()[row]
+        with self._lock:
+            self._reader.seek(int(r['offset']))
+            return self._reader.read(int(r['length'])).decode('utf-8')
+
+    def latest(self, source=None):
+        """最新一条事件 (可按来源)，没有时返回 None"""
+        if source is None:
+            return self.record(len(self._records) - 1) if len(self._records) else None
+        if source not in self._source_ids: return None
+        rows = self._by_source[self._source_ids[source]].view()
+        return self.record(int(rows[-1])) if len(rows) else None
+
+    def query(self, severities=None, sources=None, t0=None, t1=None, text=None):
+        """
+        返回满足条件的行号 (升序)。
+        severities / sources 为名称列表 (None 表示不限)，t0/t1 为时间范围，text 为消息中包含的文字。
+        """
+        records = self._records.view()
+        lo = 0 if t0 is None else int(np.searchsorted(records['ts'], t0, side='left'))
+        hi = len(records) if t1 is None else int(np.searchsorted(records['ts'], t1, side='right'))
+
+        rows = None
+        if severities is not None:
+            rows = self._union([self._by_severity[SEVERITIES.index(s)].view() for s in severities], lo, hi)
+        if sources is not None:
+            by_source = self._union([self._by_source[self._source_ids[s]].view() for s in sources if s in self._source_ids], lo, hi)
+            rows = by_source if rows is None else np.intersect1d(rows, by_source, assume_unique=True)
+        if rows is None: rows = np.arange(lo, hi, dtype=np.int64)
+        if text: rows = self._search_text(rows, text)
+        return rows
+
+    def _union(self, postings, lo, hi):
+        parts = [p[np.searchsorted(p, lo):np.searchsorted(p, hi)] for p in postings]
+        if not parts: return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def _search_text(self, rows, text):
+        """在候选行中做全文过滤：一次读出覆盖这些行的消息区间，再逐条匹配"""
+        if len(rows) == 0: return rows
+        records = self._records.view()[rows]
+        start = int(records['offset'].min()); end = int((records['offset'] + records['length']).max())
+        with self._lock:
+            self._reader.seek(start); blob = self._reader.read(end - start)
+        needle = text.encode('utf-8')
+        offsets = records['offset'] - start; lengths = records['length']
+        keep = [needle in blob[o:o + n] for o, n in zip(offsets.tolist(), lengths.tolist())]
+        return rows[np.array(keep, dtype=bool)]
+
+    def close(self):
+        self._records_file.close(); self._messages_file.close(); self._reader.close()
+
+
+_default_log = None
+
+def get_event_log():
+    """进程内共享的事件日志"""
+    global _default_log
+    if _default_log is None: _default_log = EventLogStore()
+    return _default_log
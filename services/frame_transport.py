@@ -0,0 +1,59 @@
+# services/frame_transport.py
+"""
+工作线程 -> 界面线程的零拷贝帧传递。
+
+FrameRing 预先分配 slots 个 numpy 结构化记录，生产者在后台线程里原地填写下一个槽位并发布序号，
+信号里只传一个 int；界面线程按序号直接读取槽位视图，不构造字典，也不产生需要回收的 Python 对象。
+
+每个槽位的 seq 字段在填写期间置为 -1，发布时写入序号；get(seq) 发现槽位已被后续帧覆盖时返回 None。
+界面线程处理较慢时应只处理最新帧 (is_latest)，中间的帧自然被合并掉。
+"""
+import threading
+import numpy as np
+
+class FrameRing:
+    def __init__(self, dtype, slots=8):
+        dtype = np.dtype(dtype)
+        if 'seq' not in dtype.names:
+            dtype = np.dtype([('seq', '<i8')] + [(name, dtype.fields[name][0]) for name in dtype.names])
+        self.dtype = dtype
+        self.slots = slots
+        self.buffer = np.zeros(slots, dtype=dtype)
+        self.buffer['seq'] = -1
+        self.head = -1             # 最近一次发布的序号
+        self._claimed = None
+        self._lock = threading.Lock()
+
+    def claim(self):
+        """生产者: 取得下一个槽位 (0 维记录视图) 用于原地填写，填完后调用 publish()"""
+        seq = self.head + 1
+        frame = self.buffer[seq % self.slots]
+        frame['seq'] = -1
+        self._claimed = seq
+        return frame
+
+    def publish(self):
+        """生产者: 发布刚填写的槽位，返回其序号"""
+        seq = self._claimed
+        with self._lock:
+            self.buffer[seq % self.slots]['seq'] = seq
+            self.head = seq
+        self._claimed = None
+        return seq
+
+    def get(self, seq):
+        """读者: 返回序号对应的帧视图；帧尚未发布或已被覆盖时返回 None"""
+        frame = self.buffer[seq % self.slots]
+        return frame if seq >= 0 and frame['seq'] == seq else None
+
+    def latest(self):
+        """读者: 返回 (序号, 帧视图)；还没有任何帧时返回 (-1, None)"""
+        with self._lock: seq = self.head
+        return seq, self.get(seq) if seq >= 0 else None
+
+    def is_latest(self, seq):
+        return seq == self.head
+
+    def valid(self, seq):
+        """读者读完字段后可再检查一次，确认读取期间槽位没有被覆盖"""
+        return self.buffer[seq % self.slots]['seq'] == seq
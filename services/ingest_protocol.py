@@ -0,0 +1,58 @@
+# services/ingest_protocol.py
+"""
+采集服务的二进制帧格式 (小端)。每条消息前有 4 字节的负载长度:
+
+    uint32 length | payload
+
+负载第一个字节是消息类型:
+    MSG_REGISTER  <B I> + UTF-8 设备名         为本连接登记设备编号 -> 设备名
+    MSG_SAMPLES   <B d I> + count 条 SAMPLE_DTYPE  同一时刻 (epoch 秒) 多台设备的采样
+
+设备编号只在单个连接内有效，采样记录只携带编号，一帧 2000 台设备约 32 KB。
+本模块只依赖 numpy，网关/压测脚本可以单独使用。
+"""
+import struct
+import numpy as np
+
+MSG_REGISTER = 1
+MSG_SAMPLES = 2
+MAX_PAYLOAD = 1 << 20
+
+LENGTH = struct.Struct('<I')
+REGISTER_HEADER = struct.Struct('<BI')
+SAMPLES_HEADER = struct.Struct('<BdI')
+
+SIGNALS = ('temperature', 'pressure', 'speed')
+SAMPLE_DTYPE = np.dtype([('device', '<u4'), ('temperature', '<f4'), ('pressure', '<f4'), ('speed', '<f4')])
+MAX_SAMPLES = (MAX_PAYLOAD - SAMPLES_HEADER.size) // SAMPLE_DTYPE.itemsize
+
+class ProtocolError(ValueError):
+    pass
+
+def encode_register(index, name):
+    payload = REGISTER_HEADER.pack(MSG_REGISTER, index) + name.encode('utf-8')
+    return LENGTH.pack(len(payload)) + payload
+
+def encode_samples(ts, devices, values):
+    """devices: 本连接内的设备编号数组；values: (n, len(SIGNALS)) 数组，列顺序同 SIGNALS"""
+    records = np.empty(len(devices), dtype=SAMPLE_DTYPE)
+    records['device'] = devices
+    for i, signal in enumerate(SIGNALS): records[signal] = values[:, i]
+    payload = SAMPLES_HEADER.pack(MSG_SAMPLES, ts, len(records)) + records.tobytes()
+    return LENGTH.pack(len(payload)) + payload
+
+def decode_message(payload):
+    """返回 (MSG_REGISTER, 编号, 设备名) 或 (MSG_SAMPLES, 时间戳, 记录数组)"""
+    if not payload: raise ProtocolError("空消息")
+    kind = payload[0]
+    if kind == MSG_REGISTER:
+        if len(payload) < REGISTER_HEADER.size: raise ProtocolError("设备登记消息过短")
+        _, index = REGISTER_HEADER.unpack_from(payload)
+        return MSG_REGISTER, index, bytes(payload[REGISTER_HEADER.size:]).decode('utf-8')
+    if kind == MSG_SAMPLES:
+        if len(payload) < SAMPLES_HEADER.size: raise ProtocolError("采样消息过短")
+        _, ts, count = SAMPLES_HEADER.unpack_from(payload)
+        if len(payload) != SAMPLES_HEADER.size + count * SAMPLE_DTYPE.itemsize:
+            raise ProtocolError(f"采样消息长度与记录数 {count} 不符")
+        return MSG_SAMPLES, ts, np.frombuffer(payload, dtype=SAMPLE_DTYPE, count=count, offset=SAMPLES_HEADER.size)
+    raise ProtocolError(f"未知消息类型 {kind}")
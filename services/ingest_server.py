@@ -0,0 +1,287 @@
+# services/ingest_server.py
+"""
+本地遥测采集服务，作为 PLC/现场网关的接入点。
+
+asyncio 事件循环运行在独立的后台线程中，监听 TCP (默认 127.0.0.1:7878) 或 Unix 套接字
+(MES_INGEST_ADDR=unix:/tmp/mes_ingest.sock)，帧格式见 ingest_protocol。
+
+    连接协程 --(有界队列)--> 汇总协程 --(线程池, 批量)--> 时序存储 + 最新值表
+
+队列满时连接协程在 put 上等待、不再读套接字，TCP 窗口随之收紧，发送端被自然限速 (背压)；
+汇总协程每次取走队列中已有的全部帧，一次写入，写盘期间到达的帧自动并入下一批。
+每个连接记录帧数、字节数以及从采样时间到写入完成的延迟 (lag)。
+
+IngestSourceThread / IngestDeviceThread 与 device_simulator 中的模拟线程接口一致，
+设置 MES_TELEMETRY_SOURCE=ingest 后由 device_simulator 的 create_plant_feed / create_device_thread 创建，页面代码不变。
+"""
+import os
+import time
+import asyncio
+import threading
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from device_simulator import SchedulingSimulatorThread, DeviceSimulatorThread, scheduling_frame_dtype, STATION_DEVICE_IDS
+from services.frame_transport import FrameRing
+from services.bottleneck import BottleneckAnalyzer
+from services.oee_engine import OeeEngine
+from services.telemetry_store import get_telemetry_store
+from services.ingest_protocol import (LENGTH, MAX_PAYLOAD, MSG_REGISTER, SIGNALS,
+                                      ProtocolError, decode_message)
+
+DEFAULT_ADDRESS = '127.0.0.1:7878'
+QUEUE_FRAMES = 256      # 待写入帧的上限，超过后对发送端施加背压
+BATCH_FRAMES = 64       # 单次写入的最多帧数
+LAG_ALPHA = 0.1         # 延迟 EWMA 系数
+MAX_GAP = 1.0           # 累计产量时，两帧间隔超过该值 (秒) 按该值计算
+STALE_SECONDS = 5.0     # 超过该时间没有数据的设备视为离线
+
+class ConnectionStats:
+    """单个连接的吞吐与延迟统计"""
+    def __init__(self, peer):
+        self.peer = str(peer)
+        self.connected = True
+        self.connected_at = time.time()
+        self.frames = self.samples = self.bytes = 0
+        self.lag_last = self.lag_ewma = self.lag_max = 0.0
+
+    def record(self, lag, samples):
+        self.frames += 1; self.samples += samples
+        self.lag_last = lag; self.lag_max = max(self.lag_max, lag)
+        self.lag_ewma = lag if self.frames == 1 else self.lag_ewma + LAG_ALPHA * (lag - self.lag_ewma)
+
+    def as_dict(self):
+        elapsed = max(time.time() - self.connected_at, 1e-9)
+        return {'peer': self.peer, 'connected': self.connected, 'frames': self.frames, 'samples': self.samples,
+                'bytes': self.bytes, 'rate': self.samples / elapsed,
+                'lag_ms': self.lag_ewma * 1000, 'lag_last_ms': self.lag_last * 1000, 'lag_max_ms': self.lag_max * 1000}
+
+
+class IngestHub:
+    def __init__(self, address=None, store=None, queue_frames=QUEUE_FRAMES):
+        self.address = address or os.environ.get('MES_INGEST_ADDR', DEFAULT_ADDRESS)
+        self.store = store if store is not None else get_telemetry_store()
+        self.queue_frames = queue_frames
+        self.connections = []
+        self.error = None
+        # 最新值表，按全局设备编号索引
+        self._lock = threading.Lock()
+        self._names, self._gid = [], {}
+        self._latest = np.full((64, len(SIGNALS)), np.nan); self._latest_ts = np.zeros(64)
+        self._produced = np.zeros(64)   # 按速度 (m/min) 累计的产量 (米)
+        self._loop = self._thread = self._queue = self._stopping = None
+        self._writers = set()
+        self._ready = threading.Event()
+
+    # ---------------- 生命周期 ----------------
+    def start(self):
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=self._run, name='ingest-server', daemon=True)
+        self._thread.start(); self._ready.wait(5.0)
+        if self.error is not None: print(f"采集服务启动失败 ({self.address}): {self.error}")
+
+    def stop(self):
+        if self._thread is None: return
+        if self._loop is not None and self._stopping is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(); self._thread = None
+        self.store.flush()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except Exception as e:
+            self.error = e
+        finally:
+            self._loop.close(); self._ready.set()
+
+    async def _serve(self):
+        self._queue = asyncio.Queue(self.queue_frames); self._stopping = asyncio.Event()
+        if self.address.startswith('unix:'):
+            path = self.address[len('unix:'):]
+            if os.path.exists(path): os.remove(path)
+            server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            host, port = self.address.rsplit(':', 1)
+            server = await asyncio.start_server(self._handle, host, int(port))
+        consumer = asyncio.ensure_future(self._consume())
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+            server.close()
+            for writer in list(self._writers): writer.close()
+        # 把已经收下的帧写完再退出
+        await self._queue.join()
+        consumer.cancel()
+
+    # ---------------- 接收与写入 ----------------
+    async def _handle(self, reader, writer):
+        conn = ConnectionStats(writer.get_extra_info('peername') or writer.get_extra_info('sockname'))
+        self.connections.append(conn); self._writers.add(writer)
+        local = np.full(0, -1, dtype=np.int64)   # 连接内设备编号 -> 全局编号
+        try:
+            while True:
+                (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+                if length > MAX_PAYLOAD: raise ProtocolError(f"消息过长: {length} 字节")
+                payload = await reader.readexactly(length)
+                conn.bytes += LENGTH.size + length
+                kind, a, b = decode_message(payload)
+                if kind == MSG_REGISTER:
+                    if a >= len(local): local = np.concatenate([local, np.full(max(a + 1 - len(local), len(local)), -1, dtype=np.int64)])
+                    local[a] = self.device_index(b)
+                    continue
+                devices = b['device']
+                if len(devices) == 0: continue
+                if int(devices.max()) >= len(local) or (local[devices] < 0).any():
+                    raise ProtocolError("采样中包含未登记的设备编号")
+                values = np.column_stack([b[signal] for signal in SIGNALS]).astype(np.float64)
+                await self._queue.put((conn, a, local[devices], values))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as e:
+            print(f"采集连接 {conn.peer} 协议错误，已断开: {e}")
+        finally:
+            conn.connected = False; self._writers.discard(writer); writer.close()
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < BATCH_FRAMES and not self._queue.empty(): batch.append(self._queue.get_nowait())
+            try:
+                await loop.run_in_executor(None, self._commit, batch)
+            except Exception as e:
+                print(f"采集数据写入失败: {e}")
+            for _ in batch: self._queue.task_done()
+
+    def _commit(self, batch):
+        """在线程池中执行: 写入时序存储并刷新最新值表"""
+        for conn, ts, gids, values in batch:
+            names = [self._names[g] for g in gids.tolist()]
+            self.store.append_columns(names, ts, {signal: values[:, i] for i, signal in enumerate(SIGNALS)})
+            with self._lock:
+                previous = self._latest_ts[gids]
+                fresh = ts > previous
+                gap = np.where(previous > 0, np.clip(ts - previous, 0.0, MAX_GAP), 0.0)
+                speed = values[:, SIGNALS.index('speed')]
+                self._produced[gids] += np.where(fresh, np.maximum(speed, 0.0) * gap / 60.0, 0.0)
+                self._latest[gids[fresh]] = values[fresh]; self._latest_ts[gids[fresh]] = ts
+            conn.record(time.time() - ts, len(gids))
+
+    # ---------------- 查询 (任意线程) ----------------
+    def device_index(self, name):
+        with self._lock:
+            gid = self._gid.get(name)
+            if gid is None:
+                gid = self._gid[name] = len(self._names); self._names.append(name)
+                if gid >= len(self._latest_ts):
+                    grow = len(self._latest_ts)
+                    self._latest = np.vstack([self._latest, np.full((grow, len(SIGNALS)), np.nan)])
+                    self._latest_ts = np.concatenate([self._latest_ts, np.zeros(grow)])
+                    self._produced = np.concatenate([self._produced, np.zeros(grow)])
+            return gid
+
+    def latest(self, name):
+        """返回 (时间戳, {信号: 数值})；没有数据时返回 None"""
+        with self._lock:
+            gid = self._gid.get(name)
+            if gid is None or self._latest_ts[gid] == 0: return None
+            return float(self._latest_ts[gid]), dict(zip(SIGNALS, self._latest[gid].tolist()))
+
+    def produced(self, names):
+        """若干设备的累计产量 (米)"""
+        with self._lock:
+            return float(sum(self._produced[self._gid[n]] for n in names if n in self._gid))
+
+    def metrics(self):
+        return {'address': self.address, 'devices': len(self._names),
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'connections': [c.as_dict() for c in self.connections]}
+
+
+_hub = None
+
+def get_ingest_hub():
+    """进程内共享的采集服务，首次调用时启动，程序退出时停止"""
+    global _hub
+    if _hub is None:
+        _hub = IngestHub(); _hub.start()
+        app = QApplication.instance()
+        if app is not None: app.aboutToQuit.connect(shutdown_ingest_hub)
+    return _hub
+
+def shutdown_ingest_hub():
+    global _hub
+    if _hub is not None:
+        _hub.stop(); _hub = None
+
+
+# ---------------- 与模拟线程接口一致的数据源 ----------------
+# 模拟器中的设备名 -> 采集端设备编号
+DEVICE_MAP = STATION_DEVICE_IDS
+PRODUCTION_DEVICES = ('EXTRUDER-A', 'EXTRUDER-B')   # 以挤出机出料计产量
+LINE_DEVICES = {'Line A': 'EXTRUDER-A', 'Line B': 'EXTRUDER-B'}
+LINE_STATIONS = {'Line A': ('挤出机 A', '牵引机 A'), 'Line B': ('挤出机 B',)}   # 瓶颈识别用，按物流顺序
+UNIT_LENGTH = 10.0      # 每件产品的长度 (米)，挤出长度每满一件记一次完工
+NOMINAL_SPEED = 55.0    # m/min，性能开动率的基准
+RUNNING_SPEED = 5.0     # 低于该速度视为停机
+
+class IngestSourceThread(SchedulingSimulatorThread):
+    """计划侧数据沿用 SchedulingSimulatorThread，产量/OEE/设备状态由采集数据计算"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hub = get_ingest_hub()
+        self.output_base = self.hub.produced(PRODUCTION_DEVICES)
+        self.current_output = 0; self.oee = 0.0
+        self.devices_status = {name: 'offline' for name in DEVICE_MAP}
+        self.device_names = tuple(DEVICE_MAP)
+        self.frames = FrameRing(scheduling_frame_dtype(len(self.device_names), len(self.line_names)))
+        self.bottlenecks = BottleneckAnalyzer(LINE_STATIONS)
+        self.station_output = {name: 0.0 for name in DEVICE_MAP}
+        # OEE 只用采集到的数据，不带模拟历史；理想节拍按额定线速度折算
+        self.oee_engine = OeeEngine({name: UNIT_LENGTH / (NOMINAL_SPEED / 60) for name in DEVICE_MAP})
+        self.line_output_device = {line: name for line, device in LINE_DEVICES.items() for name, mapped in DEVICE_MAP.items() if mapped == device}
+        self._output_seen = {}
+        self.oee = 0.0
+        self.unit_base = {line: int(self.hub.produced([device]) // UNIT_LENGTH) for line, device in LINE_DEVICES.items()}
+        self.units_seen = dict.fromkeys(LINE_DEVICES, 0)
+
+    def _seed_history(self):
+        pass    # 只统计采集到的数据，不生成模拟历史
+
+    def _advance(self, elapsed_seconds):
+        now = time.time()
+        for name, device_id in DEVICE_MAP.items():
+            latest = self.hub.latest(device_id)
+            if latest is None or now - latest[0] > STALE_SECONDS: self.devices_status[name] = 'offline'
+            else:
+                self.devices_status[name] = 'running' if latest[1]['speed'] >= RUNNING_SPEED else 'idle'
+                self.station_output[name] = self.hub.produced([device_id]) / UNIT_LENGTH
+            self.oee_engine.set_state(name, now, self.devices_status[name])
+            if name in self._output_seen: self.oee_engine.record_output(name, now, self.station_output[name] - self._output_seen[name])
+            self._output_seen[name] = self.station_output[name]
+        self.current_output = self.hub.produced(PRODUCTION_DEVICES) - self.output_base
+        for line, device in LINE_DEVICES.items():
+            units = int(self.hub.produced([device]) // UNIT_LENGTH) - self.unit_base[line]
+            if units > self.units_seen[line]:
+                self.cycle_analytics.unit_completed(line, now, units - self.units_seen[line]); self.units_seen[line] = units
+        # 采集端没有质检数据，合格品率按 100% 计
+        self.oee = self.line_oee(end=now)['oee'] * 100
+
+
+class IngestDeviceThread(DeviceSimulatorThread):
+    """按 interval 轮询某台设备的最新采样，有新数据时按 DeviceSimulatorThread 的方式发布一帧"""
+    persists_samples = True     # 采集服务收到数据时已写入时序存储，页面不能再写一次
+    def __init__(self, parent=None, device_id='EXTRUDER-A', interval=0.1):
+        super().__init__(parent, device_id, interval)
+        self.hub = get_ingest_hub()
+
+    def run(self):
+        last_ts = None
+        while self.is_running:
+            latest = self.hub.latest(self.device_id)
+            if latest is not None and latest[0] != last_ts:
+                last_ts, values = latest
+                self._publish(last_ts, values['temperature'], values['pressure'], values['speed'])
+            time.sleep(self.interval)
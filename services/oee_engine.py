@@ -0,0 +1,182 @@
+# services/oee_engine.py
+"""
+基于设备状态区间的 OEE 计算。
+
+每台设备接收两类事件:
+    set_state(device, ts, state)          状态变化 (run / idle / fault / setup / offline，兼容 running/blocked/starved 等别名)
+    record_output(device, ts, total, good) 产量增量 (件，可为小数)
+状态按时间顺序追加到数组中，同时保存 "截至第 i 次变化时各状态的累计时长" 前缀和，
+任意时间窗 [a, b] 内各状态时长 = F(b) - F(a)，F 只需一次二分查找，因此查询为 O(log n)；
+产量按 COUNT_BUCKET 秒合并成桶后同样以前缀和保存。
+
+    计划时间   = 窗口时长 - offline (未排产)
+    开动时间   = 计划时间 - fault - setup
+    时间开动率 = 开动时间 / 计划时间
+    性能开动率 = 理想节拍 x 产量 / 开动时间 (待料/堵料等 idle 计入性能损失)，上限 100%
+    合格品率   = 合格数 / 产量
+多台设备合并查询时先累加时长与产量再计算比率。
+"""
+import threading
+import numpy as np
+
+OEE_STATES = ('run', 'idle', 'fault', 'setup', 'offline')
+STATE_ALIASES = {'running': 'run', 'call': 'run', 'blocked': 'idle', 'starved': 'idle'}
+_CODES = {state: code for code, state in enumerate(OEE_STATES)}
+OEE_TOTALS = ('planned_time', 'operating_time', 'fault_time', 'setup_time', 'idle_time', 'total', 'good', 'ideal_output')   # 可直接累加的合计字段
+COUNT_BUCKET = 60.0     # 产量合并粒度 (秒)
+INITIAL_CAPACITY = 1024
+
+def oee_from_totals(totals):
+    """
+    由时长与产量合计 (标量或数组) 计算各比率，返回补全了 oee/availability/performance/quality 的新字典；
+    多台设备、多个时段的汇总先累加这些合计再调用本函数。
+    """
+    operating, planned = np.asarray(totals['operating_time'], dtype=np.float64), np.asarray(totals['planned_time'], dtype=np.float64)
+    total, good, ideal_output = (np.asarray(totals[name], dtype=np.float64) for name in ('total', 'good', 'ideal_output'))
+    ratio = lambda a, b: np.divide(a, b, out=np.zeros_like(a), where=b > 0)
+    availability = ratio(operating, planned); performance = np.minimum(1.0, ratio(total, ideal_output)); quality = ratio(good, total)
+    return {'oee': availability * performance * quality, 'availability': availability,
+            'performance': performance, 'quality': quality, **totals}
+
+def _grow(array, size):
+    if size <= len(array): return array
+    grown = np.empty((max(size, len(array) * 2),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _DeviceLedger:
+    def __init__(self, ideal_cycle):
+        self.ideal_cycle = ideal_cycle
+        self.t = np.empty(INITIAL_CAPACITY); self.code = np.empty(INITIAL_CAPACITY, dtype=np.uint8)
+        self.cum = np.empty((INITIAL_CAPACITY, len(OEE_STATES)))    # 截至 t[i] 各状态的累计时长
+        self.n = 0
+        self.ct = np.empty(INITIAL_CAPACITY); self.ccum = np.empty((INITIAL_CAPACITY, 2))   # 截至第 i 桶的 (产量, 合格数)
+        self.cn = 0
+        self.last_ts = None     # 最近一次收到事件的时刻，查询不会外推到此之后
+
+    def set_state(self, ts, code):
+        n = self.n
+        if n:
+            ts = max(ts, self.t[n - 1])     # 乱序事件按最后时刻处理
+            self.last_ts = max(self.last_ts, ts)
+            if self.code[n - 1] == code: return
+            if ts == self.t[n - 1]: self.code[n - 1] = code; return
+        else: self.last_ts = ts
+        self.t = _grow(self.t, n + 1); self.code = _grow(self.code, n + 1); self.cum = _grow(self.cum, n + 1)
+        if n:
+            self.cum[n] = self.cum[n - 1]; self.cum[n, self.code[n - 1]] += ts - self.t[n - 1]
+        else: self.cum[n] = 0.0
+        self.t[n] = ts; self.code[n] = code; self.n = n + 1
+
+    def record_output(self, ts, total, good):
+        cn = self.cn
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        if cn and ts - self.ct[cn - 1] < COUNT_BUCKET:
+            self.ccum[cn - 1] += (total, good); return
+        self.ct = _grow(self.ct, cn + 1); self.ccum = _grow(self.ccum, cn + 1)
+        self.ccum[cn] = (self.ccum[cn - 1] if cn else 0.0) + np.array((total, good))
+        self.ct[cn] = max(ts, self.ct[cn - 1]) if cn else ts; self.cn = cn + 1
+
+    def _state_prefix(self, x):
+        if self.last_ts is not None: x = min(x, self.last_ts)
+        i = int(np.searchsorted(self.t[:self.n], x, side='right')) - 1
+        if i < 0: return np.zeros(len(OEE_STATES))
+        value = self.cum[i].copy(); value[self.code[i]] += x - self.t[i]
+        return value
+
+    def _count_prefix(self, x):
+        i = int(np.searchsorted(self.ct[:self.cn], x, side='right')) - 1
+        return self.ccum[i] if i >= 0 else np.zeros(2)
+
+    def state_prefix_many(self, xs):
+        """_state_prefix 的向量化版本: 一次 searchsorted 求出所有时刻的前缀"""
+        if self.last_ts is not None: xs = np.minimum(xs, self.last_ts)
+        i = np.searchsorted(self.t[:self.n], xs, side='right') - 1
+        out = np.zeros((len(xs), len(OEE_STATES)))
+        valid = np.flatnonzero(i >= 0); iv = i[valid]
+        out[valid] = self.cum[iv]
+        out[valid, self.code[iv]] += xs[valid] - self.t[iv]
+        return out
+
+    def count_prefix_many(self, xs):
+        i = np.searchsorted(self.ct[:self.cn], xs, side='right') - 1
+        out = np.zeros((len(xs), 2)); valid = i >= 0
+        out[valid] = self.ccum[i[valid]]
+        return out
+
+    def window(self, start, end):
+        """返回 (各状态时长, (产量, 合格数))"""
+        if end <= start: return np.zeros(len(OEE_STATES)), np.zeros(2)
+        return self._state_prefix(end) - self._state_prefix(start), self._count_prefix(end) - self._count_prefix(start)
+
+
+class OeeEngine:
+    """
+    ideal_cycles: {设备: 理想节拍 (秒/件)}；未登记的设备在第一次收到事件时以 default_cycle 登记。
+    set_state/record_output 在数据线程中调用，query 可在任意线程中调用。
+    """
+    def __init__(self, ideal_cycles=None, default_cycle=10.0):
+        self._lock = threading.Lock()
+        self.default_cycle = default_cycle
+        self._devices = {device: _DeviceLedger(cycle) for device, cycle in (ideal_cycles or {}).items()}
+
+    def devices(self):
+        with self._lock: return list(self._devices)
+
+    def _ledger(self, device):
+        ledger = self._devices.get(device)
+        if ledger is None: ledger = self._devices[device] = _DeviceLedger(self.default_cycle)
+        return ledger
+
+    def set_state(self, device, ts, state):
+        state = STATE_ALIASES.get(state, state)
+        with self._lock: self._ledger(device).set_state(ts, _CODES.get(state, _CODES['offline']))
+
+    def record_output(self, device, ts, total, good=None):
+        if total <= 0: return
+        with self._lock: self._ledger(device).record_output(ts, total, total if good is None else good)
+
+    def series(self, device, edges):
+        """
+        设备在相邻边界 [edges[i], edges[i+1]) 内的 OEE 序列 (向量化，适合按天/小时/分钟的明细)。
+        返回 {字段: 数组}，字段与 query() 相同。
+        """
+        edges = np.asarray(edges, dtype=np.float64); buckets = max(0, len(edges) - 1)
+        with self._lock:
+            ledger = self._devices.get(device)
+            if ledger is None or not buckets: times, counts, cycle = np.zeros((buckets, len(OEE_STATES))), np.zeros((buckets, 2)), 1.0
+            else:
+                times = np.diff(ledger.state_prefix_many(edges), axis=0); counts = np.diff(ledger.count_prefix_many(edges), axis=0)
+                cycle = ledger.ideal_cycle
+        operating = times[:, _CODES['run']] + times[:, _CODES['idle']]
+        return oee_from_totals({
+            'planned_time': operating + times[:, _CODES['fault']] + times[:, _CODES['setup']], 'operating_time': operating,
+            'fault_time': times[:, _CODES['fault']], 'setup_time': times[:, _CODES['setup']], 'idle_time': times[:, _CODES['idle']],
+            'total': counts[:, 0], 'good': counts[:, 1], 'ideal_output': operating / cycle,
+        })
+
+    def query(self, devices, start, end):
+        """设备 (或设备列表) 在 [start, end) 内的 OEE 及其组成"""
+        if isinstance(devices, str): devices = [devices]
+        times = np.zeros(len(OEE_STATES)); total = good = ideal_output = 0.0
+        with self._lock:
+            for device in devices:
+                ledger = self._devices.get(device)
+                if ledger is None: continue
+                state_time, (count, ok) = ledger.window(start, end)
+                times += state_time; total += float(count); good += float(ok)
+                ideal_output += float(state_time[_CODES['run']] + state_time[_CODES['idle']]) / ledger.ideal_cycle
+        seconds = dict(zip(OEE_STATES, times.tolist()))
+        planned = seconds['run'] + seconds['idle'] + seconds['fault'] + seconds['setup']
+        operating = seconds['run'] + seconds['idle']
+        availability = operating / planned if planned > 0 else 0.0
+        performance = min(1.0, total / ideal_output) if ideal_output > 0 else 0.0
+        quality = good / total if total > 0 else 0.0
+        return {
+            'oee': availability * performance * quality, 'availability': availability,
+            'performance': performance, 'quality': quality,
+            'planned_time': planned, 'operating_time': operating,
+            'fault_time': seconds['fault'], 'setup_time': seconds['setup'], 'idle_time': seconds['idle'],
+            'total': total, 'good': good, 'ideal_output': ideal_output,
+        }
@@ -0,0 +1,150 @@
+# services/order_repository.py
+"""
+内存中的订单仓库 (订单池看板、排程工作台、工单管理共用)。
+
+    _orders        订单 id -> 订单字典，按 id 查找为 O(1)
+    _by_status     状态 -> {订单 id: None} (保持插入顺序的集合)，按状态取订单不扫描全部订单
+    _by_due        [(交期, 订单 id)] 有序列表，交期区间用 bisect 定位
+    _by_priority   [(-优先级, 订单 id)] 有序列表，优先级从高到低
+缺少 due_date / priority 字段的订单不进入对应索引。
+
+每次修改在锁内更新数据与索引，释放锁后通知监听者 callback(event, ids)，event 为 ADDED / UPDATED / REMOVED；
+批量修改 (set_status) 只通知一次。视图据此只更新受影响的行。
+"""
+import bisect
+import threading
+import weakref
+
+ADDED, UPDATED, REMOVED = 'added', 'updated', 'removed'
+_LAST_ID = chr(0x10FFFF)     # 大于任何订单 id，用于 (交期, id) 的区间上界
+
+class OrderRepository:
+    def __init__(self, orders=()):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._orders = {}
+        self._by_status = {}
+        self._by_due = []; self._by_priority = []
+        self._issued = {}   # 前缀 -> next_id() 发出过的最大编号
+        for order in orders: self._insert(order)
+
+    # ---------------- 索引维护 (调用方持有锁) ----------------
+    @staticmethod
+    def _due_key(order):
+        due = order.get('due_date')
+        return None if due is None else (due, order['id'])
+
+    @staticmethod
+    def _priority_key(order):
+        priority = order.get('priority')
+        return None if priority is None else (-priority, order['id'])
+
+    def _index(self, order):
+        self._by_status.setdefault(order.get('status'), {})[order['id']] = None
+        for ordered, key in ((self._by_due, self._due_key(order)), (self._by_priority, self._priority_key(order))):
+            if key is not None: bisect.insort(ordered, key)
+
+    def _unindex(self, order):
+        self._by_status.get(order.get('status'), {}).pop(order['id'], None)
+        for ordered, key in ((self._by_due, self._due_key(order)), (self._by_priority, self._priority_key(order))):
+            if key is None: continue
+            i = bisect.bisect_left(ordered, key)
+            if i < len(ordered) and ordered[i] == key: del ordered[i]
+
+    def _insert(self, order):
+        if order['id'] in self._orders: raise ValueError(f"订单 {order['id']} 已存在")
+        self._orders[order['id']] = order; self._index(order)
+
+    # ---------------- 通知 ----------------
+    def add_listener(self, callback):
+        """注册变更回调 callback(event, ids)。只保存弱引用，视图销毁后自动失效"""
+        self._listeners.append(weakref.WeakMethod(callback) if hasattr(callback, '__self__') else (lambda cb=callback: cb))
+
+    def _notify(self, event, ids):
+        if not ids: return
+        for listener in list(self._listeners):
+            callback = listener()
+            if callback is None: self._listeners.remove(listener); continue
+            try:
+                callback(event, ids)
+            except RuntimeError: # 视图对应的 Qt 对象已被删除
+                self._listeners.remove(listener)
+
+    # ---------------- 修改 ----------------
+    def add(self, order):
+        with self._lock: self._insert(order)
+        self._notify(ADDED, [order['id']])
+        return order
+
+    def update(self, order_id, changes):
+        """修改一条订单的字段 (不能修改 id)，返回是否存在该订单"""
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None: return False
+            self._unindex(order); order.update(changes); order['id'] = order_id; self._index(order)
+        self._notify(UPDATED, [order_id])
+        return True
+
+    def set_status(self, order_ids, status):
+        """批量修改状态 (只动状态索引)，返回实际发生变化的订单 id"""
+        changed = []
+        with self._lock:
+            target = self._by_status.setdefault(status, {})
+            for order_id in order_ids:
+                order = self._orders.get(order_id)
+                if order is None or order.get('status') == status: continue
+                self._by_status.get(order.get('status'), {}).pop(order_id, None)
+                order['status'] = status; target[order_id] = None
+                changed.append(order_id)
+        self._notify(UPDATED, changed)
+        return changed
+
+    def remove(self, order_id):
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is None: return None
+            self._unindex(order)
+        self._notify(REMOVED, [order_id])
+        return order
+
+    def next_id(self, prefix='ORD-', width=3):
+        """新订单号: 前缀 + (现有订单与已发出编号中的最大值 + 1)，删除订单后不会与现有订单重号"""
+        with self._lock:
+            numbers = [int(order_id[len(prefix):]) for order_id in self._orders
+                       if order_id.startswith(prefix) and order_id[len(prefix):].isdigit()]
+            number = self._issued[prefix] = max(numbers + [self._issued.get(prefix, 0)]) + 1
+        return f"{prefix}{number:0{width}d}"
+
+    # ---------------- 查询 ----------------
+    def get(self, order_id):
+        return self._orders.get(order_id)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __iter__(self):
+        with self._lock: return iter(list(self._orders.values()))
+
+    def by_status(self, status):
+        with self._lock: return [self._orders[order_id] for order_id in self._by_status.get(status, ())]
+
+    def due_between(self, start=None, end=None):
+        """交期在 [start, end] 内的订单 (按交期排序)，None 表示不限"""
+        with self._lock:
+            lo = 0 if start is None else bisect.bisect_left(self._by_due, (start, ''))
+            hi = len(self._by_due) if end is None else bisect.bisect_right(self._by_due, (end, _LAST_ID))
+            return [self._orders[order_id] for _, order_id in self._by_due[lo:hi]]
+
+    def by_priority(self, limit=None, status=None):
+        """按优先级从高到低，可只取某状态、前 limit 条"""
+        result = []
+        with self._lock:
+            for _, order_id in self._by_priority:
+                order = self._orders[order_id]
+                if status is not None and order.get('status') != status: continue
+                result.append(order)
+                if limit is not None and len(result) >= limit: break
+        return result
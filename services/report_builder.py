@@ -0,0 +1,139 @@
+# services/report_builder.py
+"""
+不依赖界面的报表计算，报表页面 (pages/page_reports.py) 与批量报表命令行 (report_cli.py) 共用。
+
+    mock_production_dataset  模拟产量数据: 每天每班每条产线一条记录 (随机产品)，直接按列生成
+    daily_summary            按日合计 -> 计划/实际产量、不良、停机与合格率
+    oee_detail               各产线按固定粒度 (分钟) 的 OEE 明细，列式拼接，去掉没有计划时间的格子；可只算某段时间/某几条产线
+    period_starts            日期数组 -> 所在日/周 (周一)/月的第一天，用于按周期分组
+    shift_oee                每条产线每个班次一行的 OEE 合计，并按产量记录标注该班生产的产品
+    group_oee                按 产线/产品/班次/日期 (或其组合) 分组，bincount 累加合计后再算比率
+全部为 NumPy 向量化运算，结果是 {列名: 数组}。
+"""
+from datetime import datetime, timedelta
+import numpy as np
+
+from services.report_dataset import ReportDataset, VALUE_COLUMNS
+from services.oee_engine import OEE_TOTALS, oee_from_totals
+
+PRODUCTS = ["5mm 滴灌管", "8mm 滴灌管", "12mm PE管"]
+SHIFTS = ["1班", "2班", "3班"]
+PERIODS = ('day', 'week', 'month')
+GROUP_KEYS = ('line', 'product', 'shift', 'date')
+UNREGISTERED = '未登记'
+_EPOCH_MONDAY = np.datetime64('1970-01-05', 'D')
+
+def mock_production_dataset(lines, days=30, end=None, rng=None, last_day_shifts=None):
+    """
+    end 为最后一天 (date，默认今天)；rng 为 np.random.Generator (默认新建)。
+    last_day_shifts: 最后一天只生成前几个班次 (已经结束的班)，None 为全部；
+    尚未结束的班次由实时数据在换班时补入，不能预先有模拟记录。
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    lines = list(lines); last = np.datetime64(end or datetime.now().date(), 'D')
+    per_day = len(SHIFTS) * len(lines); count = days * per_day
+    index = np.arange(count)
+    plan = rng.integers(1000, 1700, count).astype(np.float64)
+    actual = np.floor(plan * rng.uniform(0.85, 0.98, count))
+    columns = {
+        'date': last - (days - 1) + index // per_day,
+        'shift': (index // len(lines) % len(SHIFTS)).astype(np.uint16), 'line': (index % len(lines)).astype(np.uint16),
+        'product': rng.integers(0, len(PRODUCTS), count).astype(np.uint16),
+        'plan_output': plan, 'actual_output': actual,
+        'defects': np.floor(actual * rng.uniform(0.01, 0.05, count)),
+        'downtime_hours': np.round(rng.uniform(0.03, 0.33, count), 2),
+    }
+    if last_day_shifts is not None:
+        keep = (index < (days - 1) * per_day) | (columns['shift'] < last_day_shifts)
+        columns = {name: array[keep] for name, array in columns.items()}
+    return ReportDataset(columns, {'shift': list(SHIFTS), 'line': lines, 'product': list(PRODUCTS)})
+
+def daily_summary(dates, sums):
+    """dates/sums 为 ReportRollups.query()['daily'] 或 ReportDataset.group_by_date() 的结果"""
+    actual = sums['actual_output']
+    quality_rate = np.divide((actual - sums['defects']) * 100, actual, out=np.zeros_like(actual), where=actual > 0)
+    return {'date': dates, **{name: sums[name] for name in VALUE_COLUMNS}, 'quality_rate': quality_rate}
+
+def period_starts(dates, period):
+    """period: 'day' / 'week' / 'month'"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if period == 'month': return dates.astype('datetime64[M]').astype('datetime64[D]')
+    if period == 'week': return dates - (dates - _EPOCH_MONDAY).astype(np.int64) % 7
+    return dates
+
+def oee_detail(series, lines, start_date, end_date, minutes=1440, span=None, line_codes=None):
+    """
+    series(line, edges) -> OeeEngine.series() 形式的字典 (如 feed.line_oee_series)。
+    span: (起, 止) epoch，只计算与之相交的格子 (下钻时)；line_codes: 只计算这些产线 (lines 的下标)，None 为全部。
+    返回 {'time': datetime64 标签, 'start': 格子起点 (epoch), 'line': 产线编码 (lines 的下标), 以及 OEE 各字段}。
+    """
+    start = datetime.combine(start_date, datetime.min.time()).timestamp(); step = minutes * 60.0
+    buckets = ((end_date - start_date).days + 1) * 1440 // minutes
+    first, last = 0, buckets
+    if span is not None:
+        first = min(max(0, int((span[0] - start) // step)), buckets)
+        last = max(first, min(buckets, int(np.ceil((span[1] - start) / step))))
+    index = np.arange(first, last + 1)
+    edges = start + index * step
+    labels = np.datetime64(start_date, 'm') + index[:-1] * minutes
+    if minutes >= 1440: labels = labels.astype('datetime64[D]')
+    parts = {'time': [labels[:0]], 'start': [edges[:0]], 'line': [np.zeros(0, dtype=np.int32)]}
+    codes = range(len(lines)) if line_codes is None else line_codes
+    for code in (codes if last > first else ()):
+        line = lines[code]
+        values = series(line, edges)
+        keep = np.flatnonzero(values['planned_time'] > 0)
+        parts['time'].append(labels[keep]); parts['start'].append(edges[keep]); parts['line'].append(np.full(len(keep), code, dtype=np.int32))
+        for name, array in values.items(): parts.setdefault(name, []).append(array[keep])
+    return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+def shift_oee(series, lines, start_date, end_date, calendar, dataset=None):
+    """
+    series(line, edges) 同 oee_detail；calendar 为 ShiftCalendar。
+    返回 (rows, categories):
+        rows        {'date': 日序号 (相对 start_date), 'shift': 班次编码, 'line': 产线编码, 'product': 产品编码, 以及 OEE_TOTALS}
+        categories  {'date': datetime64 日期, 'shift': 班次名, 'line': 产线名, 'product': 产品名}
+    产品取 dataset 中同一 (日期, 班次, 产线) 的记录 (多条时取最后一条)，没有记录的记为 UNREGISTERED。
+    """
+    days = (end_date - start_date).days + 1; shifts = len(calendar.starts); lines = list(lines)
+    edges = np.array([datetime.combine(start_date + timedelta(days=day), datetime.min.time()).timestamp() + minute * 60
+                      for day in range(days) for minute in calendar.starts] +
+                     [datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp() + calendar.starts[0] * 60])
+    slot = np.arange(days * shifts)
+    parts = {name: [] for name in ('date', 'shift', 'line') + OEE_TOTALS}
+    for code, line in enumerate(lines):
+        values = series(line, edges)
+        parts['date'].append(slot // shifts); parts['shift'].append(slot % shifts); parts['line'].append(np.full(len(slot), code))
+        for name in OEE_TOTALS: parts[name].append(values[name])
+    rows = {name: np.concatenate(arrays) if arrays else np.zeros(0) for name, arrays in parts.items()}
+    for key in ('date', 'shift', 'line'): rows[key] = rows[key].astype(np.int64)
+
+    products = list(dataset.categories['product']) if dataset is not None else []
+    if UNREGISTERED not in products: products.append(UNREGISTERED)
+    table = np.full((days, shifts, len(lines)), products.index(UNREGISTERED), dtype=np.int64)
+    records = dataset.select(start_date, end_date) if dataset is not None else None
+    if records is not None and len(records):
+        shift_codes = np.array([calendar.names.index(n) if n in calendar.names else -1 for n in dataset.categories['shift']], dtype=np.int64)
+        line_codes = np.array([lines.index(n) if n in lines else -1 for n in dataset.categories['line']], dtype=np.int64)
+        day = (records['date'] - np.datetime64(start_date, 'D')).astype(np.int64)
+        shift, line = shift_codes[records['shift']], line_codes[records['line']]
+        valid = (shift >= 0) & (line >= 0)
+        table[day[valid], shift[valid], line[valid]] = records['product'][valid]
+    rows['product'] = table[rows['date'], rows['shift'], rows['line']]
+    keep = rows['planned_time'] > 0
+    rows = {name: array[keep] for name, array in rows.items()}
+    categories = {'date': np.datetime64(start_date, 'D') + np.arange(days), 'shift': list(calendar.names), 'line': lines, 'product': products}
+    return rows, categories
+
+def group_oee(rows, keys, mask=None):
+    """
+    keys: 分组列 (GROUP_KEYS 中的一个或多个)；mask: 行筛选 (布尔数组，None 为全部)。
+    返回 ({分组列: 各组编码}, {OEE 各字段: 各组数值})，组按编码升序。
+    """
+    keys = (keys,) if isinstance(keys, str) else tuple(keys)
+    if mask is not None: rows = {name: array[mask] for name, array in rows.items()}
+    codes = np.stack([rows[key] for key in keys], axis=1) if keys else np.zeros((len(rows['planned_time']), 0), dtype=np.int64)
+    groups, inverse = np.unique(codes, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    totals = {name: np.bincount(inverse, weights=rows[name], minlength=len(groups)) for name in OEE_TOTALS}
+    return {key: groups[:, i] for i, key in enumerate(keys)}, oee_from_totals(totals)
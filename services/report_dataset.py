@@ -0,0 +1,90 @@
+# services/report_dataset.py
+"""
+生产报表的列式数据集。
+
+每条记录是一个 (日期, 班次, 产线, 产品) 的产量汇总，按列保存为 NumPy 数组并按日期排序:
+    date            datetime64[D]
+    shift/line/product  类别编码 (uint16)，名称表在 categories 中
+    plan_output / actual_output / defects / downtime_hours  数值列
+日期范围筛选用 searchsorted 得到切片 (视图，不拷贝)；
+按日期分组用 np.add.reduceat (数据已按日期有序)，按类别分组用 np.bincount，均为向量化运算。
+"""
+from datetime import date as _date
+import numpy as np
+
+KEY_COLUMNS = ('shift', 'line', 'product')
+VALUE_COLUMNS = ('plan_output', 'actual_output', 'defects', 'downtime_hours')
+
+class ReportDataset:
+    def __init__(self, columns, categories):
+        """columns: {列名: 数组} (需已按 date 排序)；categories: {类别列: [名称, ...]}"""
+        self.columns = columns
+        self.categories = categories
+
+    @classmethod
+    def from_records(cls, records):
+        """由字典列表构建 (旧格式兼容: 缺少的类别列记为 '-')"""
+        categories = {key: sorted({r.get(key, '-') for r in records}) for key in KEY_COLUMNS}
+        lookup = {key: {name: code for code, name in enumerate(names)} for key, names in categories.items()}
+        columns = {'date': np.array([r['date'] for r in records], dtype='datetime64[D]')}
+        for key in KEY_COLUMNS: columns[key] = np.array([lookup[key][r.get(key, '-')] for r in records], dtype=np.uint16)
+        for name in VALUE_COLUMNS: columns[name] = np.array([r.get(name, 0) for r in records], dtype=np.float64)
+        return cls.from_columns(columns, categories)
+
+    @classmethod
+    def from_columns(cls, columns, categories):
+        dates = columns['date']
+        if np.any(dates[1:] < dates[:-1]):
+            order = np.argsort(dates, kind='stable'); columns = {name: array[order] for name, array in columns.items()}
+        return cls(columns, categories)
+
+    def append(self, columns):
+        """追加一批记录 (列字典，类别列为编码)；新记录不早于现有数据时直接拼接，否则重新排序"""
+        tail_sorted = not len(self) or not len(columns['date']) or columns['date'].min() >= self.columns['date'][-1]
+        merged = {name: np.concatenate((array, np.asarray(columns[name], dtype=array.dtype))) for name, array in self.columns.items()}
+        if not tail_sorted or np.any(columns['date'][1:] < columns['date'][:-1]):
+            order = np.argsort(merged['date'], kind='stable'); merged = {name: array[order] for name, array in merged.items()}
+        self.columns = merged
+
+    def category_code(self, key, name):
+        """类别名称 -> 编码，新名称追加到类别表末尾"""
+        names = self.categories[key]
+        if name not in names: names.append(name)
+        return names.index(name)
+
+    def __len__(self):
+        return len(self.columns['date'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def select(self, start, end):
+        """[start, end] (含首尾，date 或 datetime64) 内的记录，返回共享内存的切片"""
+        dates = self.columns['date']
+        lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+        return ReportDataset({name: array[lo:hi] for name, array in self.columns.items()}, self.categories)
+
+    def totals(self, names=VALUE_COLUMNS):
+        return {name: float(self.columns[name].sum()) for name in names}
+
+    def group_by_date(self, names=VALUE_COLUMNS):
+        """返回 (日期数组, {列名: 各日合计})"""
+        dates = self.columns['date']
+        if not len(dates): return dates, {name: np.zeros(0) for name in names}
+        starts = np.concatenate(([0], np.flatnonzero(dates[1:] != dates[:-1]) + 1))
+        return dates[starts], {name: np.add.reduceat(self.columns[name], starts) for name in names}
+
+    def group_by(self, key, names=VALUE_COLUMNS):
+        """按类别列 (shift/line/product) 分组，返回 (名称列表, {列名: 各组合计})，只保留出现过的类别"""
+        codes = self.columns[key]; size = len(self.categories[key])
+        sums = {name: np.bincount(codes, weights=self.columns[name], minlength=size) for name in names}
+        present = np.bincount(codes, minlength=size) > 0
+        return [n for n, keep in zip(self.categories[key], present) if keep], {name: s[present] for name, s in sums.items()}
+
+    def records(self):
+        """转换回字典列表 (调试/导出用)"""
+        names = {key: self.categories[key] for key in KEY_COLUMNS}
+        return [{'date': _date.fromisoformat(str(d)), **{key: names[key][self.columns[key][i]] for key in KEY_COLUMNS},
+                 **{name: self.columns[name][i].item() for name in VALUE_COLUMNS}}
+                for i, d in enumerate(self.columns['date'])]
@@ -0,0 +1,95 @@
+# services/report_export.py
+"""
+后台 CSV 导出。
+
+CsvExportThread 在工作线程中从数据源逐块取行并写入文件，界面线程只接收进度信号:
+    chunks      可迭代对象，每次产出一批行 (list of tuple)，在工作线程中惰性生成
+    compress    True 时写 gzip (路径以 .gz 结尾时自动开启)
+先写入同目录下的临时文件，完成后再替换目标文件；取消或出错时删除临时文件，不会留下半截的 CSV。
+
+数据源:
+    dataset_chunks  报表数据集 (ReportDataset) 的逐条记录，每块内按列向量化格式化
+    oee_chunks      OEE 引擎按天 x 产线的明细
+"""
+import os
+import csv
+import gzip
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from services.report_dataset import KEY_COLUMNS, VALUE_COLUMNS
+
+CHUNK_ROWS = 4096
+
+DATASET_HEADER = ["日期", "班次", "产线", "产品", "计划产量(米)", "实际产量(米)", "不良(米)", "停机(h)"]
+OEE_HEADER = ["日期", "产线", "计划运行(h)", "故障停机(h)", "换型(h)", "实际产量", "理论产量", "合格品数",
+              "时间开动率", "性能开动率", "合格品率", "OEE"]
+
+def dataset_chunks(dataset, chunk_rows=CHUNK_ROWS):
+    names = {key: np.array(dataset.categories[key], dtype=object) for key in KEY_COLUMNS}
+    for lo in range(0, len(dataset), chunk_rows):
+        part = {name: array[lo:lo + chunk_rows] for name, array in dataset.columns.items()}
+        columns = [np.datetime_as_string(part['date']).tolist()]
+        columns += [names[key][part[key]].tolist() for key in KEY_COLUMNS]
+        columns += [np.char.mod('%.2f', part[name]).tolist() for name in VALUE_COLUMNS]
+        yield list(zip(*columns))
+
+def oee_chunks(feed, lines, start_date, end_date, chunk_rows=CHUNK_ROWS):
+    """start_date/end_date 为 date (含首尾)；每个单元格是 OEE 引擎的一次区间查询"""
+    rows = []; day = start_date
+    while day <= end_date:
+        day_start = datetime.combine(day, datetime.min.time()).timestamp()
+        for line in lines:
+            r = feed.line_oee([line], day_start, day_start + 86400)
+            if r['planned_time'] <= 0: continue
+            rows.append((day.isoformat(), line, f"{r['planned_time'] / 3600:.2f}", f"{r['fault_time'] / 3600:.2f}",
+                         f"{r['setup_time'] / 3600:.2f}", f"{r['total']:.0f}", f"{r['ideal_output']:.0f}", f"{r['good']:.0f}",
+                         f"{r['availability']:.4f}", f"{r['performance']:.4f}", f"{r['quality']:.4f}", f"{r['oee']:.4f}"))
+            if len(rows) >= chunk_rows: yield rows; rows = []
+        day += timedelta(days=1)
+    if rows: yield rows
+
+def oee_row_count(start_date, end_date, lines):
+    """进度条用的行数上限 (没有计划时间的日子会被跳过)"""
+    return ((end_date - start_date).days + 1) * len(lines)
+
+
+class CsvExportThread(QThread):
+    progress = pyqtSignal(int, int)     # 已写行数, 预计总行数 (未知时为 0)
+    completed = pyqtSignal(str, int)    # 路径, 行数
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, path, header, chunks, total=0, compress=None, parent=None):
+        super().__init__(parent)
+        self.path = path; self.header = header; self.chunks = chunks; self.total = total
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _open(self, path):
+        # utf-8-sig 让 Excel 正确识别中文
+        if self.compress: return gzip.open(path, 'wt', newline='', encoding='utf-8-sig', compresslevel=6)
+        return open(path, 'w', newline='', encoding='utf-8-sig')
+
+    def run(self):
+        temp = f"{self.path}.part"; written = 0
+        try:
+            with self._open(temp) as stream:
+                writer = csv.writer(stream)
+                writer.writerow(self.header)
+                for chunk in self.chunks:
+                    if self._cancel.is_set(): break
+                    writer.writerows(chunk); written += len(chunk)
+                    self.progress.emit(written, self.total)
+            if self._cancel.is_set():
+                os.remove(temp); self.cancelled.emit(); return
+            os.replace(temp, self.path)
+            self.completed.emit(self.path, written)
+        except Exception as exc:
+            if os.path.exists(temp): os.remove(temp)
+            self.failed.emit(str(exc))
@@ -0,0 +1,141 @@
+# services/report_rollups.py
+"""
+报表的日/周/月物化汇总与查询缓存。
+
+ReportRollups 包装一个 ReportDataset，为每个粒度 (day / week / month) 维护
+    sums[粒度][类别列]  形状 (周期数, 类别数, 数值列数) 的合计数组
+新记录通过 append() 到达时只把这批记录 np.add.at 到对应的日/周/月格子里，不重算历史。
+
+区间查询 [start, end] (按天，含首尾) 先拆分: 整月用月汇总，剩余部分中的整周 (周一开始) 用周汇总，
+边缘零散的天用日汇总，因此任意区间最多涉及 "月数 + 约 10 个" 格子。
+按日明细直接取日汇总的切片。查询结果放在 LRU 缓存中，键为 (start, end, 数据版本)，
+append 后版本号加一并清空缓存，调用方持有的旧结果也能按 version 判断是否过期。
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from services.report_dataset import KEY_COLUMNS, VALUE_COLUMNS
+
+CACHE_SIZE = 32
+_EPOCH_MONDAY = np.datetime64('1970-01-05', 'D')   # 周汇总以周一为界
+
+def _day(value):
+    return np.datetime64(value, 'D')
+
+def _month_index(days):
+    return days.astype('datetime64[M]').astype(np.int64)
+
+def _week_index(days):
+    return (days - _EPOCH_MONDAY).astype(np.int64) // 7
+
+
+class ReportRollups:
+    def __init__(self, dataset):
+        self._lock = threading.Lock()
+        self.dataset = dataset
+        self.version = 0
+        self._cache = OrderedDict()
+        self._base = {}     # 粒度 -> 第 0 格对应的周期编号
+        self._sums = {grain: {key: None for key in KEY_COLUMNS} for grain in ('day', 'week', 'month')}
+        self._index(dataset.columns)
+
+    # ---------------- 增量维护 ----------------
+    def _periods(self, dates):
+        return {'day': dates.astype(np.int64), 'week': _week_index(dates), 'month': _month_index(dates)}
+
+    def _index(self, columns):
+        if not len(columns['date']): return
+        values = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in VALUE_COLUMNS])
+        for grain, periods in self._periods(columns['date']).items():
+            base = self._base.setdefault(grain, int(periods.min()))
+            if periods.min() < base: self._shift(grain, base - int(periods.min())); base = self._base[grain] = int(periods.min())
+            rows = periods - base
+            for key in KEY_COLUMNS:
+                codes = np.asarray(columns[key], dtype=np.int64)
+                shape = (int(rows.max()) + 1, len(self.dataset.categories[key]), len(VALUE_COLUMNS))
+                self._sums[grain][key] = table = self._fit(self._sums[grain][key], shape)
+                np.add.at(table, (rows, codes), values)
+
+    @staticmethod
+    def _fit(table, shape):
+        """按需扩大 (周期数按倍增，类别数按需) 并保留已有数据"""
+        if table is None: return np.zeros(shape)
+        if table.shape[0] >= shape[0] and table.shape[1] >= shape[1]: return table
+        rows = max(shape[0], table.shape[0] * 2) if shape[0] > table.shape[0] else table.shape[0]
+        grown = np.zeros((rows, max(shape[1], table.shape[1]), shape[2]))
+        grown[:table.shape[0], :table.shape[1]] = table
+        return grown
+
+    def _shift(self, grain, count):
+        """新数据早于现有最早周期时，在前面补 count 格"""
+        for key, table in self._sums[grain].items():
+            if table is not None: self._sums[grain][key] = np.concatenate((np.zeros((count,) + table.shape[1:]), table))
+
+    def append(self, columns):
+        """新记录到达: 写入数据集并累加到各粒度汇总"""
+        with self._lock:
+            self.dataset.append(columns)
+            self._index(columns)
+            self.version += 1
+            self._cache.clear()
+
+    # ---------------- 查询 ----------------
+    def _segments(self, start, end):
+        """把 [start, end] 拆成 (粒度, 周期编号) 列表"""
+        segments = []; day = start
+        while day <= end:
+            month = day.astype('datetime64[M]')
+            month_last = (month + 1).astype('datetime64[D]') - 1
+            if day == month.astype('datetime64[D]') and month_last <= end:
+                segments.append(('month', int(month.astype(np.int64)))); day = month_last + 1
+            elif int((day - _EPOCH_MONDAY).astype(np.int64)) % 7 == 0 and day + 6 <= end:
+                segments.append(('week', int(_week_index(day)))); day = day + 7
+            else:
+                segments.append(('day', int(day.astype(np.int64)))); day = day + 1
+        return segments
+
+    def _combine(self, segments, key):
+        total = np.zeros((len(self.dataset.categories[key]), len(VALUE_COLUMNS)))
+        for grain, period in segments:
+            table = self._sums[grain][key]
+            if table is None: continue
+            row = period - self._base[grain]
+            if 0 <= row < table.shape[0]: total[:table.shape[1]] += table[row]
+        return total
+
+    def query(self, start, end):
+        """
+        返回 {'totals': {列: 值}, 'by': {类别列: (名称列表, {列: 数组})}, 'daily': (日期数组, {列: 数组}), 'version'}
+        类别分组只包含有数据的类别。
+        """
+        start, end = _day(start), _day(end)
+        cache_key = (str(start), str(end), self.version)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None: self._cache.move_to_end(cache_key); return cached
+            segments = self._segments(start, end)
+            by = {}
+            for key in KEY_COLUMNS:
+                table = self._combine(segments, key)
+                present = table.any(axis=1)
+                names = [n for n, keep in zip(self.dataset.categories[key], present) if keep]
+                by[key] = (names, {name: table[present, i] for i, name in enumerate(VALUE_COLUMNS)})
+            totals = self._combine(segments, KEY_COLUMNS[0]).sum(axis=0)
+            result = {'totals': dict(zip(VALUE_COLUMNS, totals.tolist())), 'by': by,
+                      'daily': self._daily(start, end), 'version': self.version}
+            self._cache[cache_key] = result
+            while len(self._cache) > CACHE_SIZE: self._cache.popitem(last=False)
+            return result
+
+    def _daily(self, start, end):
+        """区间内有数据的各日合计 (日汇总切片)"""
+        table = self._sums['day'][KEY_COLUMNS[0]]
+        if table is None: return np.zeros(0, dtype='datetime64[D]'), {name: np.zeros(0) for name in VALUE_COLUMNS}
+        base = self._base['day']
+        lo = max(0, int(start.astype(np.int64)) - base); hi = min(table.shape[0], int(end.astype(np.int64)) - base + 1)
+        if hi <= lo: return np.zeros(0, dtype='datetime64[D]'), {name: np.zeros(0) for name in VALUE_COLUMNS}
+        daily = table[lo:hi].sum(axis=1)
+        present = np.flatnonzero(daily.any(axis=1))
+        dates = (np.datetime64(base, 'D') + lo + present).astype('datetime64[D]')
+        return dates, {name: daily[present, i] for i, name in enumerate(VALUE_COLUMNS)}
@@ -0,0 +1,55 @@
+# services/series_buffer.py
+import numpy as np
+
+class SeriesBuffer:
+    """
+    定长的时间序列缓冲区 (x, y 两列 float64)。
+    内部使用 2 倍容量的数组，写满后把最新的一半搬到前面，
+    因此 append 是均摊 O(1)，并且 x()/y() 始终返回连续的视图，不需要拷贝。
+    """
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._x = np.empty(self.capacity * 2, dtype=np.float64)
+        self._y = np.empty(self.capacity * 2, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, x, y):
+        if self._end == len(self._x):
+            # 缓冲区尾部已满：保留最近 capacity-1 个点并整体前移
+            keep = self.capacity - 1
+            self._x[:keep] = self._x[self._end - keep:self._end]
+            self._y[:keep] = self._y[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        self._x[self._end] = x; self._y[self._end] = y
+        self._end += 1
+        if self._end - self._start > self.capacity: self._start += 1
+
+    def extend(self, xs, ys):
+        """批量追加 (例如启动时从历史存储回填)，超出容量时只保留最新的部分"""
+        xs = np.asarray(xs, dtype=np.float64)[-self.capacity:]
+        ys = np.asarray(ys, dtype=np.float64)[-self.capacity:]
+        n = len(xs)
+        if n == 0: return
+        keep = min(len(self), self.capacity - n)
+        self._x[:keep] = self._x[self._end - keep:self._end]
+        self._y[:keep] = self._y[self._end - keep:self._end]
+        self._x[keep:keep + n] = xs; self._y[keep:keep + n] = ys
+        self._start, self._end = 0, keep + n
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def x(self):
+        return self._x[self._start:self._end]
+
+    def y(self):
+        return self._y[self._start:self._end]
+
+    def last(self):
+        """返回最新的 (x, y)，缓冲区为空时返回 None"""
+        if self._end == self._start: return None
+        return self._x[self._end - 1], self._y[self._end - 1]
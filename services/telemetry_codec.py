@@ -0,0 +1,150 @@
+# services/telemetry_codec.py
+"""
+遥测分块的压缩格式 (Gorilla 风格)。
+
+- 时间戳: 换算为整数微秒后做 delta-of-delta；规则采样时绝大多数为 0。
+- 数值:   与前一个值的 IEEE754 位模式做 XOR；变化小的值只有中间少量有效位。
+  若整块数据都是某个十进制精度上的定点数 (PLC 的常见情况)，
+  则改用 定点整数 + 一阶差分，通常更小；编码时自动选择两者中更小的一种。
+
+原始 Gorilla 对每个值单独记录前导/尾随零，解码必须逐位串行。
+这里改为每 BLOCK 个值共用一个 (有效位宽, 尾随零) 窗口，配合“非零位图”，
+编码和解码都可以用 numpy 整块向量化完成；压缩率略低于逐值窗口，但解码快得多。
+"""
+import struct
+import numpy as np
+
+MAGIC = b'TSC1'
+BLOCK = 1024
+TICKS_PER_SECOND = 1_000_000   # 时间戳精度: 微秒
+MODE_XOR, MODE_SCALED = 0, 1
+MAX_DECIMALS = 6
+
+_HEADER = struct.Struct('<4sIddBB')
+_SEED = struct.Struct('<qq')
+_BLOCK_HEADER = struct.Struct('<BB')
+
+# --- 位打包工具 ---
+
+def _zigzag(x):
+    x = x.astype(np.int64)
+    return ((x << 1) ^ (x >> 63)).view(np.uint64)
+
+def _unzigzag(u):
+    return (u >> np.uint64(1)).view(np.int64) ^ -(u & np.uint64(1)).view(np.int64)
+
+def _pack_bits(values, width):
+    if width == 0 or len(values) == 0: return b''
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    bits = ((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+    return np.packbits(bits.ravel()).tobytes()
+
+def _unpack_bits(buffer, count, width):
+    if width == 0 or count == 0: return np.zeros(count, dtype=np.uint64)
+    bits = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8), count=count * width)
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    return (bits.reshape(count, width).astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+
+def _encode_sparse(values):
+    """uint64 数组 -> 每块: 位宽, 尾随零, 非零位图, 非零值的定宽打包"""
+    out = [struct.pack('<I', len(values))]
+    for start in range(0, len(values), BLOCK):
+        block = values[start:start + BLOCK]
+        nonzero = block != 0
+        nz = block[nonzero]
+        merged = int(np.bitwise_or.reduce(nz)) if len(nz) else 0
+        trailing = (merged & -merged).bit_length() - 1 if merged else 0
+        width = merged.bit_length() - trailing if merged else 0
+        out.append(_BLOCK_HEADER.pack(width, trailing))
+        out.append(np.packbits(nonzero).tobytes())
+        out.append(_pack_bits(nz >> np.uint64(trailing), width))
+    return b''.join(out)
+
+def _decode_sparse(buffer, offset):
+    (count,) = struct.unpack_from('<I', buffer, offset); offset += 4
+    values = np.zeros(count, dtype=np.uint64)
+    for start in range(0, count, BLOCK):
+        size = min(BLOCK, count - start)
+        width, trailing = _BLOCK_HEADER.unpack_from(buffer, offset); offset += _BLOCK_HEADER.size
+        bitmap_len = (size + 7) // 8
+        nonzero = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8, count=bitmap_len, offset=offset), count=size).astype(bool)
+        offset += bitmap_len
+        nnz = int(nonzero.sum()); payload_len = (nnz * width + 7) // 8
+        packed = _unpack_bits(buffer[offset:offset + payload_len], nnz, width)
+        offset += payload_len
+        values[start:start + size][nonzero] = packed << np.uint64(trailing)
+    return values, offset
+
+# --- 时间戳: delta-of-delta ---
+
+def _encode_timestamps(t):
+    ticks = np.round(np.asarray(t, dtype=np.float64) * TICKS_PER_SECOND).astype(np.int64)
+    first_delta = int(ticks[1] - ticks[0]) if len(ticks) > 1 else 0
+    dod = np.diff(ticks, n=2) if len(ticks) > 2 else np.empty(0, dtype=np.int64)
+    return _SEED.pack(int(ticks[0]), first_delta) + _encode_sparse(_zigzag(dod))
+
+def _decode_timestamps(buffer, offset, count):
+    first, first_delta = _SEED.unpack_from(buffer, offset); offset += _SEED.size
+    dod, offset = _decode_sparse(buffer, offset)
+    deltas = first_delta + np.concatenate(([0], np.cumsum(_unzigzag(dod))))
+    ticks = first + np.concatenate(([0], np.cumsum(deltas)))[:count]
+    return ticks / TICKS_PER_SECOND, offset
+
+# --- 数值: XOR 或 定点差分 ---
+
+def _detect_decimals(v):
+    """返回能无损表示整块数据的最小十进制位数，没有则返回 None"""
+    if not np.all(np.isfinite(v)): return None
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** decimals
+        q = np.round(v * scale)
+        if np.max(np.abs(q)) >= 2 ** 52: return None
+        if np.array_equal(q / scale, v): return decimals
+    return None
+
+def _encode_values_xor(v):
+    bits = v.view(np.uint64)
+    return struct.pack('<Q', int(bits[0])) + _encode_sparse(bits[1:] ^ bits[:-1])
+
+def _encode_values_scaled(v, decimals):
+    q = np.round(v * 10.0 ** decimals).astype(np.int64)
+    return struct.pack('<q', int(q[0])) + _encode_sparse(_zigzag(np.diff(q)))
+
+def _decode_values(buffer, offset, mode, decimals):
+    if mode == MODE_SCALED:
+        (first,) = struct.unpack_from('<q', buffer, offset)
+        deltas, offset = _decode_sparse(buffer, offset + 8)
+        q = first + np.concatenate(([0], np.cumsum(_unzigzag(deltas))))
+        return q / 10.0 ** decimals, offset
+    (first,) = struct.unpack_from('<Q', buffer, offset)
+    xors, offset = _decode_sparse(buffer, offset + 8)
+    bits = np.bitwise_xor.accumulate(np.concatenate((np.array([first], dtype=np.uint64), xors)))
+    return bits.view(np.float64), offset
+
+# --- 对外接口 ---
+
+def encode_chunk(t, v):
+    """把一个分块 (时间戳, 数值) 编码为 bytes；时间戳会被量化到微秒"""
+    t = np.asarray(t, dtype=np.float64); v = np.ascontiguousarray(v, dtype=np.float64)
+    if len(t) == 0 or len(t) != len(v): raise ValueError("分块不能为空，且时间戳与数值长度必须一致")
+    mode, decimals, payload = MODE_XOR, 0, _encode_values_xor(v)
+    scaled_decimals = _detect_decimals(v)
+    if scaled_decimals is not None:
+        scaled = _encode_values_scaled(v, scaled_decimals)
+        if len(scaled) < len(payload): mode, decimals, payload = MODE_SCALED, scaled_decimals, scaled
+    header = _HEADER.pack(MAGIC, len(t), float(t[0]), float(t[-1]), mode, decimals)
+    return header + _encode_timestamps(t) + payload
+
+def read_header(buffer):
+    """只解析头部，返回 (样本数, 首个时间戳, 最后时间戳)，用于重建时间索引"""
+    magic, count, t_first, t_last, _, _ = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC: raise ValueError("不是有效的遥测压缩分块")
+    return count, t_first, t_last
+
+def decode_chunk(buffer):
+    """解码整个分块，返回 (时间戳数组, 数值数组)"""
+    magic, count, _, _, mode, decimals = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC: raise ValueError("不是有效的遥测压缩分块")
+    t, offset = _decode_timestamps(buffer, _HEADER.size, count)
+    v, _ = _decode_values(buffer, offset, mode, decimals)
+    return t, v
@@ -0,0 +1,250 @@
+# services/telemetry_store.py
+import os
+import bisect
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from services import telemetry_codec
+
+# 默认存储位置 (相对工作目录，与 users.json 一致)
+DEFAULT_ROOT = os.path.join('data', 'telemetry')
+CHUNK_SAMPLES = 65536   # 每个分块最多的样本数
+FLUSH_SAMPLES = 256     # 内存中累计多少个样本后写盘
+MAX_OPEN_MAPS = 64      # 同时保持 mmap 的分块数
+MAX_DECODED = 16        # 同时缓存的已解码压缩分块数
+
+# 各信号的仪表分辨率 (小数位)。TelemetryStore 默认不取整；传入 decimals=INSTRUMENT_DECIMALS 时
+# 写入时按此取整，压缩时可走定点差分编码 (有损，超出仪表分辨率的小数位被丢弃)
+INSTRUMENT_DECIMALS = {'temperature': 2, 'pressure': 3, 'speed': 2}
+# 程序共用的存储 (get_telemetry_store) 是否按仪表分辨率保存: MES_TELEMETRY_PRECISION=instrument (默认，
+# 随机游走信号约 18 倍压缩) 或 full (原值保存，约 2.5 倍)
+STORE_PRECISION = os.environ.get('MES_TELEMETRY_PRECISION', 'instrument')
+
+_DTYPE = np.dtype('<f8')
+
+class _SignalSeries:
+    """
+    单个 (设备, 信号) 的追加写存储。
+    正在写入的分块由两个定宽 float64 文件组成: NNNNNN.t (时间戳) 与 NNNNNN.v (数值)，读取时通过 mmap 访问；
+    写满后封存为压缩分块 NNNNNN.tsc (见 telemetry_codec)，原始文件随即删除。
+    chunk_starts/chunk_ends 是分块的时间索引。时间戳必须单调递增；与上一条时间戳相同的样本视为重复投递，直接丢弃。
+    """
+    def __init__(self, directory, decimals=None):
+        self.directory = directory
+        self.decimals = decimals
+        os.makedirs(directory, exist_ok=True)
+        self.chunk_ids, self.chunk_starts, self.chunk_ends, self.chunk_counts = [], [], [], []
+        self.chunk_sealed = []
+        self._pending_t, self._pending_v = [], []
+        self._maps = OrderedDict()
+        self._decoded = OrderedDict()
+        self._load_index()
+
+    def _path(self, chunk_id, column):
+        return os.path.join(self.directory, f"{chunk_id:06d}.{column}")
+
+    def _load_index(self):
+        """启动时扫描分块文件：压缩分块只读头部，原始分块只读首尾两个时间戳，以此重建时间索引"""
+        chunks = {}
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext in ('.t', '.tsc') and stem.isdigit(): chunks.setdefault(int(stem), set()).add(ext)
+        for chunk_id in sorted(chunks):
+            if '.tsc' in chunks[chunk_id]:
+                with open(self._path(chunk_id, 'tsc'), 'rb') as f:
+                    count, first, last = telemetry_codec.read_header(f.read(64))
+                sealed = True
+            else:
+                path = self._path(chunk_id, 't')
+                count = os.path.getsize(path) // _DTYPE.itemsize
+                if count == 0: continue
+                with open(path, 'rb') as f:
+                    first = np.frombuffer(f.read(_DTYPE.itemsize), dtype=_DTYPE)[0]
+                    f.seek((count - 1) * _DTYPE.itemsize)
+                    last = np.frombuffer(f.read(_DTYPE.itemsize), dtype=_DTYPE)[0]
+                sealed = False
+            self.chunk_ids.append(chunk_id); self.chunk_counts.append(count); self.chunk_sealed.append(sealed)
+            self.chunk_starts.append(float(first)); self.chunk_ends.append(float(last))
+        # 旧版本留下的、已经写满的原始分块在这里补做压缩
+        for index in range(len(self.chunk_ids)):
+            if not self.chunk_sealed[index] and self.chunk_counts[index] >= CHUNK_SAMPLES: self._seal(index)
+
+    def last_time(self):
+        if self._pending_t: return self._pending_t[-1]
+        return self.chunk_ends[-1] if self.chunk_ends else None
+
+    def append(self, t, value):
+        last = self.last_time()
+        if last is not None and t <= last:
+            if t == last: return
+            raise ValueError(f"时间戳必须单调递增: {t} < {last}")
+        if self.decimals is not None: value = round(value, self.decimals)
+        self._pending_t.append(t); self._pending_v.append(value)
+        if len(self._pending_t) >= FLUSH_SAMPLES: self.flush()
+
+    def flush(self):
+        t = np.asarray(self._pending_t, dtype=_DTYPE); v = np.asarray(self._pending_v, dtype=_DTYPE)
+        self._pending_t, self._pending_v = [], []
+        while len(t):
+            if not self.chunk_ids or self.chunk_counts[-1] >= CHUNK_SAMPLES:
+                if self.chunk_ids and not self.chunk_sealed[-1]: self._seal(len(self.chunk_ids) - 1)
+                next_id = self.chunk_ids[-1] + 1 if self.chunk_ids else 0
+                self.chunk_ids.append(next_id); self.chunk_counts.append(0); self.chunk_sealed.append(False)
+                self.chunk_starts.append(float(t[0])); self.chunk_ends.append(float(t[0]))
+            room = CHUNK_SAMPLES - self.chunk_counts[-1]
+            head_t, head_v, t, v = t[:room], v[:room], t[room:], v[room:]
+            chunk_id = self.chunk_ids[-1]
+            with open(self._path(chunk_id, 't'), 'ab') as f: f.write(head_t.tobytes())
+            with open(self._path(chunk_id, 'v'), 'ab') as f: f.write(head_v.tobytes())
+            self.chunk_counts[-1] += len(head_t)
+            self.chunk_ends[-1] = float(head_t[-1])
+
+    def _seal(self, index):
+        """把写满的原始分块编码为压缩分块；先写临时文件再替换，中途断电也不会丢数据"""
+        chunk_id = self.chunk_ids[index]
+        self._maps.pop(chunk_id, None)
+        t = np.fromfile(self._path(chunk_id, 't'), dtype=_DTYPE)
+        v = np.fromfile(self._path(chunk_id, 'v'), dtype=_DTYPE)[:len(t)]
+        tmp_path = self._path(chunk_id, 'tsc.tmp')
+        with open(tmp_path, 'wb') as f: f.write(telemetry_codec.encode_chunk(t, v))
+        os.replace(tmp_path, self._path(chunk_id, 'tsc'))
+        os.remove(self._path(chunk_id, 't')); os.remove(self._path(chunk_id, 'v'))
+        self.chunk_sealed[index] = True
+
+    def _decode_chunk(self, index):
+        """返回压缩分块解码后的 (t, v)，最近用过的分块缓存在内存中"""
+        chunk_id = self.chunk_ids[index]
+        arrays = self._decoded.get(chunk_id)
+        if arrays is None:
+            with open(self._path(chunk_id, 'tsc'), 'rb') as f:
+                arrays = self._decoded[chunk_id] = telemetry_codec.decode_chunk(f.read())
+        self._decoded.move_to_end(chunk_id)
+        while len(self._decoded) > MAX_DECODED: self._decoded.popitem(last=False)
+        return arrays
+
+    def _open_chunk(self, index):
+        """返回原始分块的 (t, v) mmap；活动分块的长度会变化，因此以样本数作为缓存键的一部分"""
+        if self.chunk_sealed[index]: return self._decode_chunk(index)
+        key = (self.chunk_ids[index], self.chunk_counts[index])
+        maps = self._maps.get(key[0])
+        if maps is None or maps[0] != key[1]:
+            count = key[1]
+            t = np.memmap(self._path(key[0], 't'), dtype=_DTYPE, mode='r', shape=(count,))
+            v = np.memmap(self._path(key[0], 'v'), dtype=_DTYPE, mode='r', shape=(count,))
+            maps = (count, t, v)
+            self._maps[key[0]] = maps
+        self._maps.move_to_end(key[0])
+        while len(self._maps) > MAX_OPEN_MAPS: self._maps.popitem(last=False)
+        return maps[1], maps[2]
+
+    def iter_range(self, t0, t1):
+        """
+        逐个分块产出 [t0, t1] 内的样本 (t, v)：二分定位分块与分块内位置，O(log n + k)。
+        压缩分块按需逐块解码，不会一次性解码整个时间范围。
+        """
+        first = bisect.bisect_left(self.chunk_ends, t0)
+        last = bisect.bisect_right(self.chunk_starts, t1)
+        for index in range(first, last):
+            t, v = self._open_chunk(index)
+            lo = np.searchsorted(t, t0, side='left'); hi = np.searchsorted(t, t1, side='right')
+            if hi > lo: yield np.array(t[lo:hi]), np.array(v[lo:hi])
+        if self._pending_t and self._pending_t[-1] >= t0 and self._pending_t[0] <= t1:
+            t = np.asarray(self._pending_t, dtype=_DTYPE); v = np.asarray(self._pending_v, dtype=_DTYPE)
+            lo = np.searchsorted(t, t0, side='left'); hi = np.searchsorted(t, t1, side='right')
+            yield t[lo:hi], v[lo:hi]
+
+    def query(self, t0, t1):
+        parts_t, parts_v = [], []
+        for t, v in self.iter_range(t0, t1):
+            parts_t.append(t); parts_v.append(v)
+        if not parts_t:
+            return np.empty(0, dtype=_DTYPE), np.empty(0, dtype=_DTYPE)
+        return np.concatenate(parts_t), np.concatenate(parts_v)
+
+
+class TelemetryStore:
+    """
+    本地时序数据存储，按 设备/信号 分目录保存分块文件。
+    append 只追加到内存缓冲，达到 FLUSH_SAMPLES 后批量写盘；查询会同时覆盖未写盘的数据。
+    decimals: {信号: 小数位}，给出时写入的数值先按该位数取整 (有损，用于换取更高的压缩率)；
+    默认 None，所有信号按原值保存。
+    """
+    def __init__(self, root=DEFAULT_ROOT, decimals=None):
+        self.root = root
+        self.decimals = dict(decimals or {})
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get_series(self, device_id, signal, create=True):
+        key = (device_id, signal)
+        series = self._series.get(key)
+        if series is None:
+            directory = os.path.join(self.root, _safe_name(device_id), _safe_name(signal))
+            if not create and not os.path.isdir(directory): return None
+            series = self._series[key] = _SignalSeries(directory, self.decimals.get(signal))
+        return series
+
+    def append(self, device_id, signal, t, value):
+        with self._lock:
+            self._get_series(device_id, signal).append(float(t), float(value))
+
+    def append_frame(self, device_id, t, values):
+        """
+        一次写入同一时刻的多个信号，例如 {'temperature': 90.1, 'pressure': 2.0}。
+        与 append_columns 一样，时间戳早于已有数据的样本被丢弃 (如系统时钟回拨)，返回丢弃的样本数。
+        """
+        t = float(t); dropped = 0
+        with self._lock:
+            for signal, value in values.items():
+                series = self._get_series(device_id, signal)
+                last = series.last_time()
+                if last is not None and t < last: dropped += 1; continue
+                series.append(t, float(value))
+        return dropped
+
+    def append_columns(self, device_ids, t, columns):
+        """
+        同一时刻多台设备的一批样本，例如采集服务收到的一帧:
+        device_ids 为设备名列表，columns 为 {信号: 与 device_ids 等长的数组}。
+        时间戳早于已有数据的样本被丢弃，返回丢弃的样本数。
+        """
+        t = float(t); dropped = 0
+        with self._lock:
+            for signal, values in columns.items():
+                for device_id, value in zip(device_ids, np.asarray(values, dtype=_DTYPE).tolist()):
+                    series = self._get_series(device_id, signal)
+                    last = series.last_time()
+                    if last is not None and t < last: dropped += 1; continue
+                    series.append(t, value)
+        return dropped
+
+    def query(self, device_id, signal, t0, t1):
+        """返回 (时间戳数组, 数值数组)，例如 query('EXTRUDER-A', 'pressure', 14:00, 15:00)"""
+        with self._lock:
+            series = self._get_series(device_id, signal, create=False)
+            if series is None:
+                return np.empty(0, dtype=_DTYPE), np.empty(0, dtype=_DTYPE)
+            return series.query(float(t0), float(t1))
+
+    def signals(self, device_id):
+        directory = os.path.join(self.root, _safe_name(device_id))
+        if not os.path.isdir(directory): return []
+        return sorted(os.listdir(directory))
+
+    def flush(self):
+        with self._lock:
+            for series in self._series.values(): series.flush()
+
+
+def _safe_name(name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(name))
+
+_default_store = None
+
+def get_telemetry_store():
+    """进程内共享的默认存储实例，数值精度见 STORE_PRECISION"""
+    global _default_store
+    if _default_store is None:
+        _default_store = TelemetryStore(decimals=INSTRUMENT_DECIMALS if STORE_PRECISION == 'instrument' else None)
+    return _default_store
@@ -0,0 +1,182 @@
+# services/window_aggregates.py
+"""
+增量窗口聚合 (看板 KPI 用)。
+
+    ShiftCalendar   班次边界 (默认 00:00 / 08:00 / 16:00 三班)
+    TumblingWindow  按班次 (或固定周期) 切分的滚动窗口: 本班合计/均值/最值/分位数，跨班时自动结转
+    SlidingWindow   最近 N 秒的滑动窗口: 合计/均值/最值/速率/分位数，可选不跨越班次边界
+
+每个样本的更新都是 O(1) (滑动窗口为均摊 O(1)):
+合计/均值用累计和，最值用单调队列，速率 = 窗口合计 / 窗口时长；
+滚动窗口的分位数用 P² 估计，滑动窗口的分位数用定宽直方图 (入窗 +1、出窗 -1，查询扫描固定数量的桶)。
+样本时间戳须单调不减。
+"""
+import math
+from collections import deque
+from datetime import datetime, timedelta
+
+from services.cycle_analytics import P2Quantile
+
+DEFAULT_SHIFTS = ('00:00', '08:00', '16:00')
+
+class ShiftCalendar:
+    """每天按相同时刻换班"""
+    def __init__(self, starts=DEFAULT_SHIFTS, names=None):
+        self.starts = sorted(int(h) * 60 + int(m) for h, m in (text.split(':') for text in starts))
+        self.names = list(names) if names else [f"{i + 1}班" for i in range(len(self.starts))]
+
+    def _locate(self, ts):
+        current = datetime.fromtimestamp(ts)
+        minute = current.hour * 60 + current.minute
+        midnight = current.replace(hour=0, minute=0, second=0, microsecond=0)
+        index = max((i for i, start in enumerate(self.starts) if start <= minute), default=None)
+        if index is None: return len(self.starts) - 1, midnight - timedelta(days=1) + timedelta(minutes=self.starts[-1])
+        return index, midnight + timedelta(minutes=self.starts[index])
+
+    def start(self, ts):
+        """ts 所在班次的开始时刻 (epoch)"""
+        return self._locate(ts)[1].timestamp()
+
+    def end(self, ts):
+        """ts 所在班次的结束时刻，即下一班的开始"""
+        index, begin = self._locate(ts)
+        midnight = begin.replace(hour=0, minute=0)
+        if index + 1 < len(self.starts): return (midnight + timedelta(minutes=self.starts[index + 1])).timestamp()
+        return (midnight + timedelta(days=1, minutes=self.starts[0])).timestamp()
+
+    def name(self, ts):
+        return self.names[self._locate(ts)[0]]
+
+
+class TumblingWindow:
+    """
+    calendar 不为 None 时按班次切分，否则按 period 秒 (从 epoch 0 起对齐) 切分。
+    previous 为上一个窗口结束时的快照。
+    """
+    def __init__(self, calendar=None, period=3600.0, percentiles=()):
+        self.calendar = calendar; self.period = period
+        self.percentile_levels = tuple(percentiles)
+        self.previous = None
+        self.window_start = self.window_end = None
+        self._reset(None)
+
+    def _reset(self, ts):
+        self.count = 0; self.sum = 0.0; self.min = self.max = None; self.last_ts = None
+        self._quantiles = {p: P2Quantile(p) for p in self.percentile_levels}
+        if ts is None: return
+        if self.calendar is not None: self.window_start, self.window_end = self.calendar.start(ts), self.calendar.end(ts)
+        else:
+            self.window_start = math.floor(ts / self.period) * self.period; self.window_end = self.window_start + self.period
+
+    def roll(self, ts):
+        """到达 ts 时若已跨过窗口边界则结转；没有新样本时也可调用 (例如定时刷新)"""
+        if self.window_end is None: self._reset(ts); return False
+        if ts < self.window_end: return False
+        self.previous = self.snapshot(); self._reset(ts)
+        return True
+
+    def add(self, ts, value):
+        self.roll(ts)
+        self.count += 1; self.sum += value; self.last_ts = ts
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for quantile in self._quantiles.values(): quantile.add(value)
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def rate(self, now=None, per=3600.0):
+        """窗口合计按已过时间折算为每 per 秒的速率"""
+        now = self.last_ts if now is None else now
+        if self.window_start is None or now is None or now <= self.window_start: return None
+        return self.sum / (now - self.window_start) * per
+
+    def percentile(self, p):
+        return self._quantiles[p].value()
+
+    def snapshot(self):
+        return {'start': self.window_start, 'end': self.window_end, 'count': self.count, 'sum': self.sum,
+                'mean': self.mean(), 'min': self.min, 'max': self.max,
+                **{f"p{round(p * 100)}": q.value() for p, q in self._quantiles.items()}}
+
+
+class SlidingWindow:
+    """
+    最近 seconds 秒的样本。calendar 不为 None 时窗口同时截断在当前班次开始处 (换班后从零开始)。
+    histogram=(下限, 上限, 桶数) 时支持 percentile()，精度为一个桶宽。
+    """
+    def __init__(self, seconds, calendar=None, histogram=None):
+        self.seconds = seconds; self.calendar = calendar
+        self._samples = deque()     # (时间, 值)
+        self._min = deque(); self._max = deque()    # 单调队列
+        self.sum = 0.0
+        self._shift_start = self._shift_end = None
+        self._hist = None
+        if histogram is not None:
+            self._lo, self._hi, bins = histogram
+            self._hist = [0] * bins; self._width = (self._hi - self._lo) / bins
+        self.last_ts = None
+
+    def _bin(self, value):
+        return min(len(self._hist) - 1, max(0, int((value - self._lo) / self._width)))
+
+    def _evict(self, cutoff):
+        while self._samples and self._samples[0][0] < cutoff:
+            ts, value = self._samples.popleft(); self.sum -= value
+            if self._min and self._min[0][0] <= ts: self._min.popleft()
+            if self._max and self._max[0][0] <= ts: self._max.popleft()
+            if self._hist is not None: self._hist[self._bin(value)] -= 1
+
+    def advance(self, now):
+        """把窗口推进到 now (没有新样本时也可调用)"""
+        cutoff = now - self.seconds
+        if self.calendar is not None:
+            if self._shift_end is None or now >= self._shift_end:
+                self._shift_start, self._shift_end = self.calendar.start(now), self.calendar.end(now)
+            cutoff = max(cutoff, self._shift_start)
+        self._evict(cutoff)
+
+    def add(self, ts, value):
+        self.advance(ts)
+        self._samples.append((ts, value)); self.sum += value; self.last_ts = ts
+        while self._min and self._min[-1][1] >= value: self._min.pop()
+        self._min.append((ts, value))
+        while self._max and self._max[-1][1] <= value: self._max.pop()
+        self._max.append((ts, value))
+        if self._hist is not None: self._hist[self._bin(value)] += 1
+
+    def count(self):
+        return len(self._samples)
+
+    def mean(self):
+        return self.sum / len(self._samples) if self._samples else None
+
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    def span(self, now=None):
+        """窗口实际覆盖的时长 (刚启动或刚换班时小于 seconds)"""
+        now = self.last_ts if now is None else now
+        if now is None: return 0.0
+        start = now - self.seconds
+        if self.calendar is not None and self._shift_start is not None: start = max(start, self._shift_start)
+        if self._samples: start = max(start, self._samples[0][0])
+        return max(0.0, now - start)
+
+    def rate(self, now=None, per=3600.0):
+        """窗口合计 / 覆盖时长，折算为每 per 秒"""
+        span = self.span(now)
+        return self.sum / span * per if span > 0 else None
+
+    def percentile(self, p):
+        if self._hist is None: raise ValueError("percentile() 需要在构造时指定 histogram")
+        total = len(self._samples)
+        if not total: return None
+        rank = p * (total - 1); seen = 0
+        for index, count in enumerate(self._hist):
+            seen += count
+            if seen > rank: return self._lo + (index + 0.5) * self._width
+        return self._hi
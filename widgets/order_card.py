@@ -1,38 +1,60 @@
 # widgets/order_card.py
-from PyQt5.QtWidgets import QFrame, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
-from PyQt5.QtCore import pyqtSignal, Qt
-from PyQt5.QtGui import QColor, QContextMenuEvent
-
-class OrderCard(QFrame):
-    # --- 新增：定义一个自定义信号，在需要显示菜单时发出 ---
-    request_context_menu = pyqtSignal(object, QContextMenuEvent) # (order_id, event)
-
-    def __init__(self, order_data):
-        super().__init__()
-        self.setFrameShape(QFrame.StyledPanel)
-        self.order_data = order_data
-        
-        main_layout = QVBoxLayout(self)
-        header_layout = QHBoxLayout()
-        id_label = QLabel(f"<b>{order_data['id']}</b>")
-        self.score_label = QLabel(f"优先级: {order_data.get('priority', 0)}")
-        header_layout.addWidget(id_label); header_layout.addStretch(); header_layout.addWidget(self.score_label)
-        
-        prod_label = QLabel(order_data['product']); qty_label = QLabel(f"数量: {order_data['quantity']:,} 米")
-        due_date_label = QLabel(f"交期: {order_data['due_date'].strftime('%Y-%m-%d')}")
-        
-        main_layout.addLayout(header_layout); main_layout.addWidget(prod_label); main_layout.addWidget(qty_label); main_layout.addWidget(due_date_label)
-        
-        self.update_color()
-
-    def update_color(self):
-        score = self.order_data.get('priority', 0)
-        if score > 80: color = QColor(255, 205, 210)
-        elif score > 60: color = QColor(255, 224, 178)
-        else: color = QColor(238, 238, 238)
-        self.setStyleSheet(f"background-color: {color.name()}; border: 1px solid #BDBDBD; border-radius: 5px; padding: 8px;")
-
-    # --- 新增：重写右键菜单事件 ---
-    def contextMenuEvent(self, event: QContextMenuEvent):
-        """当用户右键点击卡片时，发出信号"""
-        self.request_context_menu.emit(self.order_data['id'], event)
\ No newline at end of file
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import pyqtSignal, Qt, QSize, QRectF, QEvent
+from PyQt5.QtGui import QColor, QPainter, QPen, QFont
+
+ORDER_ROLE = Qt.UserRole        # 模型中保存订单字典的角色
+CARD_SIZE = QSize(240, 100)
+CARD_MARGIN = 5
+
+PRIORITY_LEVELS = [(80, QColor(255, 205, 210), QColor("#E53935")), (60, QColor(255, 224, 178), QColor("#FB8C00"))]
+DEFAULT_COLORS = (QColor(238, 238, 238), QColor("#9E9E9E"))
+BAND_WIDTH = 6
+
+def priority_color(score):
+    """(卡片底色, 左侧色带颜色)"""
+    for threshold, background, band in PRIORITY_LEVELS:
+        if score > threshold: return background, band
+    return DEFAULT_COLORS
+
+class OrderCardDelegate(QStyledItemDelegate):
+    """
+    直接绘制订单卡片 (编号、优先级色带、产品、数量、交期)，数据取自 index.data(ORDER_ROLE) 的订单字典。
+    不为每张卡片创建控件和样式表，配合 QListView.setUniformItemSizes 可流畅滚动数千张卡片；
+    看板泳道与排程工作台的订单列表共用。右键卡片时发出 request_context_menu。
+    """
+    request_context_menu = pyqtSignal(str, object)    # (order_id, 全局坐标)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.RightButton:
+            order = index.data(ORDER_ROLE)
+            if order: self.request_context_menu.emit(order['id'], event.globalPos()); return True
+        return super().editorEvent(event, model, option, index)
+
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    def paint(self, painter, option, index):
+        order = index.data(ORDER_ROLE)
+        if not order: return super().paint(painter, option, index)
+        painter.save(); painter.setRenderHint(QPainter.Antialiasing)
+        rect = QRectF(option.rect).adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN)
+        selected = bool(option.state & QStyle.State_Selected)
+        background, band = priority_color(order.get('priority', 0))
+        painter.setPen(QPen(QColor("#0288D1"), 2) if selected else QPen(QColor("#BDBDBD"), 1))
+        painter.setBrush(background); painter.drawRoundedRect(rect, 5, 5)
+        painter.setPen(Qt.NoPen); painter.setBrush(band)
+        painter.drawRoundedRect(QRectF(rect.left() + 1, rect.top() + 1, BAND_WIDTH, rect.height() - 2), 3, 3)
+
+        text = rect.adjusted(10 + BAND_WIDTH, 6, -10, -6); line = text.height() / 4
+        font = QFont(option.font); painter.setPen(QColor("#212121"))
+        font.setBold(True); painter.setFont(font)
+        painter.drawText(QRectF(text.left(), text.top(), text.width(), line), Qt.AlignLeft | Qt.AlignVCenter, order['id'])
+        font.setBold(False); painter.setFont(font)
+        painter.drawText(QRectF(text.left(), text.top(), text.width(), line), Qt.AlignRight | Qt.AlignVCenter, f"优先级: {order.get('priority', 0)}")
+        rows = [order['product'], f"数量: {order['quantity']:,} 米", f"交期: {order['due_date'].strftime('%Y-%m-%d')}"]
+        metrics = painter.fontMetrics()
+        for i, value in enumerate(rows, start=1):
+            painter.drawText(QRectF(text.left(), text.top() + i * line, text.width(), line), Qt.AlignLeft | Qt.AlignVCenter,
+                             metrics.elidedText(value, Qt.ElideRight, int(text.width())))
+        painter.restore()